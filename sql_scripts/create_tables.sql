@@ -77,6 +77,8 @@ CREATE TABLE precipitation (
 
 -- Recommended indexes for efficient lookups:
 CREATE INDEX idx_weather_data_city_dt ON weather_data(city_name, dt);
+-- kvuli bodu b) - city names match case insensitively, as in the MongoDB collections
+CREATE INDEX idx_weather_data_city_key_dt ON weather_data (lower(btrim(city_name)), dt);
 CREATE INDEX idx_cities_lat_long ON cities(latitude, longitude);
 
 -- kvuli bodu b)
@@ -86,4 +88,25 @@ CREATE INDEX idx_weather_conditions_data ON weather_conditions(city_name, dt);
 CREATE INDEX idx_precipitation_data ON precipitation(city_name, dt);
 
 -- kvuli bodu a) a b) a podmince umet se dotazovat dle souradnic na bod a)
-CREATE INDEX idx_cities_lat_long ON cities(latitude, longitude);
\ No newline at end of file
+CREATE INDEX idx_cities_lat_long ON cities(latitude, longitude);
+
+-- kvuli bodu a) - partial index only over rainy hours, lets "rain with intensity X on day D" run as an index only scan
+CREATE INDEX idx_precipitation_rain_dt_volume ON precipitation (dt, volume) INCLUDE (city_name) WHERE type = 'rain';
+
+
+-- kvuli bodu c) - daily aggregates, refreshed on load for the days that received new hours
+CREATE TABLE weather_daily (
+                               city_name VARCHAR(255) NOT NULL,
+                               day DATE NOT NULL,
+                               temp_min REAL,
+                               temp_max REAL,
+                               temp_mean REAL,
+                               temp_spread REAL,                  -- temp_max - temp_min
+                               rain_total REAL,                   -- sum of the hourly rain volumes in mm
+                               dominant_condition VARCHAR(255),   -- most frequent weather description of the day
+                               hours INTEGER,                     -- number of hourly records aggregated
+                               PRIMARY KEY (city_name, day),
+                               FOREIGN KEY (city_name) REFERENCES cities(name) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_weather_daily_day_spread ON weather_daily (day, temp_spread DESC);
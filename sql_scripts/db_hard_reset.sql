@@ -1,4 +1,5 @@
 -- Optionally, drop tables if they exist to allow re-running create table script
+DROP TABLE IF EXISTS weather_daily CASCADE;
 DROP TABLE IF EXISTS precipitation CASCADE;
 DROP TABLE IF EXISTS weather_conditions CASCADE;
 DROP TABLE IF EXISTS weather_data CASCADE;
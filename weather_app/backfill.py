@@ -0,0 +1,130 @@
+# File: backfill.py
+"""
+Backfill: loads the hourly history of many cities into the hourly weather store.
+
+    python -m weather_app.backfill --city London --city Prague --start 03/26/2025 --end 04/03/2025
+    python -m weather_app.backfill --cities-file cities.json --start 01/01/2025 --end 03/31/2025 --workers 8
+    python -m weather_app.backfill --cities-file cities.json --start 01/01/2025 --end 03/31/2025 --processes
+
+The range (UTC days, both inclusive) is split into one unit per city and day. Finished units are
+checkpointed in MongoDB, so the same command can be re-run after a crash or Ctrl+C: it resumes
+with the missing units and never stores an hour twice. --reset forgets the checkpoints of the
+given cities first. A cities file is a JSON list of city names or {"name", "lat", "lon"} objects.
+
+Progress is printed live to stderr and the final summary as JSON to stdout. Configuration is read
+from the .env files (see HandlerFactory.get_backfill). With --processes every worker process
+has its own handlers; set API_RATE_LIMIT_BACKEND to "file" or "mongo" so they share one budget.
+"""
+
+import os
+import sys
+import json
+import signal
+import logging
+import argparse
+import calendar
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from weather_app.helpers.HandlerFactory import HandlerFactory
+from weather_app.helpers.Backfill import DAY
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ENV_PATHS = [os.path.join(PROJECT_DIR, ".env.local"), os.path.join(PROJECT_DIR, ".env.public")]
+
+# the Backfill of a worker process, see init_worker
+_worker_backfill = None
+
+
+def init_worker(env_paths):
+    global _worker_backfill
+    # the parent's handlers are not inherited (spawn), every worker opens its own connections
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_backfill = HandlerFactory(env_paths).get_backfill()
+
+
+def run_unit(unit):
+    return _worker_backfill.run_unit(unit)
+
+
+def parse_day(value):
+    """
+    Parse a "mm/dd/yyyy" date into the unix timestamp of its UTC midnight.
+    """
+    return calendar.timegm(datetime.strptime(value, "%m/%d/%Y").timetuple())
+
+
+def load_cities(args):
+    cities = list(args.city or [])
+    if args.cities_file:
+        with open(args.cities_file, "r", encoding="utf-8") as f:
+            cities += json.load(f)
+    return cities
+
+
+def print_progress(progress):
+    finished = progress["done"] + progress["partial"] + progress["failed"]
+    total = progress["units"] - progress["skipped"]
+    eta = "?" if progress["eta_seconds"] is None else f"{progress['eta_seconds']:.0f}s"
+    line = (f"{finished}/{total} units ({progress['failed']} failed), {progress['hours']} hours, "
+            f"{progress['units_per_second']:.2f} units/s, {progress['hours_per_second']:.0f} hours/s, ETA {eta}")
+    if sys.stderr.isatty():
+        print(f"\r{line}\033[K", end="", file=sys.stderr, flush=True)
+    else:
+        print(line, file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--env", action="append", help="A .env file to load (repeatable, default: .env.local and "
+                                                       ".env.public of the project).")
+    parser.add_argument("--city", action="append", help="A city to backfill (repeatable).")
+    parser.add_argument("--cities-file", help="JSON file with the cities to backfill.")
+    parser.add_argument("--start", required=True, help="First day, mm/dd/yyyy.")
+    parser.add_argument("--end", required=True, help="Last day, mm/dd/yyyy.")
+    parser.add_argument("--workers", type=int, help="Units processed in parallel (default: BACKFILL_WORKERS).")
+    parser.add_argument("--processes", action="store_true", help="Run the units on a process pool instead of threads.")
+    parser.add_argument("--reset", action="store_true", help="Forget the checkpoints of the cities first.")
+    args = parser.parse_args(argv)
+
+    cities = load_cities(args)
+    if not cities:
+        parser.error("no cities given, use --city or --cities-file.")
+    start_ts, end_ts = parse_day(args.start), parse_day(args.end) + DAY
+    if end_ts <= start_ts:
+        parser.error("--end is before --start.")
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
+    env_paths = args.env or DEFAULT_ENV_PATHS
+    backfill = HandlerFactory(env_paths).get_backfill()
+    if args.workers:
+        backfill.workers = args.workers
+
+    def shutdown(signum, frame):
+        print(f"\nReceived {signal.Signals(signum).name}, finishing the running units.", file=sys.stderr)
+        backfill.stop()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    executor = runner = None
+    if args.processes:
+        executor = ProcessPoolExecutor(backfill.workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=init_worker, initargs=(env_paths,))
+        runner = run_unit
+    try:
+        if args.reset:
+            print(f"Deleted {backfill.reset(cities)} checkpoints.", file=sys.stderr)
+        summary = backfill.run(cities, start_ts, end_ts, executor=executor, runner=runner,
+                               on_progress=print_progress)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        backfill.mongo_handler.close()
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+    print(json.dumps(summary))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
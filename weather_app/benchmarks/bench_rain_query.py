@@ -0,0 +1,138 @@
+# File: benchmarks/bench_rain_query.py
+"""
+Measure the "where did it rain with intensity X on day D" queries of RainQuery.
+
+--rows synthetic hourly rows (spread over --cities cities) are loaded into the normalized MongoDB
+collection and, with --postgres-url, into PostgreSQL. Then --queries random single day and week
+queries are timed; for each backend the latency percentiles are printed as one JSON object.
+
+    python -m weather_app.benchmarks.bench_rain_query --mongo-url mongodb://localhost:27017 --rows 1000000
+    python -m weather_app.benchmarks.bench_rain_query --postgres-url postgresql://localhost/weather --rows 1000000
+    python -m weather_app.benchmarks.bench_rain_query --mock --rows 20000
+
+The Postgres tables of sql_scripts/create_tables.sql must exist. With --mock, mongomock is used
+and no indexes are created; it has no query planner, so its numbers say nothing about the indexes.
+"""
+
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timezone
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.HourlyWeatherStore import HourlyWeatherStore
+from weather_app.helpers.JsonToPostgres import JsonToPostgres
+from weather_app.helpers.RainQuery import RainQuery, RAIN_INTENSITIES, DAY
+from weather_app.helpers.WeatherCache import location_key
+from weather_app.benchmarks.common import START_TS, percentiles
+
+
+def synthetic_hours(rows, cities, seed=0):
+    """
+    Yield (city, dt, rain) tuples, city by city, roughly 10% of the hours rainy.
+    """
+    rng = random.Random(seed)
+    hours_per_city = max(1, rows // cities)
+    for c in range(cities):
+        for h in range(hours_per_city):
+            rain = round(rng.expovariate(1 / 2.0), 2) if rng.random() < 0.1 else 0.0
+            yield f"city_{c}", START_TS + h * 3600, rain
+
+
+def load_mongo(args, store):
+    collection = store.mongo_handler.get_collection(store.collection_name)
+    if not args.mock:
+        # mongomock checks unique indexes with a scan per insert, which would dominate the load
+        store.ensure_indexes()
+    batch = []
+    for city, dt, rain in synthetic_hours(args.rows, args.cities):
+        batch.append({"location": location_key(city, None, None), "city": city, "dt": dt, "rain": rain, "snow": 0.0,
+                      "temp": 280.0})
+        if len(batch) == 10000:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def load_postgres(args, postgres_handler):
+    responses = {}
+    for city, dt, rain in synthetic_hours(args.rows, args.cities):
+        entry = {"dt": dt, "main": {"temp": 280.0}}
+        if rain:
+            entry["rain"] = {"1h": rain}
+        responses.setdefault(city, []).append(entry)
+    for city, entries in responses.items():
+        converter = JsonToPostgres()
+        converter.add_history({"list": entries}, city, 50.0, 14.0)
+        postgres_handler.copy_rows(converter)
+
+
+def random_days(args, rng):
+    span_days = max(1, args.rows // args.cities // 24)
+    for _ in range(args.queries):
+        first = rng.randrange(span_days)
+        last = min(span_days - 1, first + rng.choice((0, 6)))
+        to_day = lambda d: datetime.fromtimestamp(START_TS + d * DAY, timezone.utc).strftime("%m/%d/%Y")
+        yield to_day(first), to_day(last), rng.choice(list(RAIN_INTENSITIES))
+
+
+def time_queries(args, run_query):
+    rng = random.Random(1)
+    latencies = []
+    rows = 0
+    for start_day, end_day, intensity in random_days(args, rng):
+        started = time.perf_counter()
+        rows += sum(1 for _ in run_query(start_day, end_day, intensity))
+        latencies.append((time.perf_counter() - started) * 1000)
+    result = {"queries": len(latencies), "rows_returned": rows}
+    result.update(percentiles(latencies))
+    result["under_100ms"] = result["p95_ms"] < 100
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--postgres-url", help="Also benchmark PostgreSQL.")
+    parser.add_argument("--mock", action="store_true", help="Use mongomock instead of a real server.")
+    parser.add_argument("--skip-mongo", action="store_true")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    if not args.skip_mongo:
+        db_name = "bench_rain_query"
+        mongo_handler = MongoHandler(args.mongo_url, db_name)
+        if args.mock:
+            import mongomock
+            mongo_handler.client = mongomock.MongoClient()
+            mongo_handler.db = mongo_handler.client[db_name]
+        mongo_handler.client.drop_database(db_name)
+        store = HourlyWeatherStore(mongo_handler)
+        started = time.perf_counter()
+        load_mongo(args, store)
+        query = RainQuery(hourly_store=store)
+        result = {"backend": "mongo", "rows": args.rows, "load_seconds": time.perf_counter() - started}
+        result.update(time_queries(args, lambda s, e, i: query.rainy_hours_mongo(s, e, intensity=i)))
+        print(json.dumps(result))
+        mongo_handler.client.drop_database(db_name)
+        mongo_handler.close()
+
+    if args.postgres_url:
+        from weather_app.handlers.PostgresDbHandler import PostgresDbHandler
+        postgres_handler = PostgresDbHandler(args.postgres_url)
+        query = RainQuery(postgres_handler=postgres_handler)
+        query.ensure_indexes()
+        started = time.perf_counter()
+        load_postgres(args, postgres_handler)
+        postgres_handler.execute_query("ANALYZE precipitation")
+        result = {"backend": "postgres", "rows": args.rows, "load_seconds": time.perf_counter() - started}
+        result.update(time_queries(args, lambda s, e, i: query.rainy_hours_postgres(s, e, intensity=i)))
+        print(json.dumps(result))
+        postgres_handler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# File: benchmarks/bench_retention.py
+"""
+Compare the MongoDB retention strategies against the original list-and-$in implementation.
+
+For every strategy a collection is filled with --documents documents, then --rounds batches of
+--batch-size documents are inserted, each followed by a retention pass. The time and peak Python
+memory of the retention passes are reported as one JSON object per strategy on stdout.
+
+    python -m weather_app.benchmarks.bench_retention --mongo-url mongodb://localhost:27017 --documents 400000
+    python -m weather_app.benchmarks.bench_retention --mock --documents 20000
+
+With --mock, mongomock is used and strategies needing server features (capped collections,
+the TTL monitor) only measure their client side cost or are reported as skipped.
+"""
+
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.handlers.MongoRetention import CountRetention, TtlRetention, CappedRetention
+
+
+class LegacyRetention(CountRetention):
+    """
+    The original MongoHandler.data_retention: materialise the oldest documents in Python and
+    delete them by $in. Kept here only as the baseline of the benchmark.
+    """
+    name = "legacy"
+
+    def apply(self, handler, collection):
+        count = collection.estimated_document_count()
+        if count <= handler.retention_limit:
+            return 0
+        num_to_delete = count - handler.retention_limit
+        oldest_docs = list(collection.find().sort('_id', 1).limit(num_to_delete))
+        ids_to_delete = [doc['_id'] for doc in oldest_docs]
+        return collection.delete_many({'_id': {'$in': ids_to_delete}}).deleted_count
+
+
+def make_document(i):
+    # roughly the size of one hourly history entry
+    return {"city_name": f"city_{i % 1000}", "dt": 1743465600 + i * 3600,
+            "main": {"temp": 280.0, "temp_min": 279.0, "temp_max": 281.0, "pressure": 1013, "humidity": 80},
+            "wind": {"speed": 3.5, "deg": 200}, "clouds": {"all": 75},
+            "weather": [{"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"}]}
+
+
+def make_handler(args, db_name):
+    handler = MongoHandler(args.mongo_url, db_name, retention_limit=args.documents, delete_count=args.batch_size)
+    if args.mock:
+        import mongomock
+        handler.client = mongomock.MongoClient()
+        handler.db = handler.client[db_name]
+    handler.client.drop_database(db_name)
+    return handler
+
+
+def run_strategy(args, retention):
+    db_name = f"bench_retention_{retention.name}"
+    handler = make_handler(args, db_name)
+    handler.retention = retention
+    collection_name = "weather_data"
+    try:
+        handler.prepare_retention(collection_name)
+    except NotImplementedError as e:
+        return {"strategy": retention.name, "skipped": str(e)}
+
+    for start in range(0, args.documents, 10000):
+        batch = [make_document(i) for i in range(start, min(start + 10000, args.documents))]
+        handler.insert_documents(collection_name, batch, ordered=False, apply_retention=False)
+
+    insert_seconds = 0.0
+    retention_seconds = []
+    deleted = 0
+    tracemalloc.start()
+    next_id = args.documents
+    for _ in range(args.rounds):
+        batch = [make_document(i) for i in range(next_id, next_id + args.batch_size)]
+        next_id += args.batch_size
+        started = time.perf_counter()
+        handler.insert_documents(collection_name, batch, ordered=False, apply_retention=False)
+        insert_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        deleted += handler.retention.apply(handler, handler.get_collection(collection_name))
+        retention_seconds.append(time.perf_counter() - started)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = {
+        "strategy": retention.name,
+        "documents": args.documents,
+        "rounds": args.rounds,
+        "batch_size": args.batch_size,
+        "insert_seconds_total": insert_seconds,
+        "retention_seconds_total": sum(retention_seconds),
+        "retention_seconds_max": max(retention_seconds) if retention_seconds else 0.0,
+        "deleted_client_side": deleted,
+        "final_count": handler.get_collection(collection_name).estimated_document_count(),
+        "peak_python_bytes": peak_bytes,
+    }
+    handler.client.drop_database(db_name)
+    handler.close()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--mock", action="store_true", help="Use mongomock instead of a real server.")
+    parser.add_argument("--documents", type=int, default=400000, help="Retention limit / initial fill.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documents inserted per round.")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--ttl-seconds", type=int, default=30 * 86400)
+    parser.add_argument("--capped-size-bytes", type=int, default=1024 ** 3)
+    parser.add_argument("--strategies", default="legacy,count,ttl,capped")
+    args = parser.parse_args(argv)
+
+    strategies = {
+        "legacy": LegacyRetention(),
+        "count": CountRetention(),
+        "ttl": TtlRetention(args.ttl_seconds),
+        "capped": CappedRetention(args.capped_size_bytes),
+    }
+    for name in args.strategies.split(","):
+        print(json.dumps(run_strategy(args, strategies[name])))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
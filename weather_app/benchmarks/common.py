@@ -0,0 +1,19 @@
+# File: benchmarks/common.py
+"""
+Helpers shared by the benchmark scripts.
+"""
+
+START_TS = 1704067200  # 01/01/2024 00:00 UTC
+
+
+def percentiles(timings):
+    """
+    Latency summary of a run.
+
+    :param timings: Durations of the queries in milliseconds, in any order.
+    :return: Dictionary with p50_ms, p95_ms and max_ms.
+    """
+    timings = sorted(timings)
+    return {"p50_ms": round(timings[len(timings) // 2], 3),
+            "p95_ms": round(timings[max(0, int(len(timings) * 0.95) - 1)], 3),
+            "max_ms": round(timings[-1], 3)}
@@ -0,0 +1,220 @@
+# File: benchmarks/run_benchmarks.py
+"""
+Load benchmark suite: ingest rate, retention cost and every query type at a configurable volume.
+
+SyntheticWeather generates --hours hours for each of --cities cities. The data is loaded into
+MongoDB (a real server, or mongomock with --mock) and, with --postgres-url, into PostgreSQL.
+Then --queries random queries of every type are timed. Every measurement is printed as one
+JSON line; --output also writes the whole run (parameters plus results) as one JSON document
+that can be compared between commits.
+
+    python -m weather_app.benchmarks.run_benchmarks --mongo-url mongodb://localhost:27017 --cities 2000 --hours 720
+    python -m weather_app.benchmarks.run_benchmarks --postgres-url postgresql://localhost/weather --skip-mongo
+    python -m weather_app.benchmarks.run_benchmarks --mock --cities 20 --hours 168 --output bench.json
+
+The Postgres tables of sql_scripts/create_tables.sql must exist (use a dedicated database, the
+synthetic cities are not removed). mongomock has no query planner and no bulk upserts, so with
+--mock the hourly data is inserted directly and the numbers only catch gross regressions.
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.SyntheticWeather import SyntheticWeather
+from weather_app.helpers.HourlyWeatherStore import HourlyWeatherStore, normalize_history
+from weather_app.helpers.RainQuery import RainQuery, RAIN_INTENSITIES
+from weather_app.helpers.WeatherStreaks import WeatherStreaks
+from weather_app.helpers.DailyAggregates import DailyAggregates, DAY
+from weather_app.helpers.WeatherCache import location_key
+from weather_app.benchmarks.common import START_TS, percentiles
+
+
+def rate(name, backend, records, seconds, **extra):
+    result = {"benchmark": name, "backend": backend, "records": records, "seconds": round(seconds, 6),
+              "records_per_second": round(records / seconds, 1) if seconds else None}
+    result.update(extra)
+    return result
+
+
+def latency(name, backend, run_query, arguments):
+    """
+    Time run_query for every argument tuple; results are consumed completely.
+    """
+    timings = []
+    rows = 0
+    for args in arguments:
+        started = time.perf_counter()
+        result = run_query(*args)
+        rows += sum(1 for _ in result) if result is not None else 0
+        timings.append((time.perf_counter() - started) * 1000)
+    result = {"benchmark": name, "backend": backend, "queries": len(timings), "rows_returned": rows}
+    result.update(percentiles(timings))
+    return result
+
+
+def random_arguments(args, generator, rng):
+    """
+    Random (city, day, end day, intensity) tuples inside the generated period.
+    """
+    days = max(1, args.hours // 24)
+    for _ in range(args.queries):
+        city = rng.choice(generator.cities[:args.cities])
+        first = rng.randrange(days)
+        last = min(days - 1, first + 6)
+        yield city, START_TS + first * DAY, START_TS + last * DAY, rng.choice(list(RAIN_INTENSITIES))
+
+
+def to_day(ts, fmt="%m/%d/%Y"):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(fmt)
+
+
+def bench_mongo(args, generator, emit):
+    backend = "mongomock" if args.mock else "mongo"
+    db_name = "bench_weather_app"
+    mongo_handler = MongoHandler(args.mongo_url, db_name)
+    if args.mock:
+        import mongomock
+        mongo_handler.client = mongomock.MongoClient()
+        mongo_handler.db = mongo_handler.client[db_name]
+    mongo_handler.client.drop_database(db_name)
+    store = HourlyWeatherStore(mongo_handler)
+
+    # the tutorial's storage: one document per API response
+    responses = list(generator.histories(START_TS, args.hours, cities=args.cities))
+    records = sum(len(response["list"]) for response, _, _, _ in responses)
+    started = time.perf_counter()
+    for start in range(0, len(responses), 100):
+        mongo_handler.insert_documents("weather_raw", [dict(r) for r, _, _, _ in responses[start:start + 100]],
+                                       ordered=False, apply_retention=False)
+    emit(rate("raw_insert", backend, records, time.perf_counter() - started))
+
+    started = time.perf_counter()
+    if args.mock:
+        # mongomock cannot run the bulk upserts, load the normalized hours directly (and without the
+        # unique index, which mongomock checks with a scan per document)
+        collection = mongo_handler.get_collection(store.collection_name)
+        for response, city, lat, lon in responses:
+            collection.insert_many(normalize_history(response, city, lat, lon), ordered=False)
+        for city in generator.cities[:args.cities]:
+            store.daily_aggregates.refresh_mongo(location_key(city["name"], None, None),
+                                                 range(START_TS, START_TS + args.hours * 3600, DAY))
+        emit(rate("hourly_ingest", backend, records, time.perf_counter() - started, note="insert_many + refresh"))
+    else:
+        for response, city, lat, lon in responses:
+            store.ingest(response, city, lat, lon)
+        emit(rate("hourly_ingest", backend, records, time.perf_counter() - started))
+
+    # retention: trim the raw collection by a tenth
+    raw_count = mongo_handler.get_collection("weather_raw").estimated_document_count()
+    mongo_handler.retention_limit = raw_count - max(1, raw_count // 10)
+    mongo_handler.delete_count = 1
+    started = time.perf_counter()
+    deleted = mongo_handler.data_retention("weather_raw")
+    emit(rate("retention", backend, deleted, time.perf_counter() - started, strategy=mongo_handler.retention.name))
+
+    rain = RainQuery(hourly_store=store)
+    streaks = WeatherStreaks(hourly_store=store)
+    arguments = list(random_arguments(args, generator, random.Random(args.seed)))
+    emit(latency("find_range", backend, lambda c, s, e, i: store.find_range(c["name"], s, e + DAY),
+                 arguments))
+    emit(latency("rainy_hours", backend, lambda c, s, e, i: rain.rainy_hours_mongo(to_day(s), to_day(e), i),
+                 arguments))
+    emit(latency("rainy_places", backend, lambda c, s, e, i: rain.rainy_places_mongo(to_day(s), to_day(e), i),
+                 arguments))
+    emit(latency("largest_spread", backend, lambda c, s, e, i: store.daily_aggregates.largest_spread_mongo(s),
+                 arguments))
+    # mongomock has no $setWindowFields, fall back to the NumPy engine there
+    engine = "numpy" if args.mock else "mongo"
+    emit(latency(f"streaks_{engine}", backend,
+                 lambda c, s, e, i: streaks.find_streaks(c["name"], to_day(s), to_day(e), "light rain", engine=engine),
+                 arguments))
+    mongo_handler.client.drop_database(db_name)
+    mongo_handler.close()
+
+
+def bench_postgres(args, generator, emit):
+    from weather_app.handlers.PostgresDbHandler import PostgresDbHandler
+    postgres_handler = PostgresDbHandler(args.postgres_url)
+    rain = RainQuery(postgres_handler=postgres_handler)
+    rain.ensure_indexes()
+
+    records = 0
+    batch = []
+    started = time.perf_counter()
+    for history in generator.histories(START_TS, args.hours, cities=args.cities):
+        batch.append(history)
+        records += len(history[0]["list"])
+        if len(batch) == 100:
+            postgres_handler.load_histories(batch)
+            batch = []
+    if batch:
+        postgres_handler.load_histories(batch)
+    emit(rate("copy_load", "postgres", records, time.perf_counter() - started))
+    postgres_handler.execute_query("ANALYZE")
+
+    daily = DailyAggregates(postgres_handler=postgres_handler)
+    streaks = WeatherStreaks(postgres_handler=postgres_handler)
+    arguments = list(random_arguments(args, generator, random.Random(args.seed)))
+    emit(latency("rainy_hours", "postgres", lambda c, s, e, i: rain.rainy_hours_postgres(to_day(s), to_day(e), i),
+                 arguments))
+    emit(latency("rainy_places", "postgres", lambda c, s, e, i: rain.rainy_places_postgres(to_day(s), to_day(e), i),
+                 arguments))
+    emit(latency("largest_spread", "postgres",
+                 lambda c, s, e, i: daily.largest_spread_postgres(to_day(s, "%Y-%m-%d")), arguments))
+    emit(latency("streaks_postgres", "postgres",
+                 lambda c, s, e, i: streaks.streaks_postgres(c["name"], to_day(s), to_day(e), "light rain"),
+                 arguments))
+    postgres_handler.close()
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--postgres-url", help="Also benchmark PostgreSQL.")
+    parser.add_argument("--mock", action="store_true", help="Use mongomock instead of a real MongoDB server.")
+    parser.add_argument("--skip-mongo", action="store_true")
+    parser.add_argument("--cities", type=int, default=1000)
+    parser.add_argument("--hours", type=int, default=24 * 30, help="Hours generated per city.")
+    parser.add_argument("--queries", type=int, default=50, help="Random queries per query type.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the whole run as one JSON document to this file.")
+    args = parser.parse_args(argv)
+
+    results = []
+
+    def emit(result):
+        results.append(result)
+        print(json.dumps(result))
+        sys.stdout.flush()
+
+    generator = SyntheticWeather(cities=args.cities, seed=args.seed)
+    if not args.skip_mongo:
+        bench_mongo(args, generator, emit)
+    if args.postgres_url:
+        bench_postgres(args, generator, emit)
+
+    if args.output:
+        run = {"started_at": datetime.now(timezone.utc).isoformat(), "git_revision": git_revision(),
+               "python": platform.python_version(),
+               "parameters": {"cities": args.cities, "hours": args.hours, "queries": args.queries, "seed": args.seed,
+                              "mock": args.mock, "postgres": bool(args.postgres_url)},
+               "results": results}
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
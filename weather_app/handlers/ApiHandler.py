@@ -1,23 +1,162 @@
 # File: handlers/ApiHandler.py
 
+import time
 import requests
 import logging
 import json
+import threading
+from weather_app.handlers.HttpTransport import HttpTransport, normalize_url, endpoint_name
+from weather_app.helpers.Metrics import Metrics
 
 class ApiHandler:
-    def __init__(self, api_root, api_key):
+    # (handler class, api root, api key) -> monotonic time of the last successful health check
+    _health_checks = {}
+    _health_checks_lock = threading.Lock()
+
+    def __init__(self, api_root, api_key, transport=None, rate_limiter=None, health_check_ttl=300, single_flight=None,
+                 response_cache=None, metrics=None):
         """
         Initialize the API handler with a root URL and API key.
+
+        :param api_root: The root URL of the API.
+        :param api_key: The API key string.
+        :param transport: (optional) HttpTransport used for the calls, defaults to the shared one.
+        :param rate_limiter: (optional) RateLimiter consulted before every call, including retries.
+        :param health_check_ttl: Seconds a successful health_check stays valid.
+        :param single_flight: (optional) SingleFlight; concurrent identical requests then share one call.
+        :param response_cache: (optional) ResponseCache serving repeated requests without calling the API.
+        :param metrics: (optional) Metrics recording the calls, defaults to Metrics.shared().
+
+        Construction never touches the network; call health_check to verify connectivity.
         """
         self.api_root = api_root.rstrip('/') + '/'
         self.api_key = api_key
         self.last_json = None
+        self.transport = transport if transport is not None else HttpTransport.shared()
+        self.rate_limiter = rate_limiter
+        self.health_check_ttl = health_check_ttl
+        self.single_flight = single_flight
+        self.response_cache = response_cache
+        self.metrics = metrics if metrics is not None else Metrics.shared()
 
         if not self.api_key:
             raise ValueError("API key is not set. Check your .env file!")
         if not self.api_root:
             raise ValueError("API root URL is not set. Check your .env file!")
 
+    def _health_check_url(self):
+        """
+        URL of a cheap call proving connectivity and key validity. Implemented by subclasses.
+        """
+        raise NotImplementedError
+
+    def health_check(self, force=False, background=False):
+        """
+        Verify connectivity and API key validity with a single cheap call.
+
+        A successful check is cached per (handler class, API root, key) for health_check_ttl
+        seconds, so creating many handlers or restarting workers within the TTL costs no quota.
+
+        :param force: Ignore the cached result and always call the API.
+        :param background: Run the check in a daemon thread and return the thread immediately;
+                           failures are logged instead of raised.
+        :return: True if the API is reachable (or the started thread when background is True).
+        :raises ApiHandlerError: If the check fails (only when background is False).
+        """
+        if background:
+            thread = threading.Thread(target=self._background_health_check, args=(force,), daemon=True)
+            thread.start()
+            return thread
+
+        key = (type(self).__name__, self.api_root, self.api_key)
+        with ApiHandler._health_checks_lock:
+            checked_at = ApiHandler._health_checks.get(key)
+        if not force and checked_at is not None and time.monotonic() - checked_at < self.health_check_ttl:
+            return True
+
+        response = self._get(self._health_check_url())
+        self.last_json = response.json()
+        with ApiHandler._health_checks_lock:
+            ApiHandler._health_checks[key] = time.monotonic()
+        logging.info(f"{type(self).__name__} health check successful.")
+        return True
+
+    def _background_health_check(self, force):
+        try:
+            self.health_check(force=force)
+        except Exception:
+            logging.error(f"{type(self).__name__} health check failed", exc_info=True)
+
+    def _cache_ttl(self, url):
+        """
+        Seconds the response of url may be served from the response cache, None for ever and 0
+        for not at all. Overridden by subclasses that know their data; nothing is cached by default.
+        """
+        return 0
+
+    def _get_body(self, url):
+        """
+        GET a URL and return the response body, served from the response cache when possible.
+        """
+        if self.response_cache is None:
+            return self._get(url).content
+        key = normalize_url(url)
+        body = self.response_cache.get(key)
+        if body is None:
+            body = self._get(url).content
+            self.response_cache.put(key, body, self._cache_ttl(url))
+        return body
+
+    def _get_json(self, url):
+        """
+        GET a URL and decode its JSON body, see _get_body.
+        """
+        return json.loads(self._get_body(url))
+
+    def _get(self, url, **kwargs):
+        """
+        Send a GET request through the transport and raise an ApiHandlerError if it failed.
+
+        :param url: The full URL to request.
+        :param kwargs: Extra keyword arguments for the transport, e.g. stream=True.
+        :return: The successful requests.Response.
+        """
+        # a streamed body can be read only once, so only plain requests are shared
+        if self.single_flight is not None and not kwargs:
+            return self.single_flight.do((self.api_key, normalize_url(url)), lambda: self._send(url))
+        return self._send(url, **kwargs)
+
+    def _send(self, url, **kwargs):
+        """
+        Send one request through the transport, see _get.
+        """
+        started = time.perf_counter()
+        status = size = None
+        try:
+            before_attempt = self.rate_limiter.acquire if self.rate_limiter is not None else None
+            response = self.transport.get(url, before_attempt=before_attempt, **kwargs)
+            status = response.status_code
+            # a streamed body is not read yet, its bytes are not counted
+            size = None if kwargs.get("stream") else self._received_bytes(response)
+        except requests.RequestException as e:
+            raise UnexpectedError(f"Request failed after retries: {type(e).__name__}") from e
+        finally:
+            self.metrics.observe_request(type(self).__name__, endpoint_name(url), time.perf_counter() - started,
+                                         status, size)
+        if response.status_code != 200:
+            self._handle_error(response)
+        return response
+
+    @staticmethod
+    def _received_bytes(response):
+        """
+        Bytes received on the wire for a read response (compressed size), None if unknown.
+        """
+        try:
+            return int(response.raw.tell())
+        except (AttributeError, TypeError, ValueError):
+            return None
+
     def _handle_error(self, response):
         """
         Raise an appropriate exception based on the API response status code.
@@ -27,6 +166,14 @@ class ApiHandler:
             error_info = response.json()
         except Exception:
             error_info = {}
+        self._raise_for_status(code, error_info)
+
+    @staticmethod
+    def _raise_for_status(code, error_info):
+        """
+        Map a non-200 status code and its decoded error body onto an ApiHandlerError.
+        Shared with the asyncio handlers, which have no requests.Response to pass around.
+        """
         if code == 400:
             raise BadRequestError(f"400 - Bad Request: {error_info.get('message', 'Missing or incorrect parameters')}")
         elif code == 401:
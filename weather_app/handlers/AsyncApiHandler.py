@@ -0,0 +1,165 @@
+# File: handlers/AsyncApiHandler.py
+
+import time
+import asyncio
+import logging
+import json
+import aiohttp
+from weather_app.handlers.ApiHandler import ApiHandler, UnexpectedError
+from weather_app.handlers.HttpTransport import HttpTransport, jittered_backoff, normalize_url, endpoint_name
+from weather_app.helpers.Metrics import Metrics
+
+
+class AsyncApiHandler:
+    """
+    Asyncio counterpart of ApiHandler built on aiohttp.
+
+    All requests of a handler share one aiohttp.ClientSession (created lazily inside the running
+    event loop) and are bounded by a semaphore, so fetch_many can fire off hundreds of calls while
+    at most max_concurrency of them are in flight. Retries and error mapping behave exactly like
+    the synchronous HttpTransport / ApiHandler pair.
+    """
+    def __init__(self, api_root, api_key, max_concurrency=10, timeout=30, max_retries=3,
+                 backoff_factor=0.5, backoff_max=30.0, rate_limiter=None, single_flight=None, metrics=None):
+        """
+        Initialize the async API handler with a root URL and API key.
+
+        :param api_root: The root URL of the API.
+        :param api_key: The API key string.
+        :param max_concurrency: Maximum number of requests in flight at the same time.
+        :param timeout: Total request timeout in seconds.
+        :param max_retries: How many times a failed request is retried (0 disables retries).
+        :param backoff_factor: Base of the exponential backoff in seconds.
+        :param backoff_max: Upper bound of a single backoff sleep in seconds.
+        :param rate_limiter: (optional) RateLimiter awaited before every call, including retries.
+        :param single_flight: (optional) SingleFlight; concurrent identical requests then share one call.
+        :param metrics: (optional) Metrics recording the calls, defaults to Metrics.shared().
+        """
+        self.api_root = api_root.rstrip('/') + '/'
+        self.api_key = api_key
+        self.last_json = None
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
+        self.metrics = metrics if metrics is not None else Metrics.shared()
+        self._session = None
+        self._semaphore = None
+        self._semaphore_loop = None
+
+        if not self.api_key:
+            raise ValueError("API key is not set. Check your .env file!")
+        if not self.api_root:
+            raise ValueError("API root URL is not set. Check your .env file!")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        """
+        Return the shared aiohttp session, creating it inside the running loop on first use.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    def _get_semaphore(self):
+        """
+        Return the semaphore bounding the requests in flight, one per event loop: a semaphore that
+        has been waited on is bound to its loop, and a handler may outlive it (e.g. several asyncio.run calls).
+        """
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _get_json(self, url):
+        """
+        Send a GET request and return the decoded JSON body, raising an ApiHandlerError on failure.
+
+        :param url: The full URL to request.
+        :return: The decoded JSON response.
+        """
+        if self.single_flight is not None:
+            # the raw body is shared and decoded per caller, so nobody sees another caller's changes
+            body = await self.single_flight.do_async((self.api_key, normalize_url(url)), lambda: self._get_body(url))
+        else:
+            body = await self._get_body(url)
+        return json.loads(body)
+
+    async def _get_body(self, url):
+        """
+        Send a GET request and return the raw body of the successful response, see _get_json.
+        """
+        session = self._get_session()
+        attempt = 0
+        started = time.perf_counter()
+        status = body = None
+        try:
+            while True:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire_async()
+                async with self._get_semaphore():
+                    try:
+                        async with session.get(url) as response:
+                            status = response.status
+                            body = await response.read()
+                            retry_after = response.headers.get("Retry-After")
+                    except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                        status, body, retry_after = None, None, None
+                        if attempt >= self.max_retries:
+                            raise UnexpectedError(f"Request failed after retries: {type(e).__name__}") from e
+
+                if status == 200:
+                    return body
+                if status is not None and (status not in HttpTransport.RETRY_STATUSES or attempt >= self.max_retries):
+                    try:
+                        error_info = json.loads(body)
+                    except ValueError:
+                        error_info = {}
+                    ApiHandler._raise_for_status(status, error_info)
+
+                delay = jittered_backoff(attempt, self.backoff_factor, self.backoff_max, retry_after)
+                logging.warning(f"Request failed ({status or 'connection error'}), retrying in {delay:.2f}s "
+                                f"(attempt {attempt + 1}/{self.max_retries}).")
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            self.metrics.observe_request(type(self).__name__, endpoint_name(url), time.perf_counter() - started,
+                                         status, len(body) if body is not None else None)
+
+    async def fetch_many(self, method, arguments, return_exceptions=True):
+        """
+        Run one handler method for many argument tuples concurrently.
+
+        Concurrency is bounded by the handler's semaphore, so throughput scales with
+        max_concurrency instead of being bound by the latency of a single round-trip.
+
+        :param method: A coroutine method of this handler, e.g. handler.get_weather_by_interval.
+        :param arguments: Iterable of positional argument tuples, one per call.
+        :param return_exceptions: If True, failed calls return their exception instead of aborting the batch.
+        :return: List of results in the order of arguments.
+        """
+        return await asyncio.gather(*(method(*args) for args in arguments), return_exceptions=return_exceptions)
+
+    def get_last_json(self):
+        """
+        Return the last JSON response received from the API, formatted nicely.
+        """
+        return json.dumps(self.last_json, indent=4, sort_keys=True)
+
+    async def close(self):
+        """
+        Close the aiohttp session and its pooled connections.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
@@ -0,0 +1,44 @@
+# File: handlers/AsyncGeolocationApiHandler.py
+
+import logging
+from urllib.parse import quote
+from weather_app.handlers.AsyncApiHandler import AsyncApiHandler
+from weather_app.handlers.HttpTransport import log_request
+from weather_app.helpers.Metrics import timed
+
+
+class AsyncGeolocationApiHandler(AsyncApiHandler):
+    """
+    Asyncio variant of GeolocationApiHandler with the same method surface.
+    """
+    def __init__(self, api_root, api_key, **kwargs):
+        """
+        Initialize the AsyncGeolocationApiHandler.
+
+        :param api_root: The root URL for the geocoding API
+                         (e.g., "http://api.openweathermap.org/geo/1.0/")
+        :param api_key: The API key for the geocoding API.
+        :param kwargs: Connection options passed on to AsyncApiHandler.
+        """
+        super().__init__(api_root, api_key, **kwargs)
+        logging.info("Initializing AsyncGeolocationApiHandler")
+
+    @timed
+    async def reverse_geocode(self, lat, lon, limit=1):
+        """
+        See GeolocationApiHandler.reverse_geocode.
+        """
+        url = f"{self.api_root}reverse?lat={lat}&lon={lon}&limit={limit}&appid={self.api_key}"
+        log_request("Calling reverse geocoding API", url)
+        self.last_json = await self._get_json(url)
+        return self.last_json
+
+    @timed
+    async def direct_geocode(self, query, limit=1):
+        """
+        See GeolocationApiHandler.direct_geocode.
+        """
+        url = f"{self.api_root}direct?q={quote(query)}&limit={limit}&appid={self.api_key}"
+        log_request("Calling direct geocoding API", url)
+        self.last_json = await self._get_json(url)
+        return self.last_json
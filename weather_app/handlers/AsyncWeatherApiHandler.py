@@ -0,0 +1,82 @@
+# File: handlers/AsyncWeatherApiHandler.py
+
+import logging
+from weather_app.handlers.AsyncApiHandler import AsyncApiHandler
+from weather_app.handlers.WeatherApiHandler import WeatherApiHandler
+from weather_app.handlers.HttpTransport import log_request
+from weather_app.helpers.RangePlanner import RangePlanner
+from weather_app.helpers.Metrics import timed
+
+
+class AsyncWeatherApiHandler(AsyncApiHandler):
+    """
+    Asyncio variant of WeatherApiHandler with the same method surface.
+
+    Every method is a coroutine; intervals longer than one history call are split by the
+    RangePlanner and the resulting calls run concurrently. Use fetch_many to query many
+    cities at once, e.g.:
+
+        async with AsyncWeatherApiHandler(api_root, api_key, max_concurrency=20) as handler:
+            results = await handler.fetch_many(handler.get_weather_by_interval,
+                                               [("", c["lat"], c["lon"], start, end) for c in cities])
+    """
+    def __init__(self, api_root, api_key, range_planner=None, **kwargs):
+        """
+        Initialize the AsyncWeatherApiHandler.
+
+        :param api_root: The root URL of the API (e.g., "https://history.openweathermap.org/data/2.5/history/")
+        :param api_key: The API key string.
+        :param range_planner: (optional) RangePlanner splitting long intervals into API sized calls.
+        :param kwargs: Connection options passed on to AsyncApiHandler.
+        """
+        super().__init__(api_root, api_key, **kwargs)
+        self.range_planner = range_planner if range_planner is not None else RangePlanner()
+        logging.info("Initializing AsyncWeatherApiHandler")
+
+    @timed
+    async def get_weather_n_days_into_future_by_date(self, city, latitude, longitude, start, count, occurrence_type="day"):
+        """
+        See WeatherApiHandler.get_weather_n_days_into_future_by_date.
+        """
+        start_ts, end_ts = WeatherApiHandler._future_range(start, count, occurrence_type)
+        return await self._fetch_range(city, latitude, longitude, start_ts, end_ts, occurrence_type)
+
+    @timed
+    async def get_weather_n_days_into_past_by_date(self, city, latitude, longitude, end, count, occurrence_type="day"):
+        """
+        See WeatherApiHandler.get_weather_n_days_into_past_by_date.
+        """
+        start_ts, end_ts = WeatherApiHandler._past_range(end, count, occurrence_type)
+        return await self._fetch_range(city, latitude, longitude, start_ts, end_ts, occurrence_type)
+
+    @timed
+    async def get_weather_by_interval(self, city, latitude, longitude, start, end, occurrence_type="day"):
+        """
+        See WeatherApiHandler.get_weather_by_interval.
+        """
+        start_ts, end_ts = WeatherApiHandler._interval_range(start, end)
+        return await self._fetch_range(city, latitude, longitude, start_ts, end_ts, occurrence_type)
+
+    @timed
+    async def get_weather_by_timestamps(self, city, latitude, longitude, start_ts, end_ts, occurrence_type="hour"):
+        """
+        See WeatherApiHandler.get_weather_by_timestamps.
+        """
+        url = WeatherApiHandler._timestamps_url(self.api_root, self.api_key, city, latitude, longitude,
+                                                start_ts, end_ts, occurrence_type)
+        log_request("Calling API by timestamps", url)
+        self.last_json = await self._get_json(url)
+        return self.last_json
+
+    async def _fetch_range(self, city, latitude, longitude, start_ts, end_ts, occurrence_type, known_hours=()):
+        """
+        Fetch [start_ts, end_ts) through the range planner, requesting the planned windows
+        concurrently, and stitch the responses back together.
+        """
+        responses = await self.range_planner.afetch(
+            lambda call_start, call_end: self.get_weather_by_timestamps(
+                city, latitude, longitude, call_start, call_end, occurrence_type),
+            start_ts, end_ts, known_hours)
+        result = responses[0] if len(responses) == 1 else RangePlanner.stitch(responses, start_ts, end_ts)
+        self.last_json = result
+        return result
@@ -1,33 +1,50 @@
 # File: handlers/GeolocationApiHandler.py
 
-import requests
 import logging
 import json
+from urllib.parse import quote
 from weather_app.handlers.ApiHandler import ApiHandler, ApiHandlerError
+from weather_app.handlers.HttpTransport import log_request
+from weather_app.helpers.Metrics import timed
 
 class GeolocationApiHandler(ApiHandler):
-    def __init__(self, api_root, api_key):
+    def __init__(self, api_root, api_key, transport=None, rate_limiter=None, health_check_ttl=300,
+                 single_flight=None, response_cache=None, metrics=None):
         """
         Initialize the GeolocationApiHandler.
 
         :param api_root: The root URL for the geocoding API
                          (e.g., "http://api.openweathermap.org/geo/1.0/")
         :param api_key: The API key for the geocoding API.
+        :param transport: (optional) HttpTransport used for the calls, defaults to the shared one.
+        :param rate_limiter: (optional) RateLimiter consulted before every call.
+        :param health_check_ttl: Seconds a successful health_check stays valid.
+        :param single_flight: (optional) SingleFlight sharing concurrent identical calls.
+        :param response_cache: (optional) ResponseCache serving repeated calls without the API.
+        :param metrics: (optional) Metrics recording the calls, defaults to Metrics.shared().
+
+        No API call is made here, use health_check to verify connectivity.
         """
-        super().__init__(api_root, api_key)
+        super().__init__(api_root, api_key, transport=transport, rate_limiter=rate_limiter,
+                         health_check_ttl=health_check_ttl, single_flight=single_flight,
+                         response_cache=response_cache, metrics=metrics)
         logging.info("Initializing GeolocationApiHandler")
 
-        # Optional: do a dummy call to verify connectivity.
+    def _health_check_url(self):
+        """
+        Cheap reverse geocoding call for Beijing, used by health_check.
+        """
         beijing_lat = 39.9042
         beijing_lon = 116.4074
+        return f"{self.api_root}reverse?lat={beijing_lat}&lon={beijing_lon}&limit=1&appid={self.api_key}"
 
-        dummy_url = f"{self.api_root}reverse?lat={beijing_lat}&lon={beijing_lon}&limit=1&appid={self.api_key}"
-        response = requests.get(dummy_url)
-        if response.status_code != 200:
-            self._handle_error(response)
-        logging.info("Dummy call successful.")
-        self.last_json = response.json()
+    def _cache_ttl(self, url):
+        """
+        Places hardly ever move or get renamed, geocoding answers are cached for static_ttl.
+        """
+        return self.response_cache.static_ttl
 
+    @timed
     def reverse_geocode(self, lat, lon, limit=1):
         """
         Retrieve geolocation information via reverse geocoding.
@@ -38,9 +55,20 @@ class GeolocationApiHandler(ApiHandler):
         :return: The JSON response from the API.
         """
         url = f"{self.api_root}reverse?lat={lat}&lon={lon}&limit={limit}&appid={self.api_key}"
-        logging.info(f"Calling reverse geocoding API: {url}")
-        response = requests.get(url)
-        if response.status_code != 200:
-            self._handle_error(response)
-        self.last_json = response.json()
+        log_request("Calling reverse geocoding API", url)
+        self.last_json = self._get_json(url)
+        return self.last_json
+
+    @timed
+    def direct_geocode(self, query, limit=1):
+        """
+        Retrieve the coordinates of a place by its name (forward geocoding).
+
+        :param query: "{city name},{state code},{country code}", state and country are optional.
+        :param limit: Maximum number of results to return (default is 1).
+        :return: The JSON response from the API, a list of matching places.
+        """
+        url = f"{self.api_root}direct?q={quote(query)}&limit={limit}&appid={self.api_key}"
+        log_request("Calling direct geocoding API", url)
+        self.last_json = self._get_json(url)
         return self.last_json
@@ -0,0 +1,189 @@
+# File: handlers/HttpTransport.py
+
+import time
+import random
+import logging
+import threading
+import requests
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from requests.adapters import HTTPAdapter
+
+# query parameters that never identify a request (recording keys, request coalescing)
+SECRET_PARAMETERS = ("appid",)
+
+
+def jittered_backoff(attempt, backoff_factor, backoff_max, retry_after=None):
+    """
+    Full jitter exponential backoff, honouring a numeric Retry-After header when present.
+
+    :param attempt: Zero based number of the attempt that just failed.
+    :param backoff_factor: Base of the exponential backoff in seconds.
+    :param backoff_max: Upper bound of the returned delay in seconds.
+    :param retry_after: (optional) Value of the Retry-After response header.
+    :return: Seconds to sleep before the next attempt.
+    """
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), backoff_max)
+        except ValueError:
+            pass
+    return random.uniform(0, min(backoff_max, backoff_factor * (2 ** attempt)))
+
+
+def normalize_url(url):
+    """
+    Identity of a request: lower case scheme and host, query parameters sorted and the API key removed,
+    so the same request made with another key or parameter order maps onto the same key
+    (used for recordings and request coalescing).
+    """
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name.lower() not in SECRET_PARAMETERS)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+
+def redact_url(url):
+    """
+    The URL with the values of the secret parameters (the API key) replaced, safe to log.
+    """
+    parts = urlsplit(url)
+    query = [(name, "***" if name.lower() in SECRET_PARAMETERS else value)
+             for name, value in parse_qsl(parts.query, keep_blank_values=True)]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query, safe="*,"), parts.fragment))
+
+
+def endpoint_name(url):
+    """
+    Last path segment of a URL ("city", "reverse", ...), the endpoint label of the request metrics.
+    """
+    return urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def log_request(message, url):
+    """
+    Debug log a request with the API key redacted; costs a single level check when debug logging is off.
+    """
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug(f"{message}: {redact_url(url)}")
+
+
+class RedactingFilter(logging.Filter):
+    """
+    Log filter redacting the API key from the request lines urllib3 logs at DEBUG level
+    ('"GET /data/2.5/weather?appid=... HTTP/1.1" 200 512').
+    """
+    def filter(self, record):
+        if isinstance(record.args, tuple):
+            record.args = tuple(redact_url(arg) if isinstance(arg, str) and self._has_secret(arg) else arg
+                                for arg in record.args)
+        return True
+
+    @staticmethod
+    def _has_secret(text):
+        text = text.lower()
+        return any(f"{name}=" in text for name in SECRET_PARAMETERS)
+
+
+# urllib3 logs every request URL, API key included, when debug logging is on
+for _logger_name in ("urllib3.connectionpool", "urllib3.util.retry"):
+    logging.getLogger(_logger_name).addFilter(RedactingFilter())
+
+
+class HttpTransport:
+    """
+    Pooled HTTP transport shared by the ApiHandler subclasses.
+
+    Wraps a single requests.Session, so connections to a host are kept alive and reused
+    instead of paying a new TCP + TLS handshake for every call. Responses with a retryable
+    status code (429 and 5xx by default) and connection errors are retried with jittered
+    exponential backoff; once the retries are used up the last response is returned and
+    turned into the matching ApiHandlerError by ApiHandler._handle_error.
+    """
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, timeout=(3.05, 30), max_retries=3,
+                 backoff_factor=0.5, backoff_max=30.0, retry_statuses=RETRY_STATUSES):
+        """
+        Initialize the transport.
+
+        :param pool_connections: Number of per-host connection pools to keep.
+        :param pool_maxsize: Maximum number of kept-alive connections per host.
+        :param timeout: Request timeout in seconds, a number or a (connect, read) tuple.
+        :param max_retries: How many times a failed request is retried (0 disables retries).
+        :param backoff_factor: Base of the exponential backoff in seconds.
+        :param backoff_max: Upper bound of a single backoff sleep in seconds.
+        :param retry_statuses: HTTP status codes that are retried.
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.retry_statuses = tuple(retry_statuses)
+
+        self.session = requests.Session()
+        # retries are done here, so urllib3 must not retry on its own
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+
+    @classmethod
+    def shared(cls):
+        """
+        Return the process wide default transport, creating it on first use.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def set_shared(cls, transport):
+        """
+        Replace the process wide default transport, e.g. with a differently configured one.
+        """
+        with cls._shared_lock:
+            cls._shared = transport
+
+    def get(self, url, before_attempt=None, **kwargs):
+        """
+        Send a GET request, retrying retryable failures.
+
+        :param url: The full URL to request.
+        :param before_attempt: (optional) Callable invoked before every attempt, e.g. RateLimiter.acquire.
+        :param kwargs: Extra keyword arguments passed on to requests.Session.get.
+        :return: The last requests.Response received.
+        :raises requests.RequestException: If the request still fails after all retries.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            if before_attempt is not None:
+                before_attempt()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise e
+                delay = jittered_backoff(attempt, self.backoff_factor, self.backoff_max)
+                logging.warning(f"Request failed ({type(e).__name__}), retrying in {delay:.2f}s "
+                                f"(attempt {attempt + 1}/{self.max_retries}).")
+            else:
+                if response.status_code not in self.retry_statuses or attempt >= self.max_retries:
+                    return response
+                delay = jittered_backoff(attempt, self.backoff_factor, self.backoff_max,
+                                         response.headers.get("Retry-After"))
+                logging.warning(f"Got HTTP {response.status_code}, retrying in {delay:.2f}s "
+                                f"(attempt {attempt + 1}/{self.max_retries}).")
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        """
+        Close all pooled connections.
+        """
+        self.session.close()
@@ -0,0 +1,156 @@
+# File: handlers/MongoClientRegistry.py
+
+import os
+import atexit
+import logging
+import threading
+import importlib.util
+from pymongo import MongoClient
+
+# modules needed by the wire compressors, zstd and snappy are optional installs (zstandard, python-snappy)
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+
+def available_compressors(compressors):
+    """
+    The wire compressors whose module is installed, in the given order of preference.
+
+    :param compressors: Comma separated names or list, e.g. "zstd,snappy,zlib".
+    :return: Comma separated names, "" if none is available.
+    """
+    if isinstance(compressors, str):
+        compressors = [name.strip() for name in compressors.split(",")]
+    available = []
+    for name in filter(None, compressors):
+        module = COMPRESSOR_MODULES.get(name)
+        if module is None:
+            raise ValueError(f"Unknown MongoDB compressor: {name}")
+        if importlib.util.find_spec(module) is None:
+            logging.warning(f"MongoDB compressor {name} skipped, the {module} module is not installed.")
+            continue
+        available.append(name)
+    return ",".join(available)
+
+
+class MongoClientRegistry:
+    """
+    Process wide registry of MongoClients, one per connection string and client options.
+
+    A MongoClient owns a connection pool and monitoring threads, so creating one per handler makes
+    every handler pay connection setup and server selection again. The handlers of a process share
+    their client instead:
+
+        client = MongoClientRegistry.acquire(mongo_url, maxPoolSize=50, compressors="zstd,zlib")
+        ...
+        MongoClientRegistry.release(client)
+
+    Released clients stay open for the next handler; close_idle closes the ones no handler uses
+    and close_all (also run at exit) closes every client.
+
+    Clients do not survive a fork: the child process starts with an empty registry, so its handlers
+    open their own connections (see MongoHandler.get_collection) instead of sharing the parent's sockets.
+    """
+    _clients = {}
+    # reentrant: creating a client may run the garbage collector, whose MongoHandler.__del__ calls release
+    _lock = threading.RLock()
+    _pid = os.getpid()
+
+    @staticmethod
+    def _key(connection_string, options):
+        return connection_string, tuple(sorted(options.items()))
+
+    @classmethod
+    def acquire(cls, connection_string, **options):
+        """
+        Return the shared client of a connection string and options, creating it on first use.
+
+        :param connection_string: MongoDB connection string.
+        :param options: MongoClient keyword options, e.g. maxPoolSize, serverSelectionTimeoutMS,
+                        readPreference or compressors (unavailable compressors are left out).
+        :return: A MongoClient; pass it to release when done.
+        """
+        options = {name: value for name, value in options.items() if value is not None}
+        if "compressors" in options:
+            options["compressors"] = available_compressors(options["compressors"])
+            if not options["compressors"]:
+                del options["compressors"]
+        cls._check_fork()
+        key = cls._key(connection_string, options)
+        with cls._lock:
+            entry = cls._clients.get(key)
+            if entry is None:
+                entry = cls._clients[key] = {"client": MongoClient(connection_string, **options), "references": 0}
+                logging.info(f"Created MongoClient with options {options}")
+            entry["references"] += 1
+            return entry["client"]
+
+    @classmethod
+    def release(cls, client):
+        """
+        Give back a client returned by acquire; it stays open for reuse.
+
+        :return: Number of remaining references, None if the client is not in the registry.
+        """
+        with cls._lock:
+            for entry in cls._clients.values():
+                if entry["client"] is client:
+                    entry["references"] = max(entry["references"] - 1, 0)
+                    return entry["references"]
+        return None
+
+    @classmethod
+    def close_idle(cls):
+        """
+        Close and forget the clients no handler holds.
+
+        :return: Number of closed clients.
+        """
+        with cls._lock:
+            idle = [key for key, entry in cls._clients.items() if entry["references"] == 0]
+            clients = [cls._clients.pop(key)["client"] for key in idle]
+        for client in clients:
+            client.close()
+        return len(clients)
+
+    @classmethod
+    def close_all(cls):
+        """
+        Close and forget every client, including the ones still held by handlers.
+
+        :return: Number of closed clients.
+        """
+        with cls._lock:
+            clients = [entry["client"] for entry in cls._clients.values()]
+            cls._clients.clear()
+        for client in clients:
+            client.close()
+        if clients:
+            logging.info(f"Closed {len(clients)} MongoClient(s).")
+        return len(clients)
+
+    @classmethod
+    def get_stats(cls):
+        """
+        Number of clients, of idle clients and of references held by handlers.
+        """
+        with cls._lock:
+            references = [entry["references"] for entry in cls._clients.values()]
+        return {"clients": len(references), "idle": references.count(0), "references": sum(references)}
+
+    @classmethod
+    def _check_fork(cls):
+        if cls._pid != os.getpid():
+            cls._after_fork()
+
+    @classmethod
+    def _after_fork(cls):
+        # the inherited clients share sockets and monitor state with the parent: forget them
+        # without closing, closing would end the parent's server sessions
+        cls._clients = {}
+        cls._lock = threading.RLock()
+        cls._pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=MongoClientRegistry._after_fork)
+atexit.register(MongoClientRegistry.close_all)
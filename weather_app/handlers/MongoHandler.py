@@ -1,10 +1,18 @@
 # File: handlers/MongoHandler.py
 
+import os
+import time
 import logging
 from pymongo import MongoClient, errors
+from weather_app.handlers.MongoClientRegistry import MongoClientRegistry
+from weather_app.handlers.MongoRetention import CountRetention
+from weather_app.handlers.MongoPipeline import MongoPipeline
+from weather_app.helpers.Metrics import Metrics
 
 class MongoHandler:
-    def __init__(self, connection_string, db_name, retention_limit=400000, delete_count=1000):
+    def __init__(self, connection_string, db_name, retention_limit=400000, delete_count=1000, retention_interval=0,
+                 retention=None, metrics=None, client_options=None, shared_client=True,
+                 retained_collections=("weather_data",)):
         """
         Initialize the MongoHandler with connection parameters.
 
@@ -12,20 +20,62 @@ class MongoHandler:
         :param db_name: Name of the database.
         :param retention_limit: Hard limit on document count (default 400,000).
         :param delete_count: Number of oldest documents to delete when limit is exceeded.
+        :param retention_interval: Minimum number of seconds between two retention runs on the same
+                                   collection triggered by inserts (default 0, i.e. after every insert).
+        :param retention: (optional) Retention strategy from MongoRetention, defaults to CountRetention.
+        :param metrics: (optional) Metrics recording operation and retention timings, defaults to Metrics.shared().
+        :param client_options: (optional) MongoClient options, e.g. maxPoolSize, serverSelectionTimeoutMS,
+                               readPreference or compressors.
+        :param shared_client: Use the process wide client of the connection string and options from
+                              MongoClientRegistry (default), or a private client closed by close.
+        :param retained_collections: Names of the collections the retention strategy applies to; inserts
+                                     into any other collection neither prepare nor trigger retention.
+
+        Per operation log messages are logged at DEBUG level. The handler is a context manager
+        releasing its client on exit:
+
+            with MongoHandler(mongo_url, "weather") as mongo_handler:
+                mongo_handler.insert_document("weather_data", document)
         """
+        self.client = None
+        self.shared_client = shared_client
         try:
-            self.client = MongoClient(connection_string)
-            self.db = self.client[db_name]
+            self.connection_string = connection_string
+            self.db_name = db_name
+            self.client_options = dict(client_options or {})
+            self._connect()
             self.retention_limit = retention_limit
             self.delete_count = delete_count
+            self.retention_interval = retention_interval
+            self.retention = retention if retention is not None else CountRetention()
+            self.retained_collections = frozenset(retained_collections)
+            self._last_retention = {}
+            self._retention_prepared = set()
+            self.metrics = metrics if metrics is not None else Metrics.shared()
             logging.info(f"Connected to MongoDB database: {db_name}")
         except errors.ConnectionError as ce:
             logging.error("Failed to connect to MongoDB", exc_info=True)
             raise ce
 
+    def _connect(self):
+        if self.shared_client:
+            self._acquired = MongoClientRegistry.acquire(self.connection_string, **self.client_options)
+            self.client = self._acquired
+        else:
+            self._acquired = None
+            self.client = MongoClient(self.connection_string, **self.client_options)
+        self.db = self.client[self.db_name]
+        self._pid = os.getpid()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def __del__(self):
         """
-        Destructor to ensure MongoDB connection is closed when the object is destroyed.
+        Destructor releasing the client (a private client is closed) when the object is destroyed.
         """
         self.close()
 
@@ -45,6 +95,10 @@ class MongoHandler:
         """
         Retrieve a collection by name.
         """
+        if self._pid != os.getpid():
+            # inherited through a fork, the parent's client must not be used here
+            logging.info("MongoHandler used in a forked process, reconnecting.")
+            self._connect()
         return self.db[collection_name]
 
     def get_document_count(self, collection_name, query=None):
@@ -60,49 +114,149 @@ class MongoHandler:
             collection = self.get_collection(collection_name)
             if query is None:
                 query = {}
-            count = collection.count_documents(query)
-            logging.info(f"Collection '{collection_name}' has {count} documents (query: {query}).")
+            with self.metrics.time_mongo("count", collection_name):
+                count = collection.count_documents(query)
+            logging.debug("Collection '%s' has %d documents (query: %s).", collection_name, count, query)
             return count
         except Exception as e:
             logging.error("Error counting documents in collection", exc_info=True)
             raise e
 
-    def insert_document(self, collection_name, document):
+    def insert_document(self, collection_name, document, apply_retention=True):
         """
         Insert a document into a specified collection and trigger data retention if needed.
 
         :param collection_name: Name of the collection.
         :param document: Dictionary representing the document to insert.
+        :param apply_retention: Whether to run (or schedule) data retention after the insert.
         :return: The inserted document's id.
         """
         try:
+            self.prepare_retention(collection_name)
             collection = self.get_collection(collection_name)
-            result = collection.insert_one(document)
-            logging.info(f"Inserted document with id {result.inserted_id} into {collection_name}")
+            with self.metrics.time_mongo("insert_one", collection_name):
+                result = collection.insert_one(self._stamp(collection_name, document))
+            logging.debug("Inserted document with id %s into %s", result.inserted_id, collection_name)
             # After insertion, check retention.
-            self.data_retention(collection_name)
+            if apply_retention:
+                self.maybe_run_retention(collection_name)
             return result.inserted_id
         except Exception as e:
             logging.error("Error inserting document", exc_info=True)
             raise e
 
-    def data_retention(self, collection_name):
+    def insert_documents(self, collection_name, documents, ordered=True, apply_retention=True):
+        """
+        Insert many documents with a single insert_many round-trip and evaluate retention once.
+
+        :param collection_name: Name of the collection.
+        :param documents: List of dictionaries to insert.
+        :param ordered: If True, stop at the first failing document; if False, insert all the others
+                        (faster, the server may parallelize the writes).
+        :param apply_retention: Whether to run (or schedule) data retention after the batch.
+        :return: List of the inserted documents' ids.
+        """
+        if not documents:
+            return []
+        try:
+            self.prepare_retention(collection_name)
+            collection = self.get_collection(collection_name)
+            with self.metrics.time_mongo("insert_many", collection_name):
+                result = collection.insert_many([self._stamp(collection_name, document) for document in documents],
+                                                ordered=ordered)
+            logging.debug("Inserted %d documents into %s", len(result.inserted_ids), collection_name)
+            if apply_retention:
+                self.maybe_run_retention(collection_name)
+            return result.inserted_ids
+        except Exception as e:
+            logging.error("Error inserting documents", exc_info=True)
+            raise e
+
+    def bulk_write(self, collection_name, operations, ordered=True, apply_retention=True):
+        """
+        Run a list of pymongo write operations (InsertOne, UpdateOne, ReplaceOne, DeleteOne, ...)
+        in a single bulk_write round-trip and evaluate retention once.
+
+        :param collection_name: Name of the collection.
+        :param operations: List of pymongo write operations.
+        :param ordered: If True, stop at the first failing operation.
+        :param apply_retention: Whether to run (or schedule) data retention after the batch.
+        :return: The pymongo BulkWriteResult.
+
+        Documents inside InsertOne operations are passed through as they are; with the ttl
+        retention strategy stamp those of a retained collection with self.retention.stamp first.
+        """
+        if not operations:
+            return None
         try:
+            self.prepare_retention(collection_name)
             collection = self.get_collection(collection_name)
-            count = collection.estimated_document_count()
-            logging.info(f"Collection '{collection_name}' has {count} documents.")
-            if count > self.retention_limit:
-                num_to_delete = count - self.retention_limit
-                logging.info(f"Document count {count} exceeds retention limit {self.retention_limit}. Deleting {num_to_delete} oldest records...")
-                oldest_docs = list(collection.find().sort('_id', 1).limit(num_to_delete))
-                if oldest_docs:
-                    ids_to_delete = [doc['_id'] for doc in oldest_docs]
-                    result = collection.delete_many({'_id': {'$in': ids_to_delete}})
-                    logging.info(f"Deleted {result.deleted_count} documents from {collection_name}.")
-                else:
-                    logging.info("No documents found to delete for retention.")
+            with self.metrics.time_mongo("bulk_write", collection_name):
+                result = collection.bulk_write(operations, ordered=ordered)
+            logging.debug("Bulk write into %s: %d inserted, %d modified, %d upserted, %d deleted", collection_name,
+                          result.inserted_count, result.modified_count, result.upserted_count, result.deleted_count)
+            if apply_retention:
+                self.maybe_run_retention(collection_name)
+            return result
+        except Exception as e:
+            logging.error("Error in bulk write", exc_info=True)
+            raise e
+
+    def maybe_run_retention(self, collection_name):
+        """
+        Run data retention for a retained collection unless it already ran within retention_interval seconds.
+
+        :param collection_name: Name of the collection.
+        :return: True if retention ran.
+        """
+        if not self.retains(collection_name):
+            return False
+        now = time.monotonic()
+        last = self._last_retention.get(collection_name)
+        if last is not None and now - last < self.retention_interval:
+            return False
+        self._last_retention[collection_name] = now
+        self.data_retention(collection_name)
+        return True
+
+    def prepare_retention(self, collection_name):
+        """
+        Set up whatever the retention strategy needs server side (TTL index, capped collection).
+        Runs once per retained collection and handler; called automatically before the first insert.
+
+        :param collection_name: Name of the collection.
+        """
+        if collection_name in self._retention_prepared or not self.retains(collection_name):
+            return
+        self.retention.prepare(self, self.get_collection(collection_name))
+        self._retention_prepared.add(collection_name)
+        logging.info(f"Prepared '{self.retention.name}' retention for collection '{collection_name}'.")
+
+    def retains(self, collection_name):
+        """
+        Whether the retention strategy applies to a collection, see retained_collections.
+        """
+        return collection_name in self.retained_collections
+
+    def _stamp(self, collection_name, document):
+        return self.retention.stamp(document) if self.retains(collection_name) else document
+
+    def data_retention(self, collection_name):
+        """
+        Apply the retention strategy to a collection.
+
+        :param collection_name: Name of the collection.
+        :return: Number of deleted documents (always 0 for the server side strategies).
+        """
+        started = time.perf_counter()
+        try:
+            deleted = self.retention.apply(self, self.get_collection(collection_name))
+            self.metrics.observe_retention(self.retention.name, collection_name, time.perf_counter() - started,
+                                           deleted)
+            return deleted
         except Exception as e:
             logging.error("Error in data retention process", exc_info=True)
+            return 0
 
     def find_one(self, collection_name, query):
         """
@@ -110,19 +264,46 @@ class MongoHandler:
         """
         try:
             collection = self.get_collection(collection_name)
-            return collection.find_one(query)
+            with self.metrics.time_mongo("find_one", collection_name):
+                return collection.find_one(query)
         except Exception as e:
             logging.error("Error finding document", exc_info=True)
             raise e
 
+    def aggregate(self, collection_name, pipeline, allow_disk_use=False, batch_size=None, max_time_ms=None):
+        """
+        Run an aggregation pipeline on the server and stream its results.
+
+        :param collection_name: Name of the collection.
+        :param pipeline: A MongoPipeline or a list of raw stages.
+        :param allow_disk_use: Let $group and $sort stages spill to disk instead of failing at 100 MB.
+        :param batch_size: (optional) Documents per round-trip of the cursor.
+        :param max_time_ms: (optional) Server side time limit of the aggregation.
+        :return: A cursor yielding the result documents; close it when not read to the end.
+        """
+        stages = pipeline.stages() if isinstance(pipeline, MongoPipeline) else list(pipeline)
+        options = {"allowDiskUse": allow_disk_use}
+        if batch_size is not None:
+            options["batchSize"] = batch_size
+        if max_time_ms is not None:
+            options["maxTimeMS"] = max_time_ms
+        try:
+            collection = self.get_collection(collection_name)
+            with self.metrics.time_mongo("aggregate", collection_name):
+                return collection.aggregate(stages, **options)
+        except Exception as e:
+            logging.error("Error running aggregation", exc_info=True)
+            raise e
+
     def update_document(self, collection_name, query, update_data):
         """
         Update a document in the specified collection.
         """
         try:
             collection = self.get_collection(collection_name)
-            result = collection.update_one(query, update_data)
-            logging.info(f"Updated {result.modified_count} document(s) in {collection_name}")
+            with self.metrics.time_mongo("update_one", collection_name):
+                result = collection.update_one(query, update_data)
+            logging.debug("Updated %d document(s) in %s", result.modified_count, collection_name)
             return result.modified_count
         except Exception as e:
             logging.error("Error updating document", exc_info=True)
@@ -134,8 +315,9 @@ class MongoHandler:
         """
         try:
             collection = self.get_collection(collection_name)
-            result = collection.delete_one(query)
-            logging.info(f"Deleted {result.deleted_count} document(s) from {collection_name}")
+            with self.metrics.time_mongo("delete_one", collection_name):
+                result = collection.delete_one(query)
+            logging.debug("Deleted %d document(s) from %s", result.deleted_count, collection_name)
             return result.deleted_count
         except Exception as e:
             logging.error("Error deleting document", exc_info=True)
@@ -143,8 +325,17 @@ class MongoHandler:
 
     def close(self):
         """
-        Close the MongoDB connection.
+        Release the shared client (it stays open for other handlers, see MongoClientRegistry.close_all),
+        or close the private one. Repeated calls are no-ops.
         """
-        if self.client:
+        if not self.client:
+            return
+        if self.shared_client:
+            if self._acquired is not None:
+                MongoClientRegistry.release(self._acquired)
+                self._acquired = None
+                logging.info("MongoDB client released.")
+        else:
             self.client.close()
+            self.client = None
             logging.info("MongoDB connection closed.")
@@ -0,0 +1,181 @@
+# File: handlers/MongoPipeline.py
+
+from weather_app.helpers.WeatherCache import location_key
+
+DAY = 86400
+
+# accumulator names accepted by MongoPipeline.group_by_day
+ACCUMULATORS = ("min", "max", "avg", "sum", "first", "last", "push", "addToSet")
+
+
+def _field(path):
+    """
+    "$"-prefixed reference of a field path, literals and expressions are passed through.
+    """
+    return f"${path}" if isinstance(path, str) and not path.startswith("$") else path
+
+
+def _range(start_ts=None, end_ts=None):
+    condition = {}
+    if start_ts is not None:
+        condition["$gte"] = int(start_ts)
+    if end_ts is not None:
+        condition["$lt"] = int(end_ts)
+    return condition
+
+
+class MongoPipeline:
+    """
+    Builder of aggregation pipelines over hourly weather, run by MongoHandler.aggregate.
+
+    Every method appends one stage (or a small fixed group of stages) and returns the builder,
+    so the filtering, unwinding, projection and grouping all happen on the server and only the
+    answer travels to Python:
+
+        pipeline = (MongoPipeline()
+                    .match(city="London", start_ts=start_ts, end_ts=end_ts)
+                    .project("city", "dt", "temp", "rain")
+                    .group_by_day(temp_max=("max", "temp"), rain=("sum", "rain"), hours=("count", None))
+                    .sort("day"))
+        for day in mongo_handler.aggregate("weather_hourly", pipeline, batch_size=500):
+            ...
+
+    Raw API responses (one document with an hourly "list" per call, like the tutorial's
+    weather_data collection) are handled with unwind; see daily_summary for both shapes.
+    """
+    def __init__(self, stages=None):
+        """
+        :param stages: (optional) Initial list of raw stages.
+        """
+        self._stages = list(stages or [])
+
+    def match(self, city=None, start_ts=None, end_ts=None, city_field="city", dt_field="dt", **conditions):
+        """
+        Filter documents of a city in [start_ts, end_ts). Put it first, so the (city, dt) index is used.
+
+        :param city: (optional) City name (or list of names).
+        :param start_ts: (optional) Start of the range as a unix timestamp (inclusive).
+        :param end_ts: (optional) End of the range as a unix timestamp (exclusive).
+        :param city_field: Field holding the city name.
+        :param dt_field: Field holding the unix timestamp.
+        :param conditions: Further equality or operator conditions, field=value.
+        """
+        query = {}
+        if city is not None:
+            query[city_field] = {"$in": list(city)} if isinstance(city, (list, tuple, set)) else city
+        if start_ts is not None or end_ts is not None:
+            query[dt_field] = _range(start_ts, end_ts)
+        query.update(conditions)
+        self._stages.append({"$match": query})
+        return self
+
+    def project(self, *fields, **expressions):
+        """
+        Keep only the given fields (and _id dropped), optionally computing or renaming some.
+
+        :param fields: Field paths to keep as they are, e.g. "temp" or "list.main.temp".
+        :param expressions: New field name -> source field path (e.g. temp="list.main.temp") or expression.
+        """
+        projection = {"_id": 0}
+        projection.update({field: 1 for field in fields})
+        projection.update({name: _field(source) for name, source in expressions.items()})
+        self._stages.append({"$project": projection})
+        return self
+
+    def unwind(self, path="list", start_ts=None, end_ts=None, dt_field="dt"):
+        """
+        Turn every element of an array of hours into its own document, keeping only the hours
+        in [start_ts, end_ts). Documents without any hour in the range are dropped before unwinding.
+
+        :param path: Field holding the array, "list" in history API responses.
+        :param start_ts: (optional) Start of the range as a unix timestamp (inclusive).
+        :param end_ts: (optional) End of the range as a unix timestamp (exclusive).
+        :param dt_field: Timestamp field of the array elements.
+        """
+        condition = _range(start_ts, end_ts)
+        if condition:
+            self._stages.append({"$match": {path: {"$elemMatch": {dt_field: condition}}}})
+        self._stages.append({"$unwind": f"${path}"})
+        if condition:
+            self._stages.append({"$match": {f"{path}.{dt_field}": condition}})
+        return self
+
+    def group_by_day(self, by=("city",), dt_field="dt", **accumulators):
+        """
+        Group the hours by UTC day (and the by fields) and flatten the result into
+        documents {day, <by fields>, <accumulators>}.
+
+        :param by: Fields grouped on besides the day.
+        :param dt_field: Field holding the unix timestamp.
+        :param accumulators: Output name -> (accumulator, field path), with the accumulator one
+                             of ACCUMULATORS or "count" (field ignored).
+        """
+        key = {name: _field(name) for name in by}
+        key["day"] = {"$subtract": [_field(dt_field), {"$mod": [_field(dt_field), DAY]}]}
+        group = {"_id": key}
+        for name, (accumulator, source) in accumulators.items():
+            if accumulator == "count":
+                group[name] = {"$sum": 1}
+            elif accumulator in ACCUMULATORS:
+                group[name] = {f"${accumulator}": _field(source)}
+            else:
+                raise ValueError(f"Unknown accumulator: {accumulator}")
+        flat = {"_id": 0, "day": "$_id.day"}
+        flat.update({name: f"$_id.{name}" for name in by})
+        flat.update({name: 1 for name in accumulators})
+        self._stages += [{"$group": group}, {"$project": flat}]
+        return self
+
+    def sort(self, *fields):
+        """
+        Sort by the given fields, a leading "-" sorts descending.
+        """
+        self._stages.append({"$sort": {field.lstrip("-"): -1 if field.startswith("-") else 1 for field in fields}})
+        return self
+
+    def limit(self, count):
+        self._stages.append({"$limit": int(count)})
+        return self
+
+    def stages(self):
+        """
+        The pipeline as a list of stages, as accepted by pymongo.
+        """
+        return list(self._stages)
+
+    def __len__(self):
+        return len(self._stages)
+
+    @classmethod
+    def daily_summary(cls, city, start_ts, end_ts, hourly_list=None):
+        """
+        Per city and UTC day: minimum, maximum and mean temperature, total rain and number of hours.
+
+        :param city: City name (or list of names).
+        :param start_ts: Start of the range as a unix timestamp (inclusive).
+        :param end_ts: End of the range as a unix timestamp (exclusive).
+        :param hourly_list: None for flat hourly documents (HourlyWeatherStore, matched and grouped
+                            by their case insensitive location), or the array field of raw API
+                            responses stored with a city_name (e.g. "list").
+        :return: A MongoPipeline yielding {day, city, temp_min, temp_max, temp_mean, rain, hours} sorted by city and day.
+        """
+        pipeline = cls()
+        summary = dict(temp_min=("min", "temp"), temp_max=("max", "temp"), temp_mean=("avg", "temp"),
+                       rain=("sum", "rain"), hours=("count", None))
+        if hourly_list is None:
+            locations = ([location_key(name, None, None) for name in city] if isinstance(city, (list, tuple, set))
+                         else location_key(city, None, None))
+            pipeline.match(city=locations, start_ts=start_ts, end_ts=end_ts, city_field="location")
+            pipeline.project("location", "city", "dt", "temp", "rain")
+            # grouped by location, so hours ingested under different spellings of a city end up in one day
+            pipeline.group_by_day(by=("location",), city=("last", "city"), **summary)
+            pipeline.project("day", "city", *summary)
+        else:
+            # project before unwinding, so the server copies only the fields the summary needs
+            pipeline.match(city=city, city_field="city_name")
+            pipeline.project("city_name", f"{hourly_list}.dt", f"{hourly_list}.main.temp", f"{hourly_list}.rain")
+            pipeline.unwind(hourly_list, start_ts, end_ts)
+            pipeline.project(city="city_name", dt=f"{hourly_list}.dt", temp=f"{hourly_list}.main.temp",
+                             rain={"$ifNull": [f"${hourly_list}.rain.1h", 0]})
+            pipeline.group_by_day(**summary)
+        return pipeline.sort("city", "day")
@@ -0,0 +1,127 @@
+# File: handlers/MongoRetention.py
+
+import logging
+from datetime import datetime, timezone
+from pymongo import ASCENDING, errors
+
+
+class CountRetention:
+    """
+    Keep at most handler.retention_limit documents per collection.
+
+    When the limit is exceeded, at least handler.delete_count oldest documents are removed
+    (more if the collection overflowed by more), so retention does not fire again on the very
+    next insert. The cutoff is found server side by skipping to the first surviving _id and
+    everything older is removed with one range delete, so no documents are pulled into Python.
+    """
+    name = "count"
+
+    def prepare(self, handler, collection):
+        pass
+
+    def stamp(self, document):
+        return document
+
+    def apply(self, handler, collection):
+        count = collection.estimated_document_count()
+        logging.debug("Collection '%s' has %d documents.", collection.name, count)
+        if count <= handler.retention_limit:
+            return 0
+        num_to_delete = max(count - handler.retention_limit, handler.delete_count)
+        logging.info(f"Document count {count} exceeds retention limit {handler.retention_limit}. "
+                     f"Deleting {num_to_delete} oldest records...")
+        survivor = next(iter(collection.find({}, {"_id": 1}).sort("_id", ASCENDING).skip(num_to_delete).limit(1)), None)
+        query = {"_id": {"$lt": survivor["_id"]}} if survivor is not None else {}
+        result = collection.delete_many(query)
+        logging.info(f"Deleted {result.deleted_count} documents from {collection.name}.")
+        return result.deleted_count
+
+
+class TtlRetention:
+    """
+    Let the server expire documents ttl_seconds after they were ingested.
+
+    Every inserted document is stamped with an ingested_at date and a TTL index on that field
+    is created; mongod's TTL monitor then deletes expired documents in the background, so
+    inserts never pay for retention.
+    """
+    name = "ttl"
+
+    def __init__(self, ttl_seconds, field="ingested_at"):
+        """
+        :param ttl_seconds: Age in seconds after which a document is deleted.
+        :param field: Name of the ingest timestamp field.
+        """
+        self.ttl_seconds = int(ttl_seconds)
+        self.field = field
+
+    def prepare(self, handler, collection):
+        try:
+            collection.create_index([(self.field, ASCENDING)], expireAfterSeconds=self.ttl_seconds)
+        except errors.OperationFailure:
+            # an index with another TTL already exists, update it in place
+            handler.db.command("collMod", collection.name,
+                               index={"keyPattern": {self.field: 1}, "expireAfterSeconds": self.ttl_seconds})
+
+    def stamp(self, document):
+        document.setdefault(self.field, datetime.now(timezone.utc))
+        return document
+
+    def apply(self, handler, collection):
+        return 0
+
+
+class CappedRetention:
+    """
+    Store documents in a capped collection that the server trims on insert.
+
+    A new collection is capped at handler.retention_limit documents and size_bytes bytes; the
+    oldest documents are overwritten in insertion order. An existing uncapped collection is
+    converted with convertToCapped (which keeps the newest documents that fit). convertToCapped
+    takes no document limit, so a converted collection is capped by size_bytes only; drop and
+    recreate it to have retention_limit enforced as well.
+    """
+    name = "capped"
+
+    def __init__(self, size_bytes):
+        """
+        :param size_bytes: Maximum size of the capped collection in bytes.
+        """
+        self.size_bytes = int(size_bytes)
+
+    def prepare(self, handler, collection):
+        if collection.name not in handler.db.list_collection_names():
+            handler.db.create_collection(collection.name, capped=True, size=self.size_bytes,
+                                         max=handler.retention_limit)
+        elif not collection.options().get("capped"):
+            logging.warning(f"Converting collection '{collection.name}' to a capped collection of "
+                            f"{self.size_bytes} bytes, without the {handler.retention_limit} document limit.")
+            handler.db.command("convertToCapped", collection.name, size=self.size_bytes)
+
+    def stamp(self, document):
+        return document
+
+    def apply(self, handler, collection):
+        return 0
+
+
+def make_retention(strategy="count", ttl_seconds=None, capped_size_bytes=None):
+    """
+    Build a retention strategy by name.
+
+    :param strategy: "count", "ttl" or "capped".
+    :param ttl_seconds: Document lifetime for the "ttl" strategy.
+    :param capped_size_bytes: Collection size for the "capped" strategy.
+    :return: A retention strategy instance.
+    """
+    if strategy == "count":
+        return CountRetention()
+    if strategy == "ttl":
+        if not ttl_seconds:
+            raise ValueError("The ttl retention strategy needs ttl_seconds.")
+        return TtlRetention(ttl_seconds)
+    if strategy == "capped":
+        if not capped_size_bytes:
+            raise ValueError("The capped retention strategy needs capped_size_bytes.")
+        return CappedRetention(capped_size_bytes)
+    raise ValueError(f"Unknown retention strategy: {strategy}")
@@ -0,0 +1,190 @@
+# File: handlers/ReplayTransport.py
+
+import os
+import io
+import gzip
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+import requests
+from weather_app.handlers.HttpTransport import HttpTransport, normalize_url
+from weather_app.handlers.ApiHandler import ApiHandlerError
+
+# response headers that are not worth keeping in a recording
+DROPPED_HEADERS = ("set-cookie", "date", "connection", "keep-alive", "transfer-encoding", "content-encoding",
+                   "content-length")
+
+
+class RecordingStore:
+    """
+    Directory of recorded responses, one gzip compressed JSON file per normalized URL.
+
+    Files are named after the SHA-256 of the key and written atomically, so several recording
+    processes can share a directory and the recordings can be committed as test fixtures.
+    """
+    def __init__(self, path):
+        """
+        :param path: Directory holding the recordings, created on the first save.
+        """
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _file(self, key):
+        return os.path.join(self.path, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json.gz")
+
+    def save(self, url, response):
+        """
+        Record a response under the normalized URL.
+
+        :param url: The requested URL (the API key is stripped from the key).
+        :param response: The requests.Response to record.
+        :return: The recording key.
+        """
+        key = normalize_url(url)
+        entry = {"url": key, "status_code": response.status_code,
+                 "headers": {name: value for name, value in response.headers.items()
+                             if name.lower() not in DROPPED_HEADERS},
+                 "body": response.content.decode("utf-8")}
+        os.makedirs(self.path, exist_ok=True)
+        file_path = self._file(key)
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(temp_path, file_path)
+        with self._lock:
+            self._entries[key] = entry
+        return key
+
+    def load(self, url):
+        """
+        Return the recording of a URL, or None if it was never recorded.
+        """
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        try:
+            with gzip.open(self._file(key), "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def __len__(self):
+        if not os.path.isdir(self.path):
+            return 0
+        return sum(1 for name in os.listdir(self.path) if name.endswith(".json.gz"))
+
+
+class RecordingTransport(HttpTransport):
+    """
+    HttpTransport that saves every final response to a RecordingStore.
+
+    Responses that are still retryable after the last attempt (429, 5xx) are not recorded, so a
+    recording session hitting a hiccup does not bake the failure into the fixtures.
+    """
+    def __init__(self, store, **kwargs):
+        """
+        :param store: RecordingStore (or a directory path) receiving the responses.
+        :param kwargs: Keyword arguments of HttpTransport.
+        """
+        super().__init__(**kwargs)
+        self.store = store if isinstance(store, RecordingStore) else RecordingStore(store)
+
+    def get(self, url, before_attempt=None, **kwargs):
+        response = super().get(url, before_attempt=before_attempt, **kwargs)
+        if response.status_code not in self.retry_statuses:
+            key = self.store.save(url, response)
+            logging.info(f"Recorded HTTP {response.status_code} for {key}")
+        return response
+
+
+class _ReplaySession:
+    """
+    Stand-in for requests.Session answering from a RecordingStore, with injected latency and failures.
+    """
+    def __init__(self, transport):
+        self.transport = transport
+
+    def get(self, url, **kwargs):
+        transport = self.transport
+        with transport._rng_lock:
+            delay = transport.latency + transport._rng.uniform(0, transport.latency_jitter)
+            roll = transport._rng.random()
+            error_status = transport._rng.choice(transport.error_statuses) if transport.error_statuses else 503
+        if delay > 0:
+            time.sleep(delay)
+        if roll < transport.connection_error_rate:
+            raise requests.ConnectionError(f"Injected connection error for {normalize_url(url)}")
+        if roll < transport.connection_error_rate + transport.error_rate:
+            return transport._response(url, error_status, {}, json.dumps({"cod": str(error_status),
+                                                                           "message": "Injected error"}))
+        entry = transport.store.load(url)
+        if entry is None:
+            raise RecordingNotFoundError(f"No recording for {normalize_url(url)} in {transport.store.path}")
+        return transport._response(url, entry["status_code"], entry["headers"], entry["body"])
+
+    def close(self):
+        pass
+
+
+class ReplayTransport(HttpTransport):
+    """
+    Offline HttpTransport serving responses recorded by RecordingTransport.
+
+    Only the session is replaced, so retries, backoff and rate limiting behave exactly as with the
+    real transport. Every attempt waits latency plus up to latency_jitter seconds, then fails with
+    a connection error (connection_error_rate) or with one of error_statuses (error_rate); with a
+    fixed seed the injected failures are reproducible. A request that was never recorded raises
+    RecordingNotFoundError.
+
+        transport = ReplayTransport("tests/recordings", latency=0.05, error_rate=0.02, seed=1)
+        handler = WeatherApiHandler(api_root, "any key", transport=transport)
+    """
+    def __init__(self, store, latency=0.0, latency_jitter=0.0, error_rate=0.0, connection_error_rate=0.0,
+                 error_statuses=(500, 503), seed=None, **kwargs):
+        """
+        :param store: RecordingStore (or a directory path) holding the recordings.
+        :param latency: Seconds every attempt waits before answering.
+        :param latency_jitter: Extra uniformly distributed wait of up to this many seconds.
+        :param error_rate: Probability that an attempt answers with one of error_statuses.
+        :param connection_error_rate: Probability that an attempt raises requests.ConnectionError.
+        :param error_statuses: HTTP status codes used for injected errors.
+        :param seed: (optional) Seed making the injected latency and failures reproducible.
+        :param kwargs: Keyword arguments of HttpTransport (max_retries, backoff_factor, ...).
+        """
+        super().__init__(**kwargs)
+        if not 0 <= error_rate + connection_error_rate <= 1:
+            raise ValueError("error_rate and connection_error_rate must add up to a probability.")
+        self.store = store if isinstance(store, RecordingStore) else RecordingStore(store)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.connection_error_rate = connection_error_rate
+        self.error_statuses = tuple(error_statuses)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.session.close()
+        self.session = _ReplaySession(self)
+
+    @staticmethod
+    def _response(url, status_code, headers, body):
+        response = requests.Response()
+        response.url = url
+        response.status_code = status_code
+        response.headers.update(headers)
+        response._content = body.encode("utf-8")
+        response.raw = io.BytesIO(response._content)
+        response.encoding = "utf-8"
+        return response
+
+
+class RecordingNotFoundError(ApiHandlerError):
+    pass
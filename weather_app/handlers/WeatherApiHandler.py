@@ -1,13 +1,17 @@
 # File: handlers/WeatherApiHandler.py
 
 import os
-import requests
 import time
 import logging
 from datetime import datetime
 import json
+from urllib.parse import urlsplit, parse_qs
 from weather_app.handlers.ApiHandler import ApiHandler, ApiHandlerError, BadRequestError, UnauthorizedError, \
     NotFoundError, TooManyRequestsError, UnexpectedError
+from weather_app.handlers.HttpTransport import log_request, normalize_url
+from weather_app.helpers.RangePlanner import RangePlanner, HOUR
+from weather_app.helpers.HourlyColumns import HourlyColumns
+from weather_app.helpers.Metrics import timed
 
 
 class WeatherApiHandler(ApiHandler):
@@ -15,17 +19,30 @@ class WeatherApiHandler(ApiHandler):
     WARNING THIS CLASS WILL ALWAYS RETURN HOURLY WEATHER FORECAST
     AS THE HISTORY API DOES NOT SUPPORT DAILY AVERAGE FORECASTS CALLS
     """
-    def __init__(self, api_root, api_key):
+    def __init__(self, api_root, api_key, range_planner=None, transport=None, rate_limiter=None, health_check_ttl=300,
+                 single_flight=None, response_cache=None, metrics=None):
         """
         Initialize the WeatherApiHandler.
 
         :param api_root: The root URL of the API (e.g., "https://history.openweathermap.org/data/2.5/history/")
         :param api_key: The API key string.
+        :param range_planner: (optional) RangePlanner splitting long intervals into API sized calls.
+        :param transport: (optional) HttpTransport used for the calls, defaults to the shared one.
+        :param rate_limiter: (optional) RateLimiter consulted before every call.
+        :param health_check_ttl: Seconds a successful health_check stays valid.
+        :param single_flight: (optional) SingleFlight sharing concurrent identical calls.
+        :param response_cache: (optional) ResponseCache serving repeated calls without the API.
+        :param metrics: (optional) Metrics recording the calls, defaults to Metrics.shared().
+
+        No API call is made here, use health_check to verify connectivity.
         """
-        super().__init__(api_root, api_key)
+        super().__init__(api_root, api_key, transport=transport, rate_limiter=rate_limiter,
+                         health_check_ttl=health_check_ttl, single_flight=single_flight,
+                         response_cache=response_cache, metrics=metrics)
         self.api_root = api_root.rstrip('/') + '/'
         self.api_key = api_key
         self.last_json = None
+        self.range_planner = range_planner if range_planner is not None else RangePlanner()
         logging.info("Initializing WeatherApiHandler")
 
         # check if the API key is set
@@ -36,17 +53,16 @@ class WeatherApiHandler(ApiHandler):
         if not self.api_root:
             raise ValueError("API root URL is not set. Check your .env file!")
 
-        # Do a dummy call to verify connectivity and key validity.
+    def _health_check_url(self):
+        """
+        Single hour of London history from a day ago, used by health_check to verify connectivity
+        and key validity.
+        """
         # get current time in unix timestamp - 1 day
         now = int(time.time()) - 86400
-        dummy_url = f"{self.api_root}city?q=London&start={now}&cnt=1&appid={self.api_key}&type=daily"
-        response = requests.get(dummy_url)
-        self.last_json = response.json()
-        if response.status_code != 200:
-            self._handle_error(response)
-        logging.info("Dummy call successful.")
-
+        return f"{self.api_root}city?q=London&start={now}&cnt=1&appid={self.api_key}&type=daily"
 
+    @timed
     def get_weather_n_days_into_future_by_date(self, city, latitude, longitude, start, count, occurrence_type="day"):
         """
         Call the weather API for a given location starting from the provided start date.
@@ -63,35 +79,11 @@ class WeatherApiHandler(ApiHandler):
         :return: The JSON response from the API.
         """
 
-        # Convert the start date string to a Unix timestamp.
-        start_ts = int(time.mktime(datetime.strptime(start, "%m/%d/%Y").timetuple()))
-        now = int(time.time())
-
-        if start_ts > now:
-            raise WeatherApiError("Start time is in the future.")
-        if start_ts + count * 86400 > now:
-            raise WeatherApiError("Requested data range goes into the future.")
-
-        # for a reason unkown, most likely due to spanek not really reading openweather api docs before creating this
-        # assignement
-        if occurrence_type == "day":
-            count = count * 24 # adjust for an hour count after the correct time settings has been set
-
-        # Build URL based on whether city is provided.
-        if city:
-            url = f"{self.api_root}city?q={city}&start={start_ts}&cnt={count}&appid={self.api_key}&type={occurrence_type}"
-        else:
-            url = f"{self.api_root}city?lat={latitude}&lon={longitude}&start={start_ts}&cnt={count}&appid={self.api_key}&type={occurrence_type}"
-
-        logging.info(f"Calling API: {url}")
-        response = requests.get(url)
-        if response.status_code != 200:
-            self._handle_error(response)
-        self.last_json = response.json()
-        return self.last_json
-
+        start_ts, end_ts = self._future_range(start, count, occurrence_type)
+        return self._fetch_range(city, latitude, longitude, start_ts, end_ts, occurrence_type)
 
 
+    @timed
     def get_weather_n_days_into_past_by_date(self, city, latidue, longtidue, end, count, occurrence_type="day"):
         """
         Retrieve weather data for a given location for a specified number of days ending at a given end date.
@@ -106,34 +98,11 @@ class WeatherApiHandler(ApiHandler):
         :param occurrence_type: Type of forecast (default: "daily").
         :return: The JSON response from the API.
         """
-        # Convert the end date from "mm/dd/yyyy" to a Unix timestamp.
-        end_ts = int(time.mktime(datetime.strptime(end, "%m/%d/%Y").timetuple()))
-        now = int(time.time())
-        if end_ts > now:
-            raise WeatherApiError("End time is in the future.")
-
-        # Compute the start timestamp so that the data covers 'count' days ending at 'end_ts'.
-        start_ts = end_ts - count * 86400
-
-        # for a reason unkown, most likely due to spanek not really reading openweather api docs before creating this
-        # assignement
-        if occurrence_type == "day":
-            count = count * 24 # adjust for an hour count after the correct time settings has been set
-
-        # Build the URL: if city is provided, use that; otherwise use latitude and longitude.
-        if city:
-            url = f"{self.api_root}city?q={city}&start={start_ts}&cnt={count}&appid={self.api_key}&type={occurrence_type}"
-        else:
-            url = f"{self.api_root}city?lat={latidue}&lon={longtidue}&start={start_ts}&cnt={count}&appid={self.api_key}&type={occurrence_type}"
-
-        logging.info(f"Calling API: {url}")
-        response = requests.get(url)
-        if response.status_code != 200:
-            self._handle_error(response)
-        self.last_json = response.json()
-        return self.last_json
+        start_ts, end_ts = self._past_range(end, count, occurrence_type)
+        return self._fetch_range(city, latidue, longtidue, start_ts, end_ts, occurrence_type)
 
 
+    @timed
     def get_weather_by_interval(self, city, latitude, longitude, start, end, occurrence_type="day"):
         """
         Retrieve weather data for a given location for an interval specified by start and end dates.
@@ -150,6 +119,152 @@ class WeatherApiHandler(ApiHandler):
         :param occurrence_type: Type of forecast (default: "daily").
         :return: The JSON response from the API.
         """
+        start_ts, end_ts = self._interval_range(start, end)
+        return self._fetch_range(city, latitude, longitude, start_ts, end_ts, occurrence_type)
+
+    @timed
+    def get_weather_by_timestamps(self, city, latitude, longitude, start_ts, end_ts, occurrence_type="hour"):
+        """
+        Retrieve weather data for a given location between two unix timestamps (both inclusive).
+
+        This is the low level variant of get_weather_by_interval used by the caching layer,
+        which works with hour buckets instead of whole days.
+
+        :param city: Name of the city (if provided).
+        :param latitude: Latitude (used if city is not provided).
+        :param longitude: Longitude (used if city is not provided).
+        :param start_ts: Start of the interval as a unix timestamp.
+        :param end_ts: End of the interval as a unix timestamp.
+        :param occurrence_type: Type of forecast (default: "hour").
+        :return: The JSON response from the API.
+        """
+        url = self._timestamps_url(self.api_root, self.api_key, city, latitude, longitude, start_ts, end_ts, occurrence_type)
+        log_request("Calling API by timestamps", url)
+        self.last_json = self._get_json(url)
+        return self.last_json
+
+    @timed
+    def get_weather_columns_by_timestamps(self, city, latitude, longitude, start_ts, end_ts, occurrence_type="hour",
+                                          keep_raw=False):
+        """
+        Same call as get_weather_by_timestamps, but the response is streamed straight into an
+        HourlyColumns instead of nested dicts; last_json is left untouched.
+
+        :param keep_raw: Also keep the original response text (HourlyColumns.raw).
+        :return: An HourlyColumns instance.
+        """
+        url = self._timestamps_url(self.api_root, self.api_key, city, latitude, longitude, start_ts, end_ts, occurrence_type)
+        log_request("Calling API by timestamps (columnar)", url)
+        key = ttl = None
+        if self.response_cache is not None:
+            key = normalize_url(url)
+            body = self.response_cache.get(key)
+            if body is not None:
+                return HourlyColumns.from_stream([body], keep_raw=keep_raw)
+            ttl = self._cache_ttl(url)
+        # a fetched body is still streamed, its text is kept only when it goes into the cache
+        store = key is not None and ttl != 0
+        response = self._get(url, stream=True)
+        try:
+            columns = HourlyColumns.from_stream(response.iter_content(chunk_size=65536), keep_raw=keep_raw or store)
+        finally:
+            response.close()
+        if store:
+            self.response_cache.put(key, columns.raw.encode("utf-8"), ttl)
+            if not keep_raw:
+                columns.raw = None
+        return columns
+
+    @timed
+    def get_weather_columns_by_interval(self, city, latitude, longitude, start, end, occurrence_type="day"):
+        """
+        Columnar counterpart of get_weather_by_interval for bulk pipelines; long intervals are
+        split by the range planner and the parts stitched with HourlyColumns.stitch.
+
+        :return: An HourlyColumns instance.
+        """
+        start_ts, end_ts = self._interval_range(start, end)
+        parts = self.range_planner.fetch(
+            lambda call_start, call_end: self.get_weather_columns_by_timestamps(
+                city, latitude, longitude, call_start, call_end, occurrence_type),
+            start_ts, end_ts)
+        return parts[0] if len(parts) == 1 else HourlyColumns.stitch(parts, start_ts, end_ts)
+
+    def _cache_ttl(self, url):
+        """
+        History responses never change once their last hour left the revision window, see
+        ResponseCache.history_ttl; other calls (e.g. relative day counts) are not cached.
+        """
+        end = parse_qs(urlsplit(url).query).get("end")
+        if not end:
+            return 0
+        return self.response_cache.history_ttl(int(end[0]))
+
+    @staticmethod
+    def _timestamps_url(api_root, api_key, city, latitude, longitude, start_ts, end_ts, occurrence_type):
+        """
+        Validate a timestamp interval and build the history API URL for it.
+        """
+        if start_ts > end_ts:
+            raise WeatherApiError("Start time must not be after end time.")
+        if end_ts > int(time.time()):
+            raise WeatherApiError("End time is in the future.")
+
+        if city:
+            return f"{api_root}city?q={city}&start={start_ts}&end={end_ts}&appid={api_key}&type={occurrence_type}"
+        return f"{api_root}city?lat={latitude}&lon={longitude}&start={start_ts}&end={end_ts}&appid={api_key}&type={occurrence_type}"
+
+    @staticmethod
+    def _future_range(start, count, occurrence_type):
+        """
+        Validate the arguments of get_weather_n_days_into_future_by_date and turn them into a
+        half-open [start_ts, end_ts) interval.
+        """
+        # Convert the start date string to a Unix timestamp.
+        start_ts = int(time.mktime(datetime.strptime(start, "%m/%d/%Y").timetuple()))
+        now = int(time.time())
+
+        if start_ts > now:
+            raise WeatherApiError("Start time is in the future.")
+        if start_ts + count * 86400 > now:
+            raise WeatherApiError("Requested data range goes into the future.")
+
+        # for a reason unkown, most likely due to spanek not really reading openweather api docs before creating this
+        # assignement
+        if occurrence_type == "day":
+            count = count * 24 # adjust for an hour count after the correct time settings has been set
+
+        # count is an hour count from here on; the planner splits it into API sized calls.
+        return start_ts, start_ts + count * HOUR
+
+    @staticmethod
+    def _past_range(end, count, occurrence_type):
+        """
+        Validate the arguments of get_weather_n_days_into_past_by_date and turn them into a
+        half-open [start_ts, end_ts) interval.
+        """
+        # Convert the end date from "mm/dd/yyyy" to a Unix timestamp.
+        end_ts = int(time.mktime(datetime.strptime(end, "%m/%d/%Y").timetuple()))
+        now = int(time.time())
+        if end_ts > now:
+            raise WeatherApiError("End time is in the future.")
+
+        # Compute the start timestamp so that the data covers 'count' days ending at 'end_ts'.
+        start_ts = end_ts - count * 86400
+
+        # for a reason unkown, most likely due to spanek not really reading openweather api docs before creating this
+        # assignement
+        if occurrence_type == "day":
+            count = count * 24 # adjust for an hour count after the correct time settings has been set
+
+        return start_ts, start_ts + count * HOUR
+
+    @staticmethod
+    def _interval_range(start, end):
+        """
+        Validate the arguments of get_weather_by_interval and turn them into a
+        half-open [start_ts, end_ts) interval.
+        """
         # Convert start and end date strings to Unix timestamps.
         start_ts = int(time.mktime(datetime.strptime(start, "%m/%d/%Y").timetuple()))
         end_ts = int(time.mktime(datetime.strptime(end, "%m/%d/%Y").timetuple()))
@@ -162,17 +277,22 @@ class WeatherApiHandler(ApiHandler):
         if end_ts > now:
             raise WeatherApiError("End time is in the future.")
 
-        # Build URL based on whether city is provided.
-        if city:
-            url = f"{self.api_root}city?q={city}&start={start_ts}&end={end_ts}&appid={self.api_key}&type={occurrence_type}"
-        else:
-            url = f"{self.api_root}city?lat={latitude}&lon={longitude}&start={start_ts}&end={end_ts}&appid={self.api_key}&type={occurrence_type}"
+        # The API treats end as inclusive, so the hour starting at end_ts is part of the interval.
+        return start_ts, end_ts + HOUR
 
-        logging.info(f"Calling API by interval: {url}")
-        response = requests.get(url)
-        if response.status_code != 200:
-            self._handle_error(response)
-        self.last_json = response.json()
+    def _fetch_range(self, city, latitude, longitude, start_ts, end_ts, occurrence_type, known_hours=()):
+        """
+        Fetch [start_ts, end_ts) through the range planner, splitting it into as few API calls
+        as the history endpoint allows, and stitch the responses back together.
+        """
+        responses = self.range_planner.fetch(
+            lambda call_start, call_end: self.get_weather_by_timestamps(
+                city, latitude, longitude, call_start, call_end, occurrence_type),
+            start_ts, end_ts, known_hours)
+        if len(responses) == 1:
+            self.last_json = responses[0]
+        else:
+            self.last_json = RangePlanner.stitch(responses, start_ts, end_ts)
         return self.last_json
 
 
@@ -0,0 +1,190 @@
+# File: helpers/ArrowExport.py
+
+import os
+import logging
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+from pymongo import ASCENDING
+from weather_app.helpers.WeatherCache import location_key
+
+# columns of an export, shared by both sources; rain and snow are 0.0 for dry hours
+HOURLY_SCHEMA = pa.schema([
+    ("city", pa.string()),
+    ("dt", pa.timestamp("s", tz="UTC")),
+    ("temp", pa.float64()),
+    ("temp_min", pa.float64()),
+    ("temp_max", pa.float64()),
+    ("feels_like", pa.float64()),
+    ("pressure", pa.int32()),
+    ("humidity", pa.int32()),
+    ("clouds", pa.int32()),
+    ("wind_speed", pa.float64()),
+    ("wind_deg", pa.int32()),
+    ("wind_gust", pa.float64()),
+    ("rain", pa.float64()),
+    ("snow", pa.float64()),
+    ("weather_description", pa.string()),
+    ("weather_icon", pa.string()),
+])
+# Parquet datasets are split into city=<name>/month=<yyyy-mm> directories
+PARTITIONING = ds.partitioning(pa.schema([("city", pa.string()), ("month", pa.string())]), flavor="hive")
+PARTITIONED_SCHEMA = HOURLY_SCHEMA.append(pa.field("month", pa.string()))
+
+POSTGRES_EXPORT = """
+SELECT wd.city_name, extract(epoch FROM wd.dt)::bigint, wd.temp, wd.temp_min, wd.temp_max, wd.feels_like,
+       wd.pressure, wd.humidity, wd.clouds, wd.wind_speed, wd.wind_deg, wd.wind_gust,
+       coalesce(wd.rain_volume, 0), coalesce(p.volume, 0), wc.description, wc.icon
+FROM weather_data wd
+LEFT JOIN weather_conditions wc ON wc.city_name = wd.city_name AND wc.dt = wd.dt
+LEFT JOIN precipitation p ON p.city_name = wd.city_name AND p.dt = wd.dt AND p.type = 'snow'
+WHERE wd.city_name = ANY(%(cities)s)
+  AND wd.dt >= to_timestamp(%(start)s) AT TIME ZONE 'UTC' AND wd.dt < to_timestamp(%(end)s) AT TIME ZONE 'UTC'
+ORDER BY wd.city_name, wd.dt
+"""
+
+
+class ArrowExport:
+    """
+    Exports stored hourly weather as Arrow record batches, an Arrow table or a Parquet dataset.
+
+    Documents (or rows) of a city/date range are read in batches of batch_size and converted to
+    columns directly, so an export never holds more than one batch of Python objects. The range
+    is pushed down to the source: an index scan on (city, dt) in MongoDB or PostgreSQL.
+
+    A Parquet export is partitioned by city and month; read_parquet prunes partitions and row
+    groups with the same range and memory maps the files, which makes notebook loads fast:
+
+        export = ArrowExport(hourly_store=store)
+        export.to_parquet("exports/weather", ["London", "Prague"], start_ts, end_ts)
+        table = ArrowExport.read_parquet("exports/weather", ["London"], start_ts, end_ts)
+        df = table.to_pandas()
+    """
+    def __init__(self, hourly_store=None, postgres_handler=None, batch_size=10000):
+        """
+        Initialize the exporter; either source may be omitted.
+
+        :param hourly_store: (optional) An instance of HourlyWeatherStore.
+        :param postgres_handler: (optional) An instance of PostgresDbHandler.
+        :param batch_size: Hours per record batch (and per database round-trip).
+        """
+        self.hourly_store = hourly_store
+        self.postgres_handler = postgres_handler
+        self.batch_size = batch_size
+
+    def iter_batches(self, cities, start_ts, end_ts, source=None):
+        """
+        Stream the hours of the cities in [start_ts, end_ts) as record batches of HOURLY_SCHEMA,
+        ordered by city and dt.
+
+        :param cities: City names.
+        :param start_ts: Start of the range as a unix timestamp (inclusive).
+        :param end_ts: End of the range as a unix timestamp (exclusive).
+        :param source: "mongo" or "postgres"; by default mongo if configured, otherwise postgres.
+        :return: Generator of pyarrow.RecordBatch.
+        """
+        rows = []
+        for row in self._rows(list(cities), start_ts, end_ts, source):
+            rows.append(row)
+            if len(rows) == self.batch_size:
+                yield self._batch(rows)
+                rows = []
+        if rows:
+            yield self._batch(rows)
+
+    def to_table(self, cities, start_ts, end_ts, source=None):
+        """
+        The whole range as one pyarrow.Table, see iter_batches.
+        """
+        return pa.Table.from_batches(list(self.iter_batches(cities, start_ts, end_ts, source)), HOURLY_SCHEMA)
+
+    def to_parquet(self, path, cities, start_ts, end_ts, source=None):
+        """
+        Write the range as a Parquet dataset partitioned into city=<name>/month=<yyyy-mm> directories.
+
+        Partitions the export touches are replaced as a whole, so export complete months to refresh
+        an existing dataset.
+
+        :param path: Root directory of the dataset.
+        :return: Number of hours written.
+        """
+        cities = list(cities)
+        written = [0]
+
+        def with_month(batches):
+            for batch in batches:
+                written[0] += batch.num_rows
+                months = pc.strftime(batch.column("dt"), "%Y-%m")
+                yield pa.RecordBatch.from_arrays(batch.columns + [months], schema=PARTITIONED_SCHEMA)
+
+        # a single writer thread keeps every file sorted by dt, which keeps row group statistics tight
+        ds.write_dataset(with_month(self.iter_batches(cities, start_ts, end_ts, source)), path,
+                         schema=PARTITIONED_SCHEMA, format="parquet", partitioning=PARTITIONING,
+                         existing_data_behavior="delete_matching", use_threads=False,
+                         basename_template="part-{i}.parquet")
+        logging.info(f"Exported {written[0]} hours of {len(cities)} cities to {path}")
+        return written[0]
+
+    @staticmethod
+    def read_parquet(path, cities=None, start_ts=None, end_ts=None, columns=None):
+        """
+        Load (part of) a dataset written by to_parquet.
+
+        Whole city and month directories outside the filter are skipped, the dt filter is checked
+        against the Parquet row group statistics, and the files are memory mapped.
+
+        :param path: Root directory of the dataset.
+        :param cities: (optional) City names to load, defaults to all.
+        :param start_ts: (optional) Start of the range as a unix timestamp (inclusive).
+        :param end_ts: (optional) End of the range as a unix timestamp (exclusive).
+        :param columns: (optional) Columns to load, defaults to all.
+        :return: A pyarrow.Table sorted by city and dt.
+        """
+        # Parquet has no second resolution timestamps, the schema casts dt back from milliseconds
+        dataset = ds.dataset(os.path.abspath(path), schema=PARTITIONED_SCHEMA, format="parquet",
+                             partitioning=PARTITIONING, filesystem=fs.LocalFileSystem(use_mmap=True))
+        conditions = []
+        if cities is not None:
+            conditions.append(ds.field("city").isin(list(cities)))
+        if start_ts is not None:
+            start = pa.scalar(start_ts, pa.timestamp("s", tz="UTC"))
+            conditions += [ds.field("month") >= pc.strftime(start, "%Y-%m").as_py(), ds.field("dt") >= start]
+        if end_ts is not None:
+            # end_ts is exclusive, so the month of the last included second is the last one to read
+            last = pa.scalar(end_ts - 1, pa.timestamp("s", tz="UTC"))
+            conditions += [ds.field("month") <= pc.strftime(last, "%Y-%m").as_py(),
+                           ds.field("dt") < pa.scalar(end_ts, pa.timestamp("s", tz="UTC"))]
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        loaded = None if columns is None else list(dict.fromkeys(list(columns) + ["city", "dt"]))
+        table = dataset.to_table(columns=loaded, filter=expression)
+        table = table.sort_by([("city", "ascending"), ("dt", "ascending")])
+        return table.select(list(columns)) if columns is not None else table
+
+    def _rows(self, cities, start_ts, end_ts, source):
+        """
+        Rows of the range in HOURLY_SCHEMA column order, read from the chosen source.
+        """
+        if source is None:
+            source = "mongo" if self.hourly_store is not None else "postgres"
+        if source == "mongo":
+            collection = self.hourly_store.mongo_handler.get_collection(self.hourly_store.collection_name)
+            projection = {name: 1 for name in HOURLY_SCHEMA.names}
+            projection["_id"] = 0
+            locations = [location_key(city, None, None) for city in cities]
+            cursor = collection.find({"location": {"$in": locations}, "dt": {"$gte": start_ts, "$lt": end_ts}},
+                                     projection)
+            cursor = cursor.sort([("location", ASCENDING), ("dt", ASCENDING)]).batch_size(self.batch_size)
+            return (tuple(document.get(name) for name in HOURLY_SCHEMA.names) for document in cursor)
+        if source == "postgres":
+            return self.postgres_handler.stream_query(POSTGRES_EXPORT, {"cities": cities, "start": start_ts,
+                                                                        "end": end_ts}, itersize=self.batch_size)
+        raise ValueError(f"Unknown export source: {source}")
+
+    @staticmethod
+    def _batch(rows):
+        columns = zip(*rows)
+        return pa.RecordBatch.from_arrays([pa.array(values, type=field.type)
+                                           for values, field in zip(columns, HOURLY_SCHEMA)], schema=HOURLY_SCHEMA)
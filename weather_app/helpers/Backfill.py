@@ -0,0 +1,223 @@
+# File: helpers/Backfill.py
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, BrokenExecutor, wait, FIRST_COMPLETED
+from weather_app.handlers.ApiHandler import TooManyRequestsError
+from weather_app.helpers.WeatherCache import hour_bucket, location_key
+from weather_app.helpers.RangePlanner import HOUR
+
+DAY = 86400
+
+
+class Backfill:
+    """
+    Loads the hourly history of many cities into an HourlyWeatherStore, resumably.
+
+    The range is split into units of one city and one UTC day (a single API call each) that run
+    on a pool of workers. Every finished unit is checkpointed in MongoDB and skipped by later
+    runs, so an interrupted backfill picks up where it stopped and re-running a finished one costs
+    no API calls. Units are ingested with upserts on (city, dt), which keeps a unit that ran twice
+    (e.g. when the process died before its checkpoint) free of duplicates.
+
+        backfill = Backfill(weather_handler, hourly_store, workers=8)
+        summary = backfill.run([{"name": "London", "lat": 51.5, "lon": -0.12}, "Prague"], start_ts, end_ts)
+
+    Days that are not over yet are ingested but not checkpointed, the next run completes them.
+    """
+    def __init__(self, weather_handler, hourly_store, collection_name="backfill_checkpoints", workers=4):
+        """
+        Initialize the backfill.
+
+        :param weather_handler: An instance of WeatherApiHandler.
+        :param hourly_store: An instance of HourlyWeatherStore receiving the hours.
+        :param collection_name: Name of the collection holding the checkpoints.
+        :param workers: Number of units processed in parallel.
+        """
+        self.weather_handler = weather_handler
+        self.hourly_store = hourly_store
+        self.mongo_handler = hourly_store.mongo_handler
+        self.collection_name = collection_name
+        self.workers = workers
+        self._stop = threading.Event()
+
+    @staticmethod
+    def plan(cities, start_ts, end_ts):
+        """
+        Split a range into per-city, per-day units.
+
+        :param cities: City names, or dicts with "name" and/or "lat" and "lon" (as in the tutorial).
+        :param start_ts: Start of the range as a unix timestamp (inclusive, rounded down to its day).
+        :param end_ts: End of the range as a unix timestamp (exclusive).
+        :return: List of units, dicts with _id, city, lat, lon and day.
+        """
+        units = []
+        for city in cities:
+            if isinstance(city, str):
+                city = {"name": city}
+            name, latitude, longitude = city.get("name"), city.get("lat"), city.get("lon")
+            key = location_key(name, latitude, longitude)
+            for day in range(int(start_ts) // DAY * DAY, int(end_ts), DAY):
+                units.append({"_id": f"{key}|{day}", "city": name.strip() if name else None, "lat": latitude,
+                              "lon": longitude, "day": day})
+        return units
+
+    def pending(self, units):
+        """
+        The units without a checkpoint, in their original order.
+        """
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        done = {checkpoint["_id"] for checkpoint in
+                collection.find({"_id": {"$in": [unit["_id"] for unit in units]}, "status": "done"}, {"_id": 1})}
+        return [unit for unit in units if unit["_id"] not in done]
+
+    def run_unit(self, unit):
+        """
+        Fetch and ingest one unit; safe to call from several threads.
+
+        :param unit: A unit returned by plan.
+        :return: Dictionary with the number of hours received and of hours new or changed in the store.
+        """
+        response = self.weather_handler.get_weather_by_timestamps(unit["city"], unit["lat"], unit["lon"],
+                                                                  unit["day"], unit["day"] + DAY - HOUR)
+        changed = self.hourly_store.ingest(response, unit["city"], unit["lat"], unit["lon"])
+        return {"hours": len(response.get("list", [])), "changed": changed}
+
+    def run(self, cities, start_ts, end_ts, executor=None, runner=None, on_progress=None, now=None):
+        """
+        Backfill the range, skipping checkpointed units.
+
+        Units run on a thread pool of `workers` threads by default. A process pool can be passed as
+        executor together with a picklable runner that calls run_unit on a Backfill created inside
+        the worker process (handlers hold sockets that must not cross a fork, see weather_app.backfill).
+        Checkpoints are always written by the calling process.
+
+        A failing unit (API or storage error) is logged, recorded in its checkpoint and retried by the
+        next run. Running out of API budget (429 after all retries, or the monthly quota) or a broken
+        executor (e.g. a killed worker process) stops scheduling new units.
+
+        :param cities: See plan.
+        :param start_ts: Start of the range as a unix timestamp (inclusive).
+        :param end_ts: End of the range as a unix timestamp (exclusive).
+        :param executor: (optional) concurrent.futures executor to run the units on.
+        :param runner: (optional) Callable taking a unit, defaults to run_unit.
+        :param on_progress: (optional) Callable receiving the progress dictionary after every unit.
+        :param now: (optional) Unix timestamp deciding which days are over, defaults to the current time.
+        :return: Dictionary with the unit counts, hours and throughput of the run.
+        """
+        now = hour_bucket(time.time() if now is None else now)
+        units = self.plan(cities, start_ts, end_ts)
+        pending = self.pending(units)
+        progress = {"units": len(units), "skipped": len(units) - len(pending), "done": 0, "partial": 0,
+                    "failed": 0, "hours": 0, "changed": 0, "seconds": 0.0, "units_per_second": 0.0,
+                    "hours_per_second": 0.0, "eta_seconds": None}
+        logging.info(f"Backfill: {len(pending)} of {len(units)} units to run.")
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(self.workers, thread_name_prefix="backfill")
+        runner = runner or self.run_unit
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        queue = iter(pending)
+        in_flight = {}
+        started = time.perf_counter()
+        self._stop.clear()
+
+        def submit():
+            # a bounded window keeps stop responsive and the executor queue short
+            while len(in_flight) < 2 * self.workers and not self._stop.is_set():
+                unit = next(queue, None)
+                if unit is None:
+                    return
+                in_flight[executor.submit(runner, unit)] = unit
+
+        try:
+            submit()
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    unit = in_flight.pop(future)
+                    self._checkpoint(collection, unit, future, now, progress)
+                self._update_rates(progress, started, len(pending))
+                if on_progress is not None:
+                    on_progress(dict(progress))
+                submit()
+        finally:
+            if own_executor:
+                executor.shutdown(cancel_futures=True)
+        self._update_rates(progress, started, len(pending))
+        logging.info(f"Backfill finished: {progress}")
+        return progress
+
+    def stop(self):
+        """
+        Stop scheduling new units; the running ones are finished and checkpointed.
+        """
+        self._stop.set()
+
+    def reset(self, cities=None):
+        """
+        Delete checkpoints so the next run fetches the units again.
+
+        :param cities: (optional) Cities (see plan) whose checkpoints are deleted, defaults to all.
+        :return: Number of checkpoints deleted.
+        """
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        if cities is None:
+            return collection.delete_many({}).deleted_count
+        keys = [location_key(city, None, None) if isinstance(city, str)
+                else location_key(city.get("name"), city.get("lat"), city.get("lon")) for city in cities]
+        return collection.delete_many({"location": {"$in": keys}}).deleted_count
+
+    def _checkpoint(self, collection, unit, future, now, progress):
+        """
+        Record the outcome of a finished unit and count it in progress.
+        """
+        location = unit["_id"].rsplit("|", 1)[0]
+        try:
+            result = future.result()
+        except TooManyRequestsError as e:
+            # QuotaExceededError included; the remaining units would fail the same way
+            logging.warning(f"Backfill: out of API budget at {unit['_id']}, stopping. {e}")
+            self._stop.set()
+            self._record_failure(collection, unit, location, e)
+            progress["failed"] += 1
+            return
+        except BrokenExecutor as e:
+            # every unit still in flight fails the same way, and no new one can be submitted
+            logging.error(f"Backfill: executor broken at {unit['_id']}, stopping. {e!r}")
+            self._stop.set()
+            self._record_failure(collection, unit, location, e)
+            progress["failed"] += 1
+            return
+        except Exception as e:
+            logging.error(f"Backfill: unit {unit['_id']} failed, {e!r}")
+            self._record_failure(collection, unit, location, e)
+            progress["failed"] += 1
+            return
+        status = "done" if unit["day"] + DAY <= now else "partial"
+        collection.update_one({"_id": unit["_id"]},
+                              {"$set": {"location": location, "day": unit["day"], "status": status,
+                                        "hours": result["hours"], "finished_at": int(time.time())},
+                               "$unset": {"error": ""}}, upsert=True)
+        progress[status] += 1
+        progress["hours"] += result["hours"]
+        progress["changed"] += result["changed"]
+
+    @staticmethod
+    def _record_failure(collection, unit, location, error):
+        collection.update_one({"_id": unit["_id"]},
+                              {"$set": {"location": location, "day": unit["day"], "status": "failed",
+                                        "error": str(error)},
+                               "$inc": {"failures": 1}}, upsert=True)
+
+    @staticmethod
+    def _update_rates(progress, started, total):
+        elapsed = time.perf_counter() - started
+        finished = progress["done"] + progress["partial"] + progress["failed"]
+        progress["seconds"] = round(elapsed, 3)
+        if elapsed > 0:
+            progress["units_per_second"] = round(finished / elapsed, 3)
+            progress["hours_per_second"] = round(progress["hours"] / elapsed, 1)
+        if finished:
+            progress["eta_seconds"] = round((total - finished) * elapsed / finished, 1)
@@ -0,0 +1,164 @@
+# File: helpers/BufferedMongoWriter.py
+
+import time
+import logging
+import threading
+from pymongo import errors
+
+
+class BufferedMongoWriter:
+    """
+    Buffers documents for one collection and writes them with MongoHandler.insert_documents.
+
+    The buffer is flushed when it holds max_batch_size documents or when its oldest document
+    has waited max_latency seconds, whichever comes first. Data retention runs once per flush
+    instead of once per document. Use it as a context manager (or call close) so the last
+    partial batch is written:
+
+        with BufferedMongoWriter(mongo_handler, "weather_data") as writer:
+            for document in documents:
+                writer.add(document)
+    """
+    def __init__(self, mongo_handler, collection_name, max_batch_size=1000, max_latency=5.0, ordered=False,
+                 apply_retention=True, background=True):
+        """
+        Initialize the writer.
+
+        :param mongo_handler: An instance of MongoHandler.
+        :param collection_name: Name of the collection to write into.
+        :param max_batch_size: Flush as soon as this many documents are buffered.
+        :param max_latency: Flush documents that have been buffered for this many seconds.
+        :param ordered: Passed to insert_many; unordered batches are faster and do not stop at the first error.
+        :param apply_retention: Whether to evaluate data retention after every flush.
+        :param background: Start a daemon thread enforcing max_latency even when no more documents arrive.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.mongo_handler = mongo_handler
+        self.collection_name = collection_name
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.ordered = ordered
+        self.apply_retention = apply_retention
+        self.inserted_count = 0
+        self.flush_count = 0
+
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, document):
+        """
+        Buffer one document, flushing if the batch is full or too old.
+        """
+        self.add_many([document])
+
+    def add_many(self, documents):
+        """
+        Buffer several documents, flushing whenever the batch is full or too old.
+        """
+        if self._closed.is_set():
+            raise RuntimeError("BufferedMongoWriter is closed.")
+        with self._lock:
+            if not self._buffer and documents:
+                self._oldest = time.monotonic()
+            self._buffer.extend(documents)
+            due = len(self._buffer) >= self.max_batch_size or self._is_stale()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Write everything buffered so far, in batches of at most max_batch_size documents.
+
+        If a batch fails, the documents not written (the failed batch, or only its failed documents
+        after a BulkWriteError, and all later batches) are put back at the front of the buffer for
+        the next flush and the error is re-raised.
+
+        :return: Number of documents written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                self._oldest = None
+            if not batch:
+                return 0
+            written = 0
+            for start in range(0, len(batch), self.max_batch_size):
+                chunk = batch[start:start + self.max_batch_size]
+                # retention is evaluated once, after the last chunk of this flush
+                last_chunk = start + self.max_batch_size >= len(batch)
+                try:
+                    written += len(self.mongo_handler.insert_documents(
+                        self.collection_name, chunk, ordered=self.ordered,
+                        apply_retention=self.apply_retention and last_chunk))
+                except Exception as e:
+                    inserted, unwritten = self._unwritten(chunk, e)
+                    written += inserted
+                    self._requeue(unwritten + batch[start + self.max_batch_size:])
+                    self.inserted_count += written
+                    raise e
+            self.inserted_count += written
+            self.flush_count += 1
+            logging.info(f"Flushed {written} documents into {self.collection_name}.")
+            return written
+
+    def _unwritten(self, chunk, error):
+        """
+        The number of inserted documents of a failed chunk and the documents to retry.
+
+        Documents failing with a duplicate key error are dropped, retrying them would fail the same way.
+        """
+        if not isinstance(error, errors.BulkWriteError):
+            return 0, list(chunk)
+        write_errors = error.details.get("writeErrors", [])
+        failed = [chunk[write_error["index"]] for write_error in write_errors if write_error.get("code") != 11000]
+        if self.ordered and write_errors:
+            # an ordered insert stops at its first error, the documents after it were never sent
+            failed += chunk[write_errors[0]["index"] + 1:]
+        return error.details.get("nInserted", 0), failed
+
+    def _requeue(self, documents):
+        if not documents:
+            return
+        with self._lock:
+            self._buffer[:0] = documents
+            self._oldest = time.monotonic()
+        logging.warning(f"Kept {len(documents)} unwritten documents for the next flush into {self.collection_name}.")
+
+    def close(self):
+        """
+        Flush the remaining documents and stop the background thread.
+        """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _is_stale(self):
+        return self._oldest is not None and time.monotonic() - self._oldest >= self.max_latency
+
+    def _flush_periodically(self):
+        interval = max(self.max_latency / 2, 0.05)
+        while not self._closed.wait(interval):
+            with self._lock:
+                due = self._is_stale()
+            if due:
+                try:
+                    self.flush()
+                except Exception:
+                    logging.error("Error flushing buffered documents", exc_info=True)
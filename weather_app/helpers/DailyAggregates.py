@@ -0,0 +1,158 @@
+# File: helpers/DailyAggregates.py
+
+import logging
+from pymongo import ASCENDING, DESCENDING
+
+DAY = 86400
+
+# recomputes the aggregates of the touched (city_name, day) pairs from weather_data
+POSTGRES_REFRESH_DAILY = """
+INSERT INTO weather_daily (city_name, day, temp_min, temp_max, temp_mean, temp_spread, rain_total,
+                           dominant_condition, hours)
+SELECT wd.city_name, wd.dt::date, min(wd.temp), max(wd.temp), avg(wd.temp), max(wd.temp) - min(wd.temp),
+       coalesce(sum(wd.rain_volume), 0), mode() WITHIN GROUP (ORDER BY wc.description), count(*)
+FROM unnest(%s::varchar[], %s::date[]) AS touched(city_name, day)
+JOIN weather_data wd ON wd.city_name = touched.city_name
+                    AND wd.dt >= touched.day AND wd.dt < touched.day + 1
+LEFT JOIN weather_conditions wc ON wc.city_name = wd.city_name AND wc.dt = wd.dt
+GROUP BY wd.city_name, wd.dt::date
+ON CONFLICT (city_name, day) DO UPDATE SET
+    temp_min = EXCLUDED.temp_min, temp_max = EXCLUDED.temp_max, temp_mean = EXCLUDED.temp_mean,
+    temp_spread = EXCLUDED.temp_spread, rain_total = EXCLUDED.rain_total,
+    dominant_condition = EXCLUDED.dominant_condition, hours = EXCLUDED.hours
+"""
+
+
+class DailyAggregates:
+    """
+    Per city and day aggregates (min, max, mean temperature, spread, total rain and dominant
+    condition) kept next to the hourly data, for requirement 3c: the places with the largest
+    temperature difference on a given day.
+
+    The aggregates are maintained incrementally: HourlyWeatherStore.ingest (MongoDB) and
+    PostgresDbHandler.copy_rows (PostgreSQL) recompute only the days that received new hours.
+    Queries read the weather_daily table/collection through a (day, spread descending) index.
+    """
+    def __init__(self, mongo_handler=None, postgres_handler=None, hourly_collection_name="weather_hourly",
+                 collection_name="weather_daily"):
+        """
+        Initialize the aggregates; either backend may be omitted.
+
+        :param mongo_handler: (optional) An instance of MongoHandler holding the HourlyWeatherStore collection.
+        :param postgres_handler: (optional) An instance of PostgresDbHandler.
+        :param hourly_collection_name: Collection of the normalized hourly documents.
+        :param collection_name: Collection holding the daily aggregates.
+        """
+        self.mongo_handler = mongo_handler
+        self.postgres_handler = postgres_handler
+        self.hourly_collection_name = hourly_collection_name
+        self.collection_name = collection_name
+        self._indexes_ready = False
+
+    def ensure_indexes(self):
+        """
+        Create the unique (location, day) index used by refreshes and the (day, spread) index used by queries.
+        """
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        if "city_1_day_1" in collection.index_information():
+            # unique index of collections written before days were keyed by location
+            collection.drop_index("city_1_day_1")
+        collection.create_index([("location", ASCENDING), ("day", ASCENDING)], unique=True)
+        collection.create_index([("day", ASCENDING), ("temp_spread", DESCENDING)])
+        self._indexes_ready = True
+
+    def refresh_mongo(self, location, days):
+        """
+        Recompute the aggregates of some days of one city from the hourly collection.
+
+        :param location: Location key as stored by HourlyWeatherStore (see WeatherCache.location_key).
+        :param days: Iterable of day start timestamps (UTC midnight).
+        :return: Number of refreshed days.
+        """
+        days = sorted({int(day) // DAY * DAY for day in days})
+        if not days:
+            return 0
+        if not self._indexes_ready:
+            self.ensure_indexes()
+        hourly = self.mongo_handler.get_collection(self.hourly_collection_name)
+        pipeline = [
+            # the (location, dt) index narrows the scan to the touched span, the day filter drops the gaps
+            {"$match": {"location": location, "dt": {"$gte": days[0], "$lt": days[-1] + DAY}}},
+            {"$addFields": {"day": {"$subtract": ["$dt", {"$mod": ["$dt", DAY]}]}}},
+            {"$match": {"day": {"$in": days}}},
+            {"$group": {"_id": {"day": "$day", "condition": "$weather_description"},
+                        "hours": {"$sum": 1}, "city": {"$last": "$city"},
+                        "temp_min": {"$min": "$temp"}, "temp_max": {"$max": "$temp"},
+                        "temp_sum": {"$sum": "$temp"},
+                        "temp_count": {"$sum": {"$cond": [{"$gt": ["$temp", None]}, 1, 0]}},
+                        "rain_total": {"$sum": "$rain"}}},
+            # the most frequent condition of a day comes first, ties broken by name
+            {"$sort": {"hours": -1, "_id.condition": 1}},
+            {"$group": {"_id": "$_id.day", "dominant_condition": {"$first": "$_id.condition"},
+                        "hours": {"$sum": "$hours"}, "city": {"$last": "$city"},
+                        "temp_min": {"$min": "$temp_min"}, "temp_max": {"$max": "$temp_max"},
+                        "temp_sum": {"$sum": "$temp_sum"}, "temp_count": {"$sum": "$temp_count"},
+                        "rain_total": {"$sum": "$rain_total"}}},
+        ]
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        refreshed = 0
+        for group in hourly.aggregate(pipeline):
+            temp_min, temp_max = group["temp_min"], group["temp_max"]
+            document = {
+                "location": location,
+                "city": group["city"],
+                "day": int(group["_id"]),
+                "temp_min": temp_min,
+                "temp_max": temp_max,
+                "temp_mean": group["temp_sum"] / group["temp_count"] if group["temp_count"] else None,
+                "temp_spread": temp_max - temp_min if temp_min is not None and temp_max is not None else None,
+                "rain_total": group["rain_total"],
+                "dominant_condition": group["dominant_condition"],
+                "hours": group["hours"],
+            }
+            collection.replace_one({"location": location, "day": document["day"]}, document, upsert=True)
+            refreshed += 1
+        logging.info(f"Refreshed {refreshed} daily aggregates for {location}.")
+        return refreshed
+
+    @staticmethod
+    def refresh_postgres(cursor, city_days):
+        """
+        Recompute the weather_daily rows of the given (city_name, day) pairs.
+
+        Runs on the caller's cursor, so the refresh is part of the same transaction as the load.
+
+        :param cursor: An open psycopg2 cursor.
+        :param city_days: Iterable of (city_name, date or "YYYY-MM-DD") pairs.
+        :return: Number of refreshed days.
+        """
+        city_days = sorted(set(city_days))
+        if not city_days:
+            return 0
+        cursor.execute(POSTGRES_REFRESH_DAILY, ([city for city, day in city_days],
+                                                [str(day) for city, day in city_days]))
+        return cursor.rowcount
+
+    def largest_spread_mongo(self, day, limit=10):
+        """
+        Places with the largest temperature difference on a day, from MongoDB.
+
+        :param day: Any unix timestamp within the day (UTC).
+        :param limit: Number of places to return.
+        :return: List of daily aggregate documents, largest spread first.
+        """
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        cursor = collection.find({"day": int(day) // DAY * DAY, "temp_spread": {"$ne": None}}, {"_id": 0})
+        return list(cursor.sort("temp_spread", DESCENDING).limit(limit))
+
+    def largest_spread_postgres(self, day, limit=10):
+        """
+        Places with the largest temperature difference on a day, from PostgreSQL.
+
+        :param day: Day as a date or "YYYY-MM-DD" string.
+        :param limit: Number of places to return.
+        :return: List of (city_name, temp_min, temp_max, temp_spread, dominant_condition) rows.
+        """
+        return self.postgres_handler.execute_query(
+            "SELECT city_name, temp_min, temp_max, temp_spread, dominant_condition FROM weather_daily "
+            "WHERE day = %s AND temp_spread IS NOT NULL ORDER BY temp_spread DESC LIMIT %s", (str(day), limit))
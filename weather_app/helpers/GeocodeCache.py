@@ -0,0 +1,232 @@
+# File: helpers/GeocodeCache.py
+
+import re
+import math
+import logging
+from pymongo import ASCENDING
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# precision of the stored geohashes, a cell of about 5 x 5 m
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def _geohash_bits(precision):
+    """
+    Number of (latitude, longitude) bits of a geohash; longitude gets the extra bit.
+    """
+    total = precision * 5
+    return total // 2, total - total // 2
+
+
+def _cell_index(latitude, longitude, precision):
+    lat_bits, lon_bits = _geohash_bits(precision)
+    lat_index = min(int((latitude + 90.0) / 180.0 * (1 << lat_bits)), (1 << lat_bits) - 1)
+    lon_index = int((longitude + 180.0) / 360.0 * (1 << lon_bits)) % (1 << lon_bits)
+    return lat_index, lon_index
+
+
+def _encode_cell(lat_index, lon_index, precision):
+    """
+    Interleave the cell indexes (longitude first) into a base32 geohash.
+    """
+    lat_bits, lon_bits = _geohash_bits(precision)
+    value = 0
+    for i in range(precision * 5):
+        if i % 2 == 0:
+            lon_bits -= 1
+            value = value << 1 | (lon_index >> lon_bits) & 1
+        else:
+            lat_bits -= 1
+            value = value << 1 | (lat_index >> lat_bits) & 1
+    return "".join(GEOHASH_ALPHABET[value >> shift & 31] for shift in range(precision * 5 - 5, -1, -5))
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Geohash of a coordinate; nearby points share a common prefix.
+    """
+    return _encode_cell(*_cell_index(float(latitude), float(longitude), precision), precision)
+
+
+def geohash_cells(latitude, longitude, radius_km):
+    """
+    Geohash prefixes covering a circle: the cell containing the point and its 8 neighbours, at the
+    finest precision whose cells are still at least radius_km wide and high.
+
+    :return: List of geohash prefixes; [""] (everything) for radii larger than the coarsest cells.
+    """
+    latitude, longitude = float(latitude), float(longitude)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_bits, lon_bits = _geohash_bits(precision)
+        height_km = 180.0 / (1 << lat_bits) * KM_PER_DEGREE
+        width_km = 360.0 / (1 << lon_bits) * KM_PER_DEGREE * math.cos(math.radians(latitude))
+        if height_km >= radius_km and width_km >= radius_km:
+            lat_index, lon_index = _cell_index(latitude, longitude, precision)
+            cells = set()
+            for d_lat in (-1, 0, 1):
+                if 0 <= lat_index + d_lat < 1 << lat_bits:
+                    for d_lon in (-1, 0, 1):
+                        cells.add(_encode_cell(lat_index + d_lat, (lon_index + d_lon) % (1 << lon_bits), precision))
+            return sorted(cells)
+    return [""]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great circle distance between two coordinates in kilometres.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _query_key(query):
+    return ",".join(part.strip() for part in query.lower().split(","))
+
+
+def _qualified_filter(key):
+    """
+    Filter on the known places named by a "name,country" or "name,state,country" query key,
+    None for a plain name, which may be any of several places.
+    """
+    parts = key.split(",")
+    if len(parts) < 2 or not all(parts):
+        return None
+    query = {"name_key": parts[0], "country": {"$regex": f"^{re.escape(parts[-1])}$", "$options": "i"}}
+    if len(parts) > 2:
+        query["state"] = {"$regex": f"^{re.escape(parts[1])}$", "$options": "i"}
+    return query
+
+
+class GeocodeCache:
+    """
+    Persistent read-through cache in front of GeolocationApiHandler.
+
+    Every place returned by the geocoding API is stored once in MongoDB with its geohash. A reverse
+    lookup searches the 3 x 3 geohash cells around the coordinate (an indexed prefix scan) and
+    answers with the nearest known place within radius_km; a forward lookup matches a query asked
+    before, or the name, state and country of a query naming them. The API is called only on a miss,
+    so for a fixed set of cities geocoding traffic drops to the first lookup of every city.
+
+    snap maps coordinates onto a known city, so WeatherCache keys coordinates a few metres apart
+    the same way, by the coordinates of that city.
+    """
+    def __init__(self, geolocation_handler, mongo_handler, collection_name="geocode_cache", radius_km=5.0):
+        """
+        Initialize the cache.
+
+        :param geolocation_handler: An instance of GeolocationApiHandler used on cache misses.
+        :param mongo_handler: An instance of MongoHandler used as the cache storage.
+        :param collection_name: Name of the collection holding the known places.
+        :param radius_km: Distance within which a known place answers a coordinate lookup.
+        """
+        self.geolocation_handler = geolocation_handler
+        self.mongo_handler = mongo_handler
+        self.collection_name = collection_name
+        self.radius_km = radius_km
+        self.hits = 0
+        self.misses = 0
+        self._indexes_ready = False
+
+    def ensure_indexes(self):
+        """
+        Create the geohash index used by coordinate lookups and the name/alias indexes used by name lookups.
+        """
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        collection.create_index([("geohash", ASCENDING)])
+        collection.create_index([("name_key", ASCENDING)])
+        collection.create_index([("aliases", ASCENDING)])
+        self._indexes_ready = True
+
+    def reverse_geocode(self, lat, lon, limit=1):
+        """
+        Cached counterpart of GeolocationApiHandler.reverse_geocode; as for direct_geocode, fewer
+        than limit known places within radius_km is a miss.
+
+        :return: Up to limit places, nearest first, shaped like the API response.
+        """
+        known = self.nearest(lat, lon, limit)
+        if len(known) >= limit:
+            self.hits += 1
+            return known
+        self.misses += 1
+        places = self.geolocation_handler.reverse_geocode(lat, lon, limit=limit)
+        self.store(places)
+        return places
+
+    def direct_geocode(self, query, limit=1):
+        """
+        Cached counterpart of GeolocationApiHandler.direct_geocode.
+
+        A query is answered locally if it was asked before, or if it names the country (and state) of
+        known places; a plain name may be any of several places and goes to the API the first time.
+        Fewer than limit known places is a miss.
+
+        :return: Up to limit places shaped like the API response.
+        """
+        key = _query_key(query)
+        collection = self._collection()
+        known = list(collection.find({"aliases": key}, self._projection()).limit(limit))
+        qualified = _qualified_filter(key)
+        if len(known) < limit and qualified is not None:
+            known = list(collection.find(qualified, self._projection()).limit(limit))
+        if len(known) >= limit:
+            self.hits += 1
+            return known
+        self.misses += 1
+        places = self.geolocation_handler.direct_geocode(query, limit=limit)
+        self.store(places, alias=key)
+        return places
+
+    def nearest(self, lat, lon, limit=1, radius_km=None):
+        """
+        Known places within radius_km of a coordinate, nearest first, without calling the API.
+        """
+        radius_km = self.radius_km if radius_km is None else radius_km
+        cells = geohash_cells(lat, lon, radius_km)
+        query = {"$or": [{"geohash": {"$regex": f"^{cell}"}} for cell in cells]} if cells != [""] else {}
+        candidates = []
+        for place in self._collection().find(query, self._projection()):
+            distance = haversine_km(lat, lon, place["lat"], place["lon"])
+            if distance <= radius_km:
+                candidates.append((distance, place))
+        candidates.sort(key=lambda candidate: candidate[0])
+        return [place for distance, place in candidates[:limit]]
+
+    def snap(self, lat, lon):
+        """
+        The known place nearest to a coordinate within radius_km, or None.
+
+        :return: Dictionary with name, lat, lon (and country/state), as stored from the API.
+        """
+        known = self.nearest(lat, lon, 1)
+        return known[0] if known else None
+
+    def store(self, places, alias=None):
+        """
+        Store places returned by the geocoding API, merging repeated places on (name, country, state).
+
+        :param places: List of places as returned by the API.
+        :param alias: (optional) Normalized forward query that resolved to these places.
+        """
+        collection = self._collection()
+        for place in places:
+            place = {key: value for key, value in place.items() if key != "_id"}
+            update = {"$set": dict(place, geohash=geohash_encode(place["lat"], place["lon"]),
+                                   name_key=place["name"].lower())}
+            if alias:
+                update["$addToSet"] = {"aliases": alias}
+            collection.update_one({"name": place["name"], "country": place.get("country"),
+                                   "state": place.get("state")}, update, upsert=True)
+        logging.info(f"Geocode cache: stored {len(places)} places.")
+
+    def _collection(self):
+        if not self._indexes_ready:
+            self.ensure_indexes()
+        return self.mongo_handler.get_collection(self.collection_name)
+
+    @staticmethod
+    def _projection():
+        return {"_id": 0, "name_key": 0, "aliases": 0, "geohash": 0}
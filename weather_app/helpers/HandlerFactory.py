@@ -2,10 +2,28 @@
 
 import os
 import logging
+import tempfile
 from dotenv import load_dotenv
 from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.handlers.MongoRetention import make_retention
+from weather_app.handlers.PostgresDbHandler import PostgresDbHandler
 from weather_app.handlers.WeatherApiHandler import WeatherApiHandler
 from weather_app.handlers.GeolocationApiHandler import GeolocationApiHandler
+from weather_app.handlers.HttpTransport import HttpTransport
+from weather_app.handlers.ReplayTransport import RecordingTransport, ReplayTransport
+from weather_app.handlers.AsyncWeatherApiHandler import AsyncWeatherApiHandler
+from weather_app.handlers.AsyncGeolocationApiHandler import AsyncGeolocationApiHandler
+from weather_app.helpers.WeatherCache import WeatherCache
+from weather_app.helpers.HourlyWeatherStore import HourlyWeatherStore
+from weather_app.helpers.GeocodeCache import GeocodeCache
+from weather_app.helpers.PrefetchScheduler import PrefetchScheduler
+from weather_app.helpers.Backfill import Backfill
+from weather_app.helpers.SingleFlight import SingleFlight
+from weather_app.helpers.ResponseCache import ResponseCache
+from weather_app.helpers.Metrics import Metrics
+from weather_app.helpers.RangePlanner import RangePlanner, DEFAULT_MAX_HOURS_PER_CALL
+from weather_app.helpers.RateLimiter import RateLimiter, MemoryRateLimitBackend, FileRateLimitBackend, \
+    MongoRateLimitBackend
 
 class HandlerFactory:
     def __init__(self, env_paths):
@@ -15,6 +33,10 @@ class HandlerFactory:
         :param env_paths: List of file paths to .env files.
         """
         self.env_paths = env_paths
+        self._transport = None
+        self._rate_limiter = None
+        self._single_flight = None
+        self._response_cache = None
         self._load_env_files()
 
     def _load_env_files(self):
@@ -28,6 +50,147 @@ class HandlerFactory:
             else:
                 logging.warning(f"Environment file not found: {env_file}")
 
+    def get_transport(self):
+        """
+        Return the HttpTransport shared by all API handlers created by this factory.
+
+        Expected environment variables:
+          - API_POOL_SIZE: (optional) Kept-alive connections per host (default: 10).
+          - API_TIMEOUT: (optional) Request timeout in seconds (default: 30).
+          - API_MAX_RETRIES: (optional) Retries on 429/5xx and connection errors (default: 3).
+          - API_BACKOFF_FACTOR: (optional) Base of the jittered exponential backoff in seconds (default: 0.5).
+          - API_TRANSPORT_MODE: (optional) "live", "record" (live calls saved to API_RECORDINGS_PATH)
+            or "replay" (recorded responses only, no network) (default: "live").
+          - API_RECORDINGS_PATH: Directory of the recordings, required by "record" and "replay".
+          - API_REPLAY_LATENCY: (optional) Seconds every replayed call waits (default: 0).
+          - API_REPLAY_LATENCY_JITTER: (optional) Extra random wait of up to this many seconds (default: 0).
+          - API_REPLAY_ERROR_RATE: (optional) Probability of an injected 500/503 response (default: 0).
+          - API_REPLAY_CONNECTION_ERROR_RATE: (optional) Probability of an injected connection error (default: 0).
+          - API_REPLAY_SEED: (optional) Seed of the injected latency and errors (default: random).
+
+        :return: An instance of HttpTransport (RecordingTransport or ReplayTransport when configured).
+        """
+        if self._transport is None:
+            pool_size = int(os.getenv("API_POOL_SIZE", "10"))
+            options = {"pool_maxsize": pool_size,
+                       "timeout": float(os.getenv("API_TIMEOUT", "30")),
+                       "max_retries": int(os.getenv("API_MAX_RETRIES", "3")),
+                       "backoff_factor": float(os.getenv("API_BACKOFF_FACTOR", "0.5"))}
+            mode = os.getenv("API_TRANSPORT_MODE", "live")
+            recordings_path = os.getenv("API_RECORDINGS_PATH")
+            if mode in ("record", "replay") and not recordings_path:
+                raise Exception(f"API_RECORDINGS_PATH not set in environment variables (API_TRANSPORT_MODE={mode}).")
+            if mode == "live":
+                self._transport = HttpTransport(**options)
+            elif mode == "record":
+                self._transport = RecordingTransport(recordings_path, **options)
+            elif mode == "replay":
+                seed = os.getenv("API_REPLAY_SEED")
+                self._transport = ReplayTransport(
+                    recordings_path,
+                    latency=float(os.getenv("API_REPLAY_LATENCY", "0")),
+                    latency_jitter=float(os.getenv("API_REPLAY_LATENCY_JITTER", "0")),
+                    error_rate=float(os.getenv("API_REPLAY_ERROR_RATE", "0")),
+                    connection_error_rate=float(os.getenv("API_REPLAY_CONNECTION_ERROR_RATE", "0")),
+                    seed=int(seed) if seed else None, **options)
+            else:
+                raise Exception(f"Unknown API_TRANSPORT_MODE: {mode}")
+            logging.info(f"Using the {mode} API transport.")
+        return self._transport
+
+    def get_single_flight(self):
+        """
+        Return the SingleFlight shared by all API handlers created by this factory, or None if disabled.
+
+        Expected environment variables:
+          - API_COALESCE_REQUESTS: (optional) "false" lets concurrent identical requests each call the API
+            (default: "true").
+
+        :return: An instance of SingleFlight or None.
+        """
+        if os.getenv("API_COALESCE_REQUESTS", "true").lower() in ("false", "0", "no"):
+            return None
+        if self._single_flight is None:
+            self._single_flight = SingleFlight()
+        return self._single_flight
+
+    def get_response_cache(self):
+        """
+        Return the ResponseCache shared by all API handlers created by this factory, or None if disabled.
+
+        Expected environment variables:
+          - API_RESPONSE_CACHE: (optional) "false" disables the response cache (default: "true").
+          - API_RESPONSE_CACHE_PATH: (optional) SQLite file of the persistent tier (default: memory only).
+          - API_RESPONSE_CACHE_MAX_ENTRIES: (optional) Responses kept in memory (default: 1024).
+          - API_RESPONSE_CACHE_MAX_MB: (optional) Megabytes of responses kept in memory (default: 64).
+          - API_RESPONSE_CACHE_RECENT_TTL: (optional) Seconds responses covering the last day stay
+            valid (default: 600).
+
+        :return: An instance of ResponseCache or None.
+        """
+        if os.getenv("API_RESPONSE_CACHE", "true").lower() in ("false", "0", "no"):
+            return None
+        if self._response_cache is None:
+            self._response_cache = ResponseCache(
+                max_entries=int(os.getenv("API_RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+                max_bytes=int(float(os.getenv("API_RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024),
+                path=os.getenv("API_RESPONSE_CACHE_PATH") or None,
+                recent_ttl=float(os.getenv("API_RESPONSE_CACHE_RECENT_TTL", "600")))
+        return self._response_cache
+
+    def get_metrics(self):
+        """
+        Return the process wide Metrics used by all handlers created by this factory, serving them
+        over HTTP when a port is configured.
+
+        Expected environment variables:
+          - METRICS_PORT: (optional) Port of the Prometheus endpoint /metrics (default: not served).
+          - METRICS_ADDRESS: (optional) Interface the endpoint listens on (default: "127.0.0.1").
+
+        :return: An instance of Metrics.
+        """
+        metrics = Metrics.shared()
+        port = os.getenv("METRICS_PORT")
+        if port:
+            metrics.serve(int(port), os.getenv("METRICS_ADDRESS", "127.0.0.1"))
+        return metrics
+
+    def get_rate_limiter(self):
+        """
+        Return the RateLimiter shared by all API handlers created by this factory, or None if disabled.
+
+        Expected environment variables:
+          - API_CALLS_PER_MINUTE: (optional) Sustained calls per minute, 0 disables the limiter (default: 60).
+          - API_CALLS_PER_MONTH: (optional) Monthly call quota (default: unlimited).
+          - API_RATE_LIMIT_BURST: (optional) Calls allowed back to back (default: API_CALLS_PER_MINUTE).
+          - API_RATE_LIMIT_BACKEND: (optional) "memory", "file" or "mongo" (default: "memory").
+          - API_RATE_LIMIT_STATE_PATH: (optional) State file of the "file" backend
+            (default: "openweather_rate_limit.json" in the temp directory).
+
+        :return: An instance of RateLimiter or None.
+        """
+        if self._rate_limiter is None:
+            calls_per_minute = int(os.getenv("API_CALLS_PER_MINUTE", "60"))
+            if calls_per_minute <= 0:
+                return None
+            calls_per_month = os.getenv("API_CALLS_PER_MONTH")
+            burst = os.getenv("API_RATE_LIMIT_BURST")
+            backend_name = os.getenv("API_RATE_LIMIT_BACKEND", "memory")
+            if backend_name == "memory":
+                backend = MemoryRateLimitBackend()
+            elif backend_name == "file":
+                default_path = os.path.join(tempfile.gettempdir(), "openweather_rate_limit.json")
+                backend = FileRateLimitBackend(os.getenv("API_RATE_LIMIT_STATE_PATH", default_path))
+            elif backend_name == "mongo":
+                backend = MongoRateLimitBackend(self.get_mongo_handler())
+            else:
+                raise Exception(f"Unknown API_RATE_LIMIT_BACKEND: {backend_name}")
+            self._rate_limiter = RateLimiter(calls_per_minute,
+                                             calls_per_month=int(calls_per_month) if calls_per_month else None,
+                                             burst=int(burst) if burst else None,
+                                             backend=backend)
+        return self._rate_limiter
+
     def get_mongo_handler(self):
         """
         Initialize and return a MongoHandler instance using environment variables.
@@ -37,6 +200,24 @@ class HandlerFactory:
           - MONGO_DB: (optional) Database name (default: "db_xd").
           - MONGO_RETENTION_LIMIT: (optional) Retention limit (default: 400000).
           - MONGO_DELETE_COUNT: (optional) Number of documents to delete when retention is triggered (default: 1000).
+          - MONGO_DB_RETENTION_INTERVAL: (optional) Minimum seconds between insert triggered retention runs (default: 0).
+          - MONGO_DB_RETENTION_STRATEGY: (optional) "count", "ttl" or "capped" (default: "count").
+          - MONGO_DB_RETENTION_TTL_SECONDS: (required for "ttl") Lifetime of a document in seconds.
+          - MONGO_DB_CAPPED_SIZE_BYTES: (required for "capped") Maximum size of a capped collection.
+          - MONGO_DB_RETAINED_COLLECTIONS: (optional) Comma separated collections the retention applies to
+            (default: "weather_data").
+          - MONGO_SHARED_CLIENT: (optional) "false" gives the handler a private MongoClient (default: "true").
+          - MONGO_MAX_POOL_SIZE: (optional) Maximum connections per server (default: pymongo's 100).
+          - MONGO_MIN_POOL_SIZE: (optional) Connections kept open per server (default: 0).
+          - MONGO_MAX_IDLE_TIME_MS: (optional) Idle time after which a pooled connection is closed.
+          - MONGO_CONNECT_TIMEOUT_MS: (optional) Timeout of opening a connection.
+          - MONGO_SOCKET_TIMEOUT_MS: (optional) Timeout of a single operation on a socket.
+          - MONGO_SERVER_SELECTION_TIMEOUT_MS: (optional) How long to wait for a suitable server (default: 30000).
+          - MONGO_READ_PREFERENCE: (optional) e.g. "primary" or "secondaryPreferred" for analytics reads.
+          - MONGO_COMPRESSORS: (optional) Wire compressors by preference, e.g. "zstd,snappy,zlib"
+                               (zstd and snappy need the zstandard and python-snappy packages).
+
+        Handlers with the same MONGO_URL and client options share one MongoClient (see MongoClientRegistry).
 
         :return: An instance of MongoHandler.
         """
@@ -46,39 +227,276 @@ class HandlerFactory:
         db_name = os.getenv("MONGO_DB", "db_xd")
         retention_limit = int(os.getenv("MONGO_DB_MAX_DOC_COUNT", "4000"))
         delete_count = int(os.getenv("MONGO_DB_RETENTION_DELETION_COUNT", "10"))
-        return MongoHandler(mongo_url, db_name, retention_limit=retention_limit, delete_count=delete_count)
+        retention_interval = float(os.getenv("MONGO_DB_RETENTION_INTERVAL", "0"))
+        ttl_seconds = os.getenv("MONGO_DB_RETENTION_TTL_SECONDS")
+        capped_size_bytes = os.getenv("MONGO_DB_CAPPED_SIZE_BYTES")
+        retention = make_retention(os.getenv("MONGO_DB_RETENTION_STRATEGY", "count"),
+                                   ttl_seconds=int(ttl_seconds) if ttl_seconds else None,
+                                   capped_size_bytes=int(capped_size_bytes) if capped_size_bytes else None)
+        retained_collections = os.getenv("MONGO_DB_RETAINED_COLLECTIONS", "weather_data")
+        return MongoHandler(mongo_url, db_name, retention_limit=retention_limit, delete_count=delete_count,
+                            retention_interval=retention_interval, retention=retention, metrics=self.get_metrics(),
+                            client_options=self.get_mongo_client_options(),
+                            shared_client=os.getenv("MONGO_SHARED_CLIENT", "true").lower() != "false",
+                            retained_collections=[name.strip() for name in retained_collections.split(",")
+                                                  if name.strip()])
+
+    @staticmethod
+    def get_mongo_client_options():
+        """
+        MongoClient options from the MONGO_* pool, timeout, read preference and compression variables
+        (see get_mongo_handler); unset variables are left to the pymongo defaults.
+        """
+        options = {}
+        for variable, option in (("MONGO_MAX_POOL_SIZE", "maxPoolSize"), ("MONGO_MIN_POOL_SIZE", "minPoolSize"),
+                                 ("MONGO_MAX_IDLE_TIME_MS", "maxIdleTimeMS"),
+                                 ("MONGO_CONNECT_TIMEOUT_MS", "connectTimeoutMS"),
+                                 ("MONGO_SOCKET_TIMEOUT_MS", "socketTimeoutMS"),
+                                 ("MONGO_SERVER_SELECTION_TIMEOUT_MS", "serverSelectionTimeoutMS")):
+            value = os.getenv(variable)
+            if value:
+                options[option] = int(value)
+        for variable, option in (("MONGO_READ_PREFERENCE", "readPreference"), ("MONGO_COMPRESSORS", "compressors")):
+            value = os.getenv(variable)
+            if value:
+                options[option] = value
+        return options
 
-    def get_weather_handler(self):
+    def get_postgres_handler(self):
+        """
+        Initialize and return a PostgresDbHandler instance using environment variables.
+
+        Expected environment variables:
+          - POSTGRES_URL: PostgreSQL connection string.
+          - POSTGRES_POOL_MIN: (optional) Connections kept open in the pool (default: 1).
+          - POSTGRES_POOL_MAX: (optional) Maximum number of pooled connections (default: 10).
+
+        :return: An instance of PostgresDbHandler.
+        """
+        postgres_url = os.getenv("POSTGRES_URL")
+        if not postgres_url:
+            raise Exception("POSTGRES_URL not set in environment variables.")
+        return PostgresDbHandler(postgres_url,
+                                 min_connections=int(os.getenv("POSTGRES_POOL_MIN", "1")),
+                                 max_connections=int(os.getenv("POSTGRES_POOL_MAX", "10")))
+
+    def get_weather_handler(self, verify=False):
         """
         Initialize and return a WeatherApiHandler instance using environment variables.
 
+        The handler is created without any network traffic; the first real call is the first request.
+
         Expected environment variables:
           - OPEN_WEATHER_API: Root URL for the weather API.
           - OPEN_WEATHER_API_KEY: The API key.
+          - OPEN_WEATHER_MAX_HOURS_PER_CALL: (optional) Longest span of a single history call in hours (default: 168).
+          - API_HEALTH_CHECK_TTL: (optional) Seconds a successful health check stays cached (default: 300).
 
+        :param verify: False (default) to skip verification, True to run a health check before
+                       returning, or "background" to run it in a daemon thread.
         :return: An instance of WeatherApiHandler.
         """
         api_root = os.getenv("OPEN_WEATHER_API")
         api_key = os.getenv("OPEN_WEATHER_API_KEY")
         if not api_root or not api_key:
             raise Exception("OPEN_WEATHER_API or OPEN_WEATHER_API_KEY not set in environment variables.")
-        return WeatherApiHandler(api_root, api_key)
+        max_hours_per_call = int(os.getenv("OPEN_WEATHER_MAX_HOURS_PER_CALL", str(DEFAULT_MAX_HOURS_PER_CALL)))
+        handler = WeatherApiHandler(api_root, api_key, range_planner=RangePlanner(max_hours_per_call),
+                                    transport=self.get_transport(), rate_limiter=self.get_rate_limiter(),
+                                    health_check_ttl=float(os.getenv("API_HEALTH_CHECK_TTL", "300")),
+                                    single_flight=self.get_single_flight(),
+                                    response_cache=self.get_response_cache(), metrics=self.get_metrics())
+        return self._verify(handler, verify)
+
+
+    def get_async_weather_handler(self):
+        """
+        Initialize and return an AsyncWeatherApiHandler instance using environment variables.
+
+        Expected environment variables:
+          - the same ones as get_weather_handler and get_transport.
+          - API_MAX_CONCURRENCY: (optional) Maximum number of requests in flight (default: 10).
+
+        :return: An instance of AsyncWeatherApiHandler.
+        """
+        api_root = os.getenv("OPEN_WEATHER_API")
+        api_key = os.getenv("OPEN_WEATHER_API_KEY")
+        if not api_root or not api_key:
+            raise Exception("OPEN_WEATHER_API or OPEN_WEATHER_API_KEY not set in environment variables.")
+        max_hours_per_call = int(os.getenv("OPEN_WEATHER_MAX_HOURS_PER_CALL", str(DEFAULT_MAX_HOURS_PER_CALL)))
+        return AsyncWeatherApiHandler(api_root, api_key, range_planner=RangePlanner(max_hours_per_call),
+                                      **self._async_options())
+
+    def get_weather_cache(self, weather_handler=None, mongo_handler=None, geocode_cache=None):
+        """
+        Initialize and return a WeatherCache, a read-through cache in front of the weather API.
+
+        Expected environment variables:
+          - everything needed by get_weather_handler and get_mongo_handler.
+          - MONGO_WEATHER_CACHE_COLLECTION: (optional) Collection holding cached hours (default: "weather_cache").
+          - WEATHER_CACHE_MISSING_TTL: (optional) Seconds before a recent hour the API did not return is
+            asked for again (default: 600).
+
+        :param weather_handler: (optional) An existing WeatherApiHandler to reuse.
+        :param mongo_handler: (optional) An existing MongoHandler to reuse.
+        :param geocode_cache: (optional) GeocodeCache snapping coordinate requests onto known cities.
+        :return: An instance of WeatherCache.
+        """
+        if weather_handler is None:
+            weather_handler = self.get_weather_handler()
+        if mongo_handler is None:
+            mongo_handler = self.get_mongo_handler()
+        collection_name = os.getenv("MONGO_WEATHER_CACHE_COLLECTION", "weather_cache")
+        return WeatherCache(weather_handler, mongo_handler, collection_name=collection_name,
+                            geocode_cache=geocode_cache,
+                            missing_ttl=int(os.getenv("WEATHER_CACHE_MISSING_TTL", "600")))
+
+    def get_geocode_cache(self, geolocation_handler=None, mongo_handler=None):
+        """
+        Initialize and return a GeocodeCache, a read-through cache in front of the geocoding API.
+
+        Expected environment variables:
+          - everything needed by get_geolocation_handler and get_mongo_handler.
+          - MONGO_GEOCODE_COLLECTION: (optional) Collection holding the known places (default: "geocode_cache").
+          - GEOCODE_CACHE_RADIUS_KM: (optional) Distance within which a known place answers a coordinate
+            lookup (default: 5).
+
+        :param geolocation_handler: (optional) An existing GeolocationApiHandler to reuse.
+        :param mongo_handler: (optional) An existing MongoHandler to reuse.
+        :return: An instance of GeocodeCache.
+        """
+        if geolocation_handler is None:
+            geolocation_handler = self.get_geolocation_handler()
+        if mongo_handler is None:
+            mongo_handler = self.get_mongo_handler()
+        return GeocodeCache(geolocation_handler, mongo_handler,
+                            collection_name=os.getenv("MONGO_GEOCODE_COLLECTION", "geocode_cache"),
+                            radius_km=float(os.getenv("GEOCODE_CACHE_RADIUS_KM", "5")))
+
+    def get_prefetch_scheduler(self, weather_cache=None):
+        """
+        Initialize and return a PrefetchScheduler keeping the weather cache warm for tracked locations.
+
+        Expected environment variables:
+          - everything needed by get_weather_cache.
+          - MONGO_PREFETCH_COLLECTION: (optional) Collection holding the tracked locations (default: "prefetch_locations").
+          - PREFETCH_QUOTA_RESERVE: (optional) Monthly API calls the scheduler leaves for interactive
+            requests (default: 100).
+
+        :param weather_cache: (optional) An existing WeatherCache to reuse.
+        :return: An instance of PrefetchScheduler.
+        """
+        if weather_cache is None:
+            weather_cache = self.get_weather_cache()
+        return PrefetchScheduler(weather_cache,
+                                 collection_name=os.getenv("MONGO_PREFETCH_COLLECTION", "prefetch_locations"),
+                                 quota_reserve=int(os.getenv("PREFETCH_QUOTA_RESERVE", "100")))
+
+    def get_backfill(self, weather_handler=None, hourly_store=None):
+        """
+        Initialize and return a Backfill loading city histories into the hourly weather store.
+
+        Expected environment variables:
+          - everything needed by get_weather_handler and get_hourly_weather_store.
+          - MONGO_BACKFILL_COLLECTION: (optional) Collection holding the checkpoints (default: "backfill_checkpoints").
+          - BACKFILL_WORKERS: (optional) Number of units processed in parallel (default: 4).
+
+        :param weather_handler: (optional) An existing WeatherApiHandler to reuse.
+        :param hourly_store: (optional) An existing HourlyWeatherStore to reuse.
+        :return: An instance of Backfill.
+        """
+        if weather_handler is None:
+            weather_handler = self.get_weather_handler()
+        if hourly_store is None:
+            hourly_store = self.get_hourly_weather_store()
+        return Backfill(weather_handler, hourly_store,
+                        collection_name=os.getenv("MONGO_BACKFILL_COLLECTION", "backfill_checkpoints"),
+                        workers=int(os.getenv("BACKFILL_WORKERS", "4")))
+
+    def get_hourly_weather_store(self, mongo_handler=None):
+        """
+        Initialize and return a HourlyWeatherStore keeping one document per city and hour.
+
+        Expected environment variables:
+          - everything needed by get_mongo_handler.
+          - MONGO_HOURLY_COLLECTION: (optional) Collection holding the hourly documents (default: "weather_hourly").
+          - MONGO_DAILY_COLLECTION: (optional) Collection holding the daily aggregates (default: "weather_daily").
 
+        The hourly collection is trimmed by the MongoHandler's retention only if it is listed in
+        MONGO_DB_RETAINED_COLLECTIONS.
 
-    def get_geolocation_handler(self):
+        :param mongo_handler: (optional) An existing MongoHandler to reuse.
+        :return: An instance of HourlyWeatherStore.
+        """
+        if mongo_handler is None:
+            mongo_handler = self.get_mongo_handler()
+        collection_name = os.getenv("MONGO_HOURLY_COLLECTION", "weather_hourly")
+        daily_collection_name = os.getenv("MONGO_DAILY_COLLECTION", "weather_daily")
+        return HourlyWeatherStore(mongo_handler, collection_name=collection_name,
+                                  daily_collection_name=daily_collection_name,
+                                  apply_retention=mongo_handler.retains(collection_name))
+
+    def get_geolocation_handler(self, verify=False):
         """
         Initialize and return a GeolocationApiHandler instance using environment variables.
 
+        The handler is created without any network traffic; the first real call is the first request.
+
         Expected environment variables:
           - GEOCODING_API: Root URL for the geocoding API.
           - OPEN_WEATHER_API_KEY: The API key (used for geocoding as well).
+          - API_HEALTH_CHECK_TTL: (optional) Seconds a successful health check stays cached (default: 300).
 
+        :param verify: Same as in get_weather_handler.
         :return: An instance of GeolocationApiHandler.
         """
         api_root = os.getenv("GEOCODING_API")
         api_key = os.getenv("OPEN_WEATHER_API_KEY")
         if not api_root or not api_key:
             raise Exception("GEOCODING_API or OPEN_WEATHER_API_KEY not set in environment variables.")
-        return GeolocationApiHandler(api_root, api_key)
+        handler = GeolocationApiHandler(api_root, api_key, transport=self.get_transport(),
+                                        rate_limiter=self.get_rate_limiter(),
+                                        health_check_ttl=float(os.getenv("API_HEALTH_CHECK_TTL", "300")),
+                                        single_flight=self.get_single_flight(),
+                                        response_cache=self.get_response_cache(), metrics=self.get_metrics())
+        return self._verify(handler, verify)
+
+    @staticmethod
+    def _verify(handler, verify):
+        """
+        Run the optional health check requested by a get_*_handler call.
+        """
+        if verify == "background":
+            handler.health_check(background=True)
+        elif verify:
+            handler.health_check()
+        return handler
 
-# todo: add postgres handler; add all handler creation methods to this class
\ No newline at end of file
+    def get_async_geolocation_handler(self):
+        """
+        Initialize and return an AsyncGeolocationApiHandler instance using environment variables.
+
+        Expected environment variables:
+          - the same ones as get_geolocation_handler and get_async_weather_handler.
+
+        :return: An instance of AsyncGeolocationApiHandler.
+        """
+        api_root = os.getenv("GEOCODING_API")
+        api_key = os.getenv("OPEN_WEATHER_API_KEY")
+        if not api_root or not api_key:
+            raise Exception("GEOCODING_API or OPEN_WEATHER_API_KEY not set in environment variables.")
+        return AsyncGeolocationApiHandler(api_root, api_key, **self._async_options())
+
+    def _async_options(self):
+        """
+        Connection options of the asyncio handlers, read from the same variables as get_transport.
+        """
+        return {
+            "max_concurrency": int(os.getenv("API_MAX_CONCURRENCY", "10")),
+            "timeout": float(os.getenv("API_TIMEOUT", "30")),
+            "max_retries": int(os.getenv("API_MAX_RETRIES", "3")),
+            "backoff_factor": float(os.getenv("API_BACKOFF_FACTOR", "0.5")),
+            "rate_limiter": self.get_rate_limiter(),
+            "single_flight": self.get_single_flight(),
+            "metrics": self.get_metrics(),
+        }
@@ -0,0 +1,322 @@
+# File: helpers/HourlyColumns.py
+
+import json
+import codecs
+import numpy as np
+from weather_app.helpers.RangePlanner import HOUR
+
+# one record per hour, named after the weather_data columns; NaN where the API sent no value and
+# condition -1 where it sent no weather, otherwise an index into HourlyColumns.conditions
+HOURLY_DTYPE = np.dtype([
+    ("dt", "i8"), ("temp", "f8"), ("temp_min", "f8"), ("temp_max", "f8"), ("feels_like", "f8"),
+    ("pressure", "f8"), ("humidity", "f8"), ("clouds", "f8"), ("wind_speed", "f8"), ("wind_deg", "f8"),
+    ("wind_gust", "f8"), ("rain_volume", "f8"), ("snow_volume", "f8"), ("condition", "i2"),
+])
+# fields the API sends as integers
+INTEGER_FIELDS = ("pressure", "humidity", "clouds", "wind_deg")
+_WHITESPACE = " \t\n\r"
+
+
+def _number(value):
+    return np.nan if value is None else value
+
+
+class _JsonStreamReader:
+    """
+    Pulls JSON values one by one out of a stream of text or bytes chunks.
+    """
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            chunk = self.utf8.decode(b"", final=True)
+            if not chunk:
+                return False
+        elif isinstance(chunk, bytes):
+            chunk = self.utf8.decode(chunk)
+        # drop what was consumed already, so the buffer stays about one chunk long
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        Next non-whitespace character, without consuming it.
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of the JSON stream.")
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in the JSON stream, found {found!r}.")
+        self.pos += 1
+
+    def skip(self, char):
+        """
+        Consume char if it is next and tell whether it was.
+        """
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self):
+        """
+        Decode the next complete JSON value.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # a number touching the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def parse_history_stream(chunks, on_entry, header=None):
+    """
+    Parse a history API response incrementally: every element of its "list" is passed to on_entry
+    as soon as it is complete, so the whole list never exists in memory.
+
+    :param chunks: Iterable of bytes or str chunks, e.g. requests.Response.iter_content().
+    :param on_entry: Callable receiving each hourly entry.
+    :param header: (optional) Dictionary receiving the other top level fields as they are read.
+    :return: The top level fields except "list".
+    """
+    header = {} if header is None else header
+    reader = _JsonStreamReader(chunks)
+    reader.expect("{")
+    if reader.skip("}"):
+        return header
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "list" and reader.peek() == "[":
+            reader.expect("[")
+            if not reader.skip("]"):
+                while True:
+                    on_entry(reader.value())
+                    if not reader.skip(","):
+                        break
+                reader.expect("]")
+        else:
+            header[key] = reader.value()
+        if not reader.skip(","):
+            reader.expect("}")
+            return header
+
+
+class HourlyColumns:
+    """
+    Compact columnar form of history API hours: a NumPy structured array with one record per hour
+    (HOURLY_DTYPE, the weather_data columns) plus the distinct weather conditions.
+
+    An hour costs about 110 bytes instead of the kilobyte or two of nested dicts, and columns can
+    be used directly for vectorized work:
+
+        columns = weather_handler.get_weather_columns_by_timestamps("London", None, None, start_ts, end_ts)
+        columns["temp"].mean(), columns.descriptions()
+
+    from_stream builds it while the response is still being read. The API shaped JSON is only
+    rebuilt when to_response is called; the original text is kept only with keep_raw.
+    """
+    def __init__(self, data=None, conditions=None, header=None, raw=None):
+        """
+        :param data: (optional) Structured array of HOURLY_DTYPE.
+        :param conditions: (optional) List of (id, main, description, icon) referenced by data["condition"].
+        :param header: (optional) Top level fields of the response (city_id, calctime, ...).
+        :param raw: (optional) Original response text.
+        """
+        self.data = data if data is not None else np.zeros(0, HOURLY_DTYPE)
+        self.conditions = list(conditions or [])
+        self.header = dict(header or {})
+        self.raw = raw
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, field):
+        return self.data[field]
+
+    @property
+    def city_id(self):
+        return self.header.get("city_id")
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Convert an already decoded history API response.
+        """
+        builder = _ColumnBuilder(len(response.get("list", [])))
+        for entry in response.get("list", []):
+            builder.add(entry)
+        return builder.build({key: value for key, value in response.items() if key != "list"})
+
+    @classmethod
+    def from_stream(cls, chunks, keep_raw=False):
+        """
+        Parse a history API response chunk by chunk straight into columns.
+
+        :param chunks: Iterable of bytes or str chunks, e.g. requests.Response.iter_content(65536).
+        :param keep_raw: Also keep the original response text (available as .raw).
+        """
+        raw = []
+        if keep_raw:
+            chunks = cls._tee(chunks, raw)
+        header = {}
+        builder = _ColumnBuilder()
+
+        def on_entry(entry):
+            # "cnt" precedes "list" in the API responses, allocate the whole array at once
+            if builder.size == 0 and header.get("cnt"):
+                builder.reserve(int(header["cnt"]))
+            builder.add(entry)
+
+        parse_history_stream(chunks, on_entry, header)
+        columns = builder.build(header)
+        if keep_raw:
+            columns.raw = b"".join(raw).decode("utf-8") if raw and isinstance(raw[0], bytes) else "".join(raw)
+        return columns
+
+    @staticmethod
+    def _tee(chunks, raw):
+        for chunk in chunks:
+            raw.append(chunk)
+            yield chunk
+
+    @classmethod
+    def stitch(cls, parts, start_ts=None, end_ts=None):
+        """
+        Columnar counterpart of RangePlanner.stitch: merge parts, deduplicate on the hour bucket
+        (later parts win) and sort by dt.
+
+        :param parts: HourlyColumns to merge.
+        :param start_ts: (optional) Drop hours before this timestamp.
+        :param end_ts: (optional) Drop hours at or after this timestamp.
+        """
+        positions = {}
+        arrays = []
+        for part in parts:
+            data = part.data.copy()
+            mapping = np.array([positions.setdefault(condition, len(positions)) for condition in part.conditions] + [-1],
+                               dtype=np.int16)
+            data["condition"] = mapping[data["condition"]]
+            arrays.append(data)
+        conditions = sorted(positions, key=positions.get)
+        data = np.concatenate(arrays) if arrays else np.zeros(0, HOURLY_DTYPE)
+        if start_ts is not None:
+            data = data[data["dt"] >= start_ts]
+        if end_ts is not None:
+            data = data[data["dt"] < end_ts]
+        # np.unique keeps the first occurrence, so search the reversed array to let later parts win
+        buckets = data["dt"][::-1] // HOUR
+        _, last = np.unique(buckets, return_index=True)
+        data = data[::-1][last]
+
+        header = dict(parts[0].header) if parts else {"cod": "200"}
+        header["cnt"] = len(data)
+        header["message"] = f"Count: {len(data)}"
+        header["calctime"] = sum(part.header.get("calctime", 0) for part in parts)
+        return cls(data, conditions, header)
+
+    def descriptions(self):
+        """
+        Weather description of every hour (None where the API sent none), e.g. for WeatherStreaks.streaks_numpy.
+        """
+        lookup = np.array([condition[2] for condition in self.conditions] + [None], dtype=object)
+        return lookup[self.data["condition"]]
+
+    def to_response(self):
+        """
+        Rebuild the history API shaped JSON; fields the API did not send are left out again.
+        """
+        entries = []
+        for record in self.data.tolist():
+            values = dict(zip(HOURLY_DTYPE.names, record))
+            present = {field: (int(value) if field in INTEGER_FIELDS else value)
+                       for field, value in values.items() if field != "condition" and value == value}
+            entry = {"dt": present["dt"],
+                     "main": {field: present[field] for field in ("temp", "feels_like", "pressure", "humidity",
+                                                                  "temp_min", "temp_max") if field in present}}
+            wind = {key: present[field] for key, field in (("speed", "wind_speed"), ("deg", "wind_deg"),
+                                                           ("gust", "wind_gust")) if field in present}
+            if wind:
+                entry["wind"] = wind
+            if "clouds" in present:
+                entry["clouds"] = {"all": present["clouds"]}
+            if values["condition"] >= 0:
+                condition_id, main, description, icon = self.conditions[values["condition"]]
+                entry["weather"] = [{"id": condition_id, "main": main, "description": description, "icon": icon}]
+            if "rain_volume" in present:
+                entry["rain"] = {"1h": present["rain_volume"]}
+            if "snow_volume" in present:
+                entry["snow"] = {"1h": present["snow_volume"]}
+            entries.append(entry)
+        response = dict(self.header)
+        response["list"] = entries
+        return response
+
+    def raw_json(self):
+        """
+        The response as JSON text: the original text if it was kept, otherwise rebuilt from the columns.
+        """
+        return self.raw if self.raw is not None else json.dumps(self.to_response())
+
+
+class _ColumnBuilder:
+    """
+    Appends hourly entries to a growing structured array.
+    """
+    def __init__(self, capacity=0):
+        self.data = np.zeros(capacity, HOURLY_DTYPE)
+        self.size = 0
+        self.conditions = {}
+
+    def reserve(self, capacity):
+        if capacity > len(self.data):
+            data = np.zeros(capacity, HOURLY_DTYPE)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+
+    def add(self, entry):
+        if self.size == len(self.data):
+            self.reserve(max(64, 2 * len(self.data)))
+        main = entry.get("main", {})
+        wind = entry.get("wind", {})
+        condition = -1
+        if entry.get("weather"):
+            weather = entry["weather"][0]
+            key = (weather.get("id"), weather.get("main"), weather.get("description"), weather.get("icon"))
+            condition = self.conditions.setdefault(key, len(self.conditions))
+        self.data[self.size] = (
+            entry["dt"], _number(main.get("temp")), _number(main.get("temp_min")), _number(main.get("temp_max")),
+            _number(main.get("feels_like")), _number(main.get("pressure")), _number(main.get("humidity")),
+            _number(entry.get("clouds", {}).get("all")), _number(wind.get("speed")), _number(wind.get("deg")),
+            _number(wind.get("gust")), _number(entry.get("rain", {}).get("1h")),
+            _number(entry.get("snow", {}).get("1h")), condition)
+        self.size += 1
+
+    def build(self, header):
+        return HourlyColumns(self.data[:self.size].copy(), sorted(self.conditions, key=self.conditions.get), header)
@@ -0,0 +1,161 @@
+# File: helpers/HourlyWeatherStore.py
+
+import logging
+from pymongo import ASCENDING, UpdateOne
+from weather_app.helpers.WeatherCache import hour_bucket, location_key
+from weather_app.helpers.DailyAggregates import DailyAggregates, DAY
+
+# partial (dt, rain) index over the hours with rain, see HourlyWeatherStore.ensure_indexes
+RAINY_HOURS_INDEX = "dt_1_rain_1_rainy"
+
+
+def normalize_history(response, city, latitude=None, longitude=None):
+    """
+    Explode a history API response into one flat document per hour.
+
+    The fields follow the weather_data table of sql_scripts/create_tables.sql, with the first
+    weather condition and the rain/snow volume inlined. Hours without precipitation get a rain
+    of 0.0 and are left out of the partial (dt, rain) index.
+
+    :param response: JSON returned by WeatherApiHandler (a dict with a "list" of hourly entries).
+    :param city: City name the response was requested for.
+    :param latitude: (optional) Latitude, used as the key when no city is given.
+    :param longitude: (optional) Longitude, used as the key when no city is given.
+    :return: List of documents keyed by (location, dt), location being the case insensitive
+             location_key and city the name as given.
+    """
+    location = location_key(city, latitude, longitude)
+    city = city.strip() if city else location
+    city_id = response.get("city_id")
+    documents = []
+    for entry in response.get("list", []):
+        main = entry.get("main", {})
+        wind = entry.get("wind", {})
+        weather = (entry.get("weather") or [{}])[0]
+        documents.append({
+            "location": location,
+            "city": city,
+            "dt": hour_bucket(entry["dt"]),
+            "city_id": city_id,
+            "temp": main.get("temp"),
+            "temp_min": main.get("temp_min"),
+            "temp_max": main.get("temp_max"),
+            "feels_like": main.get("feels_like"),
+            "pressure": main.get("pressure"),
+            "humidity": main.get("humidity"),
+            "clouds": entry.get("clouds", {}).get("all"),
+            "wind_speed": wind.get("speed"),
+            "wind_deg": wind.get("deg"),
+            "wind_gust": wind.get("gust"),
+            "rain": float(entry.get("rain", {}).get("1h", 0.0)),
+            "snow": float(entry.get("snow", {}).get("1h", 0.0)),
+            "weather_id": weather.get("id"),
+            "weather_main": weather.get("main"),
+            "weather_description": weather.get("description"),
+            "weather_icon": weather.get("icon"),
+        })
+    return documents
+
+
+class HourlyWeatherStore:
+    """
+    Ingest stage storing history responses as one MongoDB document per (location, hour).
+
+    Instead of keeping each API response as one blob, every hourly entry is normalized by
+    normalize_history and upserted on (location, dt), so ingesting the same response twice (or
+    as "london" instead of "London") leaves the collection unchanged. Queries take the city name
+    and look it up by its location key. Days that received new hours get their DailyAggregates refreshed.
+    The compound indexes turn per city ranges and rain queries into
+    index scans.
+
+    The MongoHandler's retention is not applied to the hourly collection unless asked for with
+    apply_retention: trimming it would silently drop hours a backfill already marked as done.
+
+        store = HourlyWeatherStore(mongo_handler)
+        store.ingest(weather_handler.get_weather_by_interval("London", None, None, start, end), "London")
+        hours = list(store.find_range("London", start_ts, end_ts))
+    """
+    def __init__(self, mongo_handler, collection_name="weather_hourly", daily_collection_name="weather_daily",
+                 apply_retention=False):
+        """
+        Initialize the store.
+
+        :param mongo_handler: An instance of MongoHandler.
+        :param collection_name: Name of the collection holding the hourly documents.
+        :param daily_collection_name: Name of the collection holding the DailyAggregates kept up to date
+                                      on ingest, None to not maintain them.
+        :param apply_retention: Whether the retention strategy of the MongoHandler applies to the hourly
+                                collection (stamping new hours and trimming after every ingest).
+        """
+        self.mongo_handler = mongo_handler
+        self.collection_name = collection_name
+        self.apply_retention = apply_retention
+        self.daily_aggregates = None
+        if daily_collection_name:
+            self.daily_aggregates = DailyAggregates(mongo_handler, hourly_collection_name=collection_name,
+                                                    collection_name=daily_collection_name)
+        # created on first use, so constructing the store does not touch the database
+        self._indexes_ready = False
+
+    def ensure_indexes(self):
+        """
+        Create the unique (location, dt) index used by upserts and range queries, and the (dt, rain)
+        index used by rain intensity queries over all cities. The latter is partial, only rainy
+        hours are indexed, which keeps it a fraction of the collection size.
+        """
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        # indexes of collections written by earlier versions: the unique (city, dt) index from before
+        # hours were keyed by location, and the (dt, rain) index over all hours the partial one replaces
+        existing = collection.index_information()
+        for legacy in ("city_1_dt_1", "dt_1_rain_1"):
+            if legacy in existing:
+                collection.drop_index(legacy)
+        collection.create_index([("location", ASCENDING), ("dt", ASCENDING)], unique=True)
+        collection.create_index([("dt", ASCENDING), ("rain", ASCENDING)], name=RAINY_HOURS_INDEX,
+                                partialFilterExpression={"rain": {"$gt": 0}})
+        self._indexes_ready = True
+
+    def ingest(self, response, city, latitude=None, longitude=None):
+        """
+        Normalize a history response and upsert its hours in one unordered bulk write.
+
+        :param response: JSON returned by WeatherApiHandler.
+        :param city: City name the response was requested for.
+        :param latitude: (optional) Latitude, used as the key when no city is given.
+        :param longitude: (optional) Longitude, used as the key when no city is given.
+        :return: Number of hours upserted or modified.
+        """
+        documents = normalize_history(response, city, latitude, longitude)
+        if not documents:
+            return 0
+        if not self._indexes_ready:
+            self.ensure_indexes()
+        # the spelling of the city (and retention fields, e.g. ingested_at) keep the values of the first ingest
+        on_insert = self.mongo_handler.retention.stamp({}) if self.apply_retention else {}
+        operations = [UpdateOne({"location": document["location"], "dt": document["dt"]},
+                                {"$set": {name: value for name, value in document.items() if name != "city"},
+                                 "$setOnInsert": dict(on_insert, city=document["city"])}, upsert=True)
+                      for document in documents]
+        result = self.mongo_handler.bulk_write(self.collection_name, operations, ordered=False,
+                                               apply_retention=self.apply_retention)
+        changed = result.upserted_count + result.modified_count
+        logging.info(f"Ingested {len(documents)} hours for {documents[0]['city']} ({changed} new or changed).")
+        if self.daily_aggregates is not None and changed:
+            # modified hours are not reported individually, only then fall back to every day of the batch
+            touched = documents if result.modified_count else [documents[i] for i in result.upserted_ids]
+            self.daily_aggregates.refresh_mongo(documents[0]["location"], {doc["dt"] // DAY * DAY for doc in touched})
+        return changed
+
+    def find_range(self, city, start_ts, end_ts, projection=None):
+        """
+        Stream the hourly documents of a city in [start_ts, end_ts), ordered by dt.
+
+        :param city: City name as passed to ingest (case insensitive), or its location key.
+        :param start_ts: Start of the interval as a unix timestamp (inclusive).
+        :param end_ts: End of the interval as a unix timestamp (exclusive).
+        :param projection: (optional) Fields to return, defaults to all but _id.
+        :return: A pymongo cursor.
+        """
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        return collection.find({"location": location_key(city, None, None), "dt": {"$gte": start_ts, "$lt": end_ts}},
+                               projection or {"_id": 0}).sort("dt", ASCENDING)
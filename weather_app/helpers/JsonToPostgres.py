@@ -1,2 +1,151 @@
-# todo
-# vzit z mongo handler json a prevest na postgres record
\ No newline at end of file
+# File: helpers/JsonToPostgres.py
+
+import io
+from datetime import datetime, timezone
+from weather_app.helpers.HourlyColumns import INTEGER_FIELDS
+
+# column order of the rows produced below, matching sql_scripts/create_tables.sql
+CITY_COLUMNS = ("name", "latitude", "longitude", "altitude", "timezone", "timezone_offset")
+WEATHER_DATA_COLUMNS = ("city_name", "dt", "temp", "temp_min", "temp_max", "feels_like", "pressure", "humidity",
+                        "clouds", "wind_speed", "wind_deg", "wind_gust", "rain_volume")
+WEATHER_CONDITIONS_COLUMNS = ("city_name", "dt", "description", "icon")
+PRECIPITATION_COLUMNS = ("city_name", "dt", "type", "volume")
+
+
+class JsonToPostgres:
+    """
+    Converts history API responses into rows of the relational schema.
+
+    Rows are plain tuples in the column order of the *_COLUMNS constants, so they can be fed to
+    executemany or serialized with to_copy_buffer for COPY FROM STDIN. Rows of several responses
+    can be accumulated in one converter and loaded together:
+
+        converter = JsonToPostgres()
+        for response, city, lat, lon in histories:
+            converter.add_history(response, city, lat, lon)
+        postgres_handler.copy_rows(converter)
+    """
+    def __init__(self):
+        self.cities = {}
+        self.weather_data = []
+        self.weather_conditions = []
+        self.precipitation = []
+
+    def __len__(self):
+        return len(self.weather_data)
+
+    def add_city(self, city, latitude, longitude, altitude=None, timezone_name=None, timezone_offset=None):
+        """
+        Add a cities row; adding the same city again keeps the first row.
+        """
+        if not city:
+            raise ValueError("A city name is required, it is the primary key of the cities table.")
+        if latitude is None or longitude is None:
+            raise ValueError(f"Latitude and longitude of {city} are required.")
+        self.cities.setdefault(city, (city, float(latitude), float(longitude), altitude, timezone_name,
+                                      timezone_offset))
+
+    def add_history(self, response, city, latitude, longitude):
+        """
+        Convert one history response into weather_data, weather_conditions and precipitation rows.
+
+        :param response: JSON returned by WeatherApiHandler (a dict with a "list" of hourly entries).
+        :param city: City name, the key of all rows.
+        :param latitude: Latitude of the city (the cities table requires it).
+        :param longitude: Longitude of the city.
+        :return: Number of hourly entries converted.
+        """
+        city = city.strip() if city else city
+        self.add_city(city, latitude, longitude)
+        entries = response.get("list", [])
+        for entry in entries:
+            dt = self.to_timestamp(entry["dt"])
+            main = entry.get("main", {})
+            wind = entry.get("wind", {})
+            rain = entry.get("rain", {}).get("1h")
+            snow = entry.get("snow", {}).get("1h")
+            self.weather_data.append((city, dt, main.get("temp"), main.get("temp_min"), main.get("temp_max"),
+                                      main.get("feels_like"), main.get("pressure"), main.get("humidity"),
+                                      entry.get("clouds", {}).get("all"), wind.get("speed"), wind.get("deg"),
+                                      wind.get("gust"), rain))
+            if entry.get("weather"):
+                weather = entry["weather"][0]
+                self.weather_conditions.append((city, dt, weather.get("description"), weather.get("icon")))
+            if rain is not None:
+                self.precipitation.append((city, dt, "rain", rain))
+            if snow is not None:
+                self.precipitation.append((city, dt, "snow", snow))
+        return len(entries)
+
+    def add_columns(self, columns, city, latitude, longitude):
+        """
+        Same as add_history for a response already parsed into HourlyColumns, without going
+        through per-hour dicts.
+
+        :param columns: An HourlyColumns instance.
+        :return: Number of hourly entries converted.
+        """
+        city = city.strip() if city else city
+        self.add_city(city, latitude, longitude)
+        descriptions = [(condition[2], condition[3]) for condition in columns.conditions]
+        names = columns.data.dtype.names
+        # HOURLY_DTYPE holds the weather_data values in table order right after dt
+        positions = [names.index(column) for column in WEATHER_DATA_COLUMNS[2:]]
+        integers = {names.index(field) for field in INTEGER_FIELDS}
+        condition_position = names.index("condition")
+        snow_position = names.index("snow_volume")
+        for record in columns.data.tolist():
+            dt = self.to_timestamp(record[0])
+            values = tuple(None if record[i] != record[i] else int(record[i]) if i in integers else record[i]
+                           for i in positions)
+            self.weather_data.append((city, dt) + values)
+            if record[condition_position] >= 0:
+                self.weather_conditions.append((city, dt) + descriptions[record[condition_position]])
+            # rain_volume is the last weather_data column
+            if values[-1] is not None:
+                self.precipitation.append((city, dt, "rain", values[-1]))
+            if record[snow_position] == record[snow_position]:
+                self.precipitation.append((city, dt, "snow", record[snow_position]))
+        return len(columns)
+
+    def tables(self):
+        """
+        Rows per table, in an order that satisfies the foreign keys.
+
+        :return: List of (table name, columns, rows).
+        """
+        return [
+            ("cities", CITY_COLUMNS, list(self.cities.values())),
+            ("weather_data", WEATHER_DATA_COLUMNS, self.weather_data),
+            ("weather_conditions", WEATHER_CONDITIONS_COLUMNS, self.weather_conditions),
+            ("precipitation", PRECIPITATION_COLUMNS, self.precipitation),
+        ]
+
+    @staticmethod
+    def to_timestamp(ts):
+        """
+        Unix timestamp to the UTC "TIMESTAMP WITHOUT TIME ZONE" string used by the schema.
+        """
+        return datetime.fromtimestamp(int(ts), timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    @staticmethod
+    def to_copy_buffer(rows):
+        """
+        Serialize rows into the text format of COPY FROM STDIN (tab separated, \\N for NULL).
+
+        :param rows: Iterable of tuples.
+        :return: A file-like object positioned at its start.
+        """
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(JsonToPostgres._copy_value(value) for value in row))
+            buffer.write("\n")
+        buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def _copy_value(value):
+        if value is None:
+            return "\\N"
+        return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+                .replace("\n", "\\n").replace("\r", "\\r"))
@@ -0,0 +1,186 @@
+# File: helpers/Metrics.py
+
+import time
+import inspect
+import logging
+import functools
+import threading
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, start_http_server
+
+# upstream calls take from ~50 ms (cached by the API) to tens of seconds (long history ranges with retries)
+API_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# single document operations take well under a millisecond on a local server, bulk writes much longer
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+class Metrics:
+    """
+    Prometheus metrics of the API and database handlers.
+
+    Every handler records into a Metrics instance, by default the process wide Metrics.shared():
+
+      - weather_app_api_method_seconds{handler, method}: latency of the public handler methods
+        (cache hits included), see the timed decorator.
+      - weather_app_api_request_seconds{handler, endpoint}: latency of upstream calls, retries included.
+      - weather_app_api_responses_total{handler, endpoint, status}: final upstream status codes
+        ("error" when no response arrived).
+      - weather_app_api_response_bytes_total{handler, endpoint}: bytes received.
+      - weather_app_mongo_operation_seconds{operation, collection}: MongoHandler operations.
+      - weather_app_mongo_retention_seconds{strategy, collection} and
+        weather_app_mongo_retention_deleted_total{strategy, collection}: retention runs.
+
+    The metrics are exported in the Prometheus text format by serve (a small HTTP server on a
+    daemon thread) or exposition, and as a plain dictionary by snapshot:
+
+        Metrics.shared().serve(9108)          # curl localhost:9108/metrics
+        Metrics.shared().snapshot()["weather_app_api_request_seconds"]
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, registry=None, namespace="weather_app"):
+        """
+        :param registry: (optional) prometheus_client CollectorRegistry, defaults to a private one.
+        :param namespace: Prefix of the metric names.
+        """
+        self.registry = registry if registry is not None else CollectorRegistry()
+        self.method_seconds = Histogram("api_method_seconds", "Latency of public API handler methods.",
+                                        ["handler", "method"], namespace=namespace, buckets=API_BUCKETS,
+                                        registry=self.registry)
+        self.request_seconds = Histogram("api_request_seconds", "Latency of upstream API calls, retries included.",
+                                         ["handler", "endpoint"], namespace=namespace, buckets=API_BUCKETS,
+                                         registry=self.registry)
+        self.responses = Counter("api_responses", "Final upstream API responses by status code.",
+                                 ["handler", "endpoint", "status"], namespace=namespace, registry=self.registry)
+        self.response_bytes = Counter("api_response_bytes", "Bytes received from the upstream API.",
+                                      ["handler", "endpoint"], namespace=namespace, registry=self.registry)
+        self.mongo_seconds = Histogram("mongo_operation_seconds", "Latency of MongoHandler operations.",
+                                       ["operation", "collection"], namespace=namespace, buckets=MONGO_BUCKETS,
+                                       registry=self.registry)
+        self.retention_seconds = Histogram("mongo_retention_seconds", "Duration of data retention runs.",
+                                           ["strategy", "collection"], namespace=namespace, buckets=MONGO_BUCKETS,
+                                           registry=self.registry)
+        self.retention_deleted = Counter("mongo_retention_deleted", "Documents deleted by data retention.",
+                                         ["strategy", "collection"], namespace=namespace, registry=self.registry)
+        self._server = None
+
+    @classmethod
+    def shared(cls):
+        """
+        Return the process wide instance, creating it on first use.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def set_shared(cls, metrics):
+        """
+        Replace the process wide instance (e.g. with one using the prometheus_client default registry).
+        """
+        with cls._shared_lock:
+            cls._shared = metrics
+
+    def observe_request(self, handler, endpoint, seconds, status, size=None):
+        """
+        Record one upstream call.
+
+        :param handler: Name of the handler class.
+        :param endpoint: Last path segment of the URL, e.g. "city" or "reverse".
+        :param seconds: Duration of the call.
+        :param status: Final HTTP status code, None if no response arrived.
+        :param size: (optional) Size of the body in bytes.
+        """
+        self.request_seconds.labels(handler, endpoint).observe(seconds)
+        self.responses.labels(handler, endpoint, "error" if status is None else str(status)).inc()
+        if size:
+            self.response_bytes.labels(handler, endpoint).inc(size)
+
+    def time_mongo(self, operation, collection):
+        """
+        Context manager timing one MongoHandler operation.
+        """
+        return self.mongo_seconds.labels(operation, collection).time()
+
+    def observe_retention(self, strategy, collection, seconds, deleted):
+        self.retention_seconds.labels(strategy, collection).observe(seconds)
+        if deleted:
+            self.retention_deleted.labels(strategy, collection).inc(deleted)
+
+    def exposition(self):
+        """
+        The metrics in the Prometheus text format.
+        """
+        return generate_latest(self.registry).decode("utf-8")
+
+    def snapshot(self):
+        """
+        The current values as a dictionary: metric name -> list of samples, each a dict of the
+        labels plus "count" and "sum" (histograms) or "value" (counters).
+        """
+        snapshot = {}
+        for metric in self.registry.collect():
+            if metric.type == "histogram":
+                series = {}
+                for sample in metric.samples:
+                    labels = {name: value for name, value in sample.labels.items() if name != "le"}
+                    entry = series.setdefault(tuple(sorted(labels.items())), dict(labels))
+                    if sample.name.endswith("_count"):
+                        entry["count"] = int(sample.value)
+                    elif sample.name.endswith("_sum"):
+                        entry["sum"] = sample.value
+                snapshot[metric.name] = list(series.values())
+            elif metric.type == "counter":
+                snapshot[metric.name + "_total"] = [dict(sample.labels, value=sample.value)
+                                                    for sample in metric.samples if sample.name.endswith("_total")]
+        return snapshot
+
+    def serve(self, port=9108, address="127.0.0.1"):
+        """
+        Serve the metrics on http://address:port/metrics from a daemon thread; repeated calls are no-ops.
+
+        :param port: TCP port, 0 picks a free one.
+        :param address: Interface to listen on, local only by default.
+        :return: The port the server listens on.
+        """
+        if self._server is None:
+            self._server, _ = start_http_server(port, addr=address, registry=self.registry)
+            logging.info(f"Serving metrics on http://{address}:{self._server.server_port}/metrics")
+        return self._server.server_port
+
+    def close(self):
+        """
+        Stop the HTTP server started by serve.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def timed(method):
+    """
+    Decorator recording the latency of a handler method (sync or async) in Metrics.method_seconds
+    of the handler's metrics, labelled with the handler class and method name.
+    """
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                self.metrics.method_seconds.labels(type(self).__name__, method.__name__).observe(
+                    time.perf_counter() - started)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.metrics.method_seconds.labels(type(self).__name__, method.__name__).observe(
+                time.perf_counter() - started)
+    return wrapper
@@ -0,0 +1,160 @@
+# File: helpers/PrefetchScheduler.py
+
+import time
+import logging
+import threading
+from pymongo import ASCENDING
+from weather_app.handlers.ApiHandler import ApiHandlerError, TooManyRequestsError
+from weather_app.helpers.WeatherCache import hour_bucket, location_key
+
+DAY = 86400
+
+
+class PrefetchScheduler:
+    """
+    Keeps the WeatherCache warm for a registry of tracked locations.
+
+    Every round asks the cache for the last `days` days of each tracked location, up to the last
+    complete hour. The cache loads what it has and fetches only the missing hours, so after the
+    first round each location costs one small call per new hour window, and interactive requests
+    for the same locations and days are answered without calling the API.
+
+    The registry lives in MongoDB, so locations tracked from a notebook are picked up by a
+    running scheduler. Rounds stop early when the monthly quota of the weather handler's
+    RateLimiter falls to quota_reserve calls, leaving that budget to interactive users:
+
+        scheduler = PrefetchScheduler(weather_cache)
+        scheduler.track("London", days=7)
+        scheduler.run_forever(interval=900)  # until scheduler.stop() or SIGTERM (see weather_app.prefetch)
+    """
+    def __init__(self, weather_cache, collection_name="prefetch_locations", quota_reserve=100):
+        """
+        Initialize the scheduler.
+
+        :param weather_cache: An instance of WeatherCache that is kept warm.
+        :param collection_name: Name of the collection holding the tracked locations.
+        :param quota_reserve: Monthly calls left untouched for interactive requests.
+        """
+        self.weather_cache = weather_cache
+        self.mongo_handler = weather_cache.mongo_handler
+        self.collection_name = collection_name
+        self.quota_reserve = quota_reserve
+        self._stop = threading.Event()
+
+    def track(self, city=None, latitude=None, longitude=None, days=7):
+        """
+        Add a location to the registry, or change the number of days kept warm for it.
+
+        :param city: City name (if provided).
+        :param latitude: Latitude (used if city is not provided).
+        :param longitude: Longitude (used if city is not provided).
+        :param days: Number of past days kept in the cache.
+        :return: The registry key of the location.
+        """
+        if days <= 0:
+            raise ValueError("days must be positive.")
+        key = location_key(city, latitude, longitude)
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        collection.update_one({"_id": key}, {"$set": {"city": city.strip() if city else None, "lat": latitude,
+                                                      "lon": longitude, "days": days},
+                                             "$setOnInsert": {"last_refresh": None, "failures": 0}}, upsert=True)
+        logging.info(f"Prefetch: tracking {key} ({days} days).")
+        return key
+
+    def untrack(self, city=None, latitude=None, longitude=None):
+        """
+        Remove a location from the registry.
+
+        :return: True if the location was tracked.
+        """
+        key = location_key(city, latitude, longitude)
+        deleted = self.mongo_handler.get_collection(self.collection_name).delete_one({"_id": key}).deleted_count
+        return deleted == 1
+
+    def tracked(self):
+        """
+        The tracked locations, least recently refreshed first.
+
+        :return: List of registry documents.
+        """
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        return list(collection.find().sort([("last_refresh", ASCENDING), ("_id", ASCENDING)]))
+
+    def run_once(self, now=None):
+        """
+        Refresh every tracked location once.
+
+        Locations refreshed least recently go first, so when the quota runs out the next round
+        continues where this one stopped. A failing location is logged and skipped.
+
+        :param now: (optional) Unix timestamp of the round, defaults to the current time.
+        :return: Dictionary with the number of refreshed, failed and skipped locations.
+        """
+        now = int(time.time()) if now is None else int(now)
+        end_ts = hour_bucket(now)
+        started = time.perf_counter()
+        summary = {"locations": 0, "refreshed": 0, "failed": 0, "skipped": 0}
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        exhausted = False
+        for location in self.tracked():
+            summary["locations"] += 1
+            if not exhausted and not self._has_budget():
+                exhausted = True
+            if exhausted or self._stop.is_set():
+                summary["skipped"] += 1
+                continue
+            try:
+                self.weather_cache.get_hour_range(location.get("city"), location.get("lat"), location.get("lon"),
+                                                  end_ts - location["days"] * DAY, end_ts)
+            except TooManyRequestsError as e:
+                # QuotaExceededError included; the rest of the round would fail the same way
+                logging.warning(f"Prefetch: out of API budget at {location['_id']}, {e}")
+                summary["failed"] += 1
+                exhausted = True
+                continue
+            except ApiHandlerError as e:
+                logging.error(f"Prefetch: refreshing {location['_id']} failed, {e}")
+                collection.update_one({"_id": location["_id"]}, {"$inc": {"failures": 1}})
+                summary["failed"] += 1
+                continue
+            collection.update_one({"_id": location["_id"]}, {"$set": {"last_refresh": end_ts, "failures": 0}})
+            summary["refreshed"] += 1
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        logging.info(f"Prefetch round: {summary}")
+        return summary
+
+    def run_forever(self, interval=3600):
+        """
+        Run a round every interval seconds until stop is called.
+
+        Rounds start at multiples of interval since the epoch (e.g. at every full hour for 3600),
+        a moment after the history API has published the previous hour.
+
+        :param interval: Seconds between two rounds.
+        """
+        logging.info(f"Prefetch scheduler started, a round every {interval}s.")
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                # storage hiccups must not kill the long running process, the next round retries
+                logging.error(f"Prefetch round failed: {e}", exc_info=True)
+            wait = interval - time.time() % interval
+            self._stop.wait(wait)
+        logging.info("Prefetch scheduler stopped.")
+
+    def stop(self):
+        """
+        Ask run_forever to return; a running round finishes the location it is refreshing first.
+        """
+        self._stop.set()
+
+    def _has_budget(self):
+        rate_limiter = getattr(self.weather_cache.weather_handler, "rate_limiter", None)
+        if rate_limiter is None or rate_limiter.calls_per_month is None:
+            return True
+        remaining = rate_limiter.get_budget()["month_remaining"]
+        if remaining <= self.quota_reserve:
+            logging.warning(f"Prefetch: {remaining} calls left this month, keeping them for interactive requests.")
+            return False
+        return True
@@ -0,0 +1,153 @@
+# File: helpers/RainQuery.py
+
+import calendar
+from datetime import datetime
+from pymongo import ASCENDING
+
+DAY = 86400
+
+# rain intensity classes in mm/h, lower bound inclusive, upper bound exclusive
+RAIN_INTENSITIES = {
+    "light": (0.0, 2.5),
+    "moderate": (2.5, 7.6),
+    "heavy": (7.6, 50.0),
+    "violent": (50.0, None),
+}
+
+POSTGRES_RAIN_INDEX = ("CREATE INDEX IF NOT EXISTS idx_precipitation_rain_dt_volume "
+                       "ON precipitation (dt, volume) INCLUDE (city_name) WHERE type = 'rain'")
+
+
+def day_range(start_day, end_day=None):
+    """
+    Convert an inclusive range of "mm/dd/yyyy" days into a half-open range of UTC unix timestamps.
+    """
+    start_ts = calendar.timegm(datetime.strptime(start_day, "%m/%d/%Y").timetuple())
+    end_ts = calendar.timegm(datetime.strptime(end_day or start_day, "%m/%d/%Y").timetuple()) + DAY
+    if start_ts >= end_ts:
+        raise ValueError("Start day must not be after end day.")
+    return start_ts, end_ts
+
+
+def intensity_bounds(intensity=None, min_volume=None, max_volume=None):
+    """
+    Resolve a named intensity or explicit bounds into (min_volume, max_volume) in mm/h.
+    """
+    if intensity is not None:
+        if intensity not in RAIN_INTENSITIES:
+            raise ValueError(f"Unknown rain intensity: {intensity}")
+        return RAIN_INTENSITIES[intensity]
+    return (min_volume or 0.0), max_volume
+
+
+class RainQuery:
+    """
+    Answers "all places where it rained with a given intensity on a day or range of days".
+
+    Both backends are queried through partial indexes that only contain rainy hours:
+    precipitation (dt, volume) WHERE type = 'rain' in PostgreSQL and the (dt, rain) index of
+    HourlyWeatherStore in MongoDB. Hourly results are streamed (server side cursor / batched
+    pymongo cursor), so a large day range never has to fit into memory:
+
+        query = RainQuery(postgres_handler=factory.get_postgres_handler())
+        for city, dt, volume in query.rainy_hours_postgres("04/01/2025", "04/07/2025", intensity="heavy"):
+            ...
+    """
+    def __init__(self, postgres_handler=None, hourly_store=None, batch_size=2000):
+        """
+        Initialize the query helper; either backend may be omitted.
+
+        :param postgres_handler: (optional) An instance of PostgresDbHandler.
+        :param hourly_store: (optional) An instance of HourlyWeatherStore holding the normalized Mongo data.
+        :param batch_size: Rows fetched per round-trip while streaming.
+        """
+        self.postgres_handler = postgres_handler
+        self.hourly_store = hourly_store
+        self.batch_size = batch_size
+
+    def ensure_indexes(self):
+        """
+        Create the partial rain indexes in the configured backends.
+        """
+        if self.postgres_handler is not None:
+            self.postgres_handler.execute_query(POSTGRES_RAIN_INDEX)
+        if self.hourly_store is not None:
+            self.hourly_store.ensure_indexes()
+
+    def rainy_hours_postgres(self, start_day, end_day=None, intensity=None, min_volume=None, max_volume=None):
+        """
+        Stream every rainy hour in the day range from PostgreSQL.
+
+        :param start_day: First day as a string in "mm/dd/yyyy" format.
+        :param end_day: (optional) Last day (inclusive), defaults to start_day.
+        :param intensity: (optional) "light", "moderate", "heavy" or "violent".
+        :param min_volume: (optional) Minimum rain volume in mm/h, used when no intensity is given.
+        :param max_volume: (optional) Exclusive maximum rain volume in mm/h.
+        :return: Generator of (city_name, dt, volume) ordered by dt.
+        """
+        query, params = self._postgres_filter(start_day, end_day, intensity, min_volume, max_volume)
+        return self.postgres_handler.stream_query(
+            f"SELECT city_name, dt, volume FROM precipitation WHERE {query} ORDER BY dt, city_name",
+            params, itersize=self.batch_size)
+
+    def rainy_places_postgres(self, start_day, end_day=None, intensity=None, min_volume=None, max_volume=None):
+        """
+        Places with at least one matching rainy hour in the day range, from PostgreSQL.
+
+        :return: List of (city_name, rainy hours, max volume, total volume) ordered by total volume.
+        """
+        query, params = self._postgres_filter(start_day, end_day, intensity, min_volume, max_volume)
+        return self.postgres_handler.execute_query(
+            f"SELECT city_name, count(*), max(volume), sum(volume) FROM precipitation WHERE {query} "
+            f"GROUP BY city_name ORDER BY sum(volume) DESC", params)
+
+    def rainy_hours_mongo(self, start_day, end_day=None, intensity=None, min_volume=None, max_volume=None):
+        """
+        Stream every rainy hour in the day range from the normalized MongoDB collection.
+
+        Same parameters as rainy_hours_postgres.
+
+        :return: A pymongo cursor of {"city", "dt", "rain"} documents ordered by dt.
+        """
+        collection = self.hourly_store.mongo_handler.get_collection(self.hourly_store.collection_name)
+        return collection.find(self._mongo_filter(start_day, end_day, intensity, min_volume, max_volume),
+                               {"_id": 0, "city": 1, "dt": 1, "rain": 1}) \
+            .sort([("dt", ASCENDING), ("city", ASCENDING)]).batch_size(self.batch_size)
+
+    def rainy_places_mongo(self, start_day, end_day=None, intensity=None, min_volume=None, max_volume=None):
+        """
+        Places with at least one matching rainy hour in the day range, from MongoDB.
+
+        :return: List of {"city", "hours", "max_rain", "total_rain"} ordered by total rain.
+        """
+        collection = self.hourly_store.mongo_handler.get_collection(self.hourly_store.collection_name)
+        pipeline = [
+            {"$match": self._mongo_filter(start_day, end_day, intensity, min_volume, max_volume)},
+            {"$group": {"_id": "$location", "city": {"$last": "$city"}, "hours": {"$sum": 1},
+                        "max_rain": {"$max": "$rain"}, "total_rain": {"$sum": "$rain"}}},
+            {"$sort": {"total_rain": -1}},
+            {"$project": {"_id": 0, "city": 1, "hours": 1, "max_rain": 1, "total_rain": 1}},
+        ]
+        return list(collection.aggregate(pipeline))
+
+    @staticmethod
+    def _postgres_filter(start_day, end_day, intensity, min_volume, max_volume):
+        start_ts, end_ts = day_range(start_day, end_day)
+        low, high = intensity_bounds(intensity, min_volume, max_volume)
+        query = "type = 'rain' AND dt >= to_timestamp(%s) AT TIME ZONE 'UTC' " \
+                "AND dt < to_timestamp(%s) AT TIME ZONE 'UTC' AND volume " + (">= %s" if low > 0 else "> %s")
+        params = [start_ts, end_ts, low]
+        if high is not None:
+            query += " AND volume < %s"
+            params.append(high)
+        return query, params
+
+    @staticmethod
+    def _mongo_filter(start_day, end_day, intensity, min_volume, max_volume):
+        start_ts, end_ts = day_range(start_day, end_day)
+        low, high = intensity_bounds(intensity, min_volume, max_volume)
+        # "$gt": 0 (or a stricter bound) keeps the query inside the partial index
+        rain = {"$gte": low} if low > 0 else {"$gt": 0}
+        if high is not None:
+            rain["$lt"] = high
+        return {"dt": {"$gte": start_ts, "$lt": end_ts}, "rain": rain}
@@ -0,0 +1,166 @@
+# File: helpers/RangePlanner.py
+
+import asyncio
+import logging
+import threading
+
+HOUR = 3600
+
+# The history API returns at most one week of hourly data per call.
+DEFAULT_MAX_HOURS_PER_CALL = 168
+
+
+class RangePlanner:
+    """
+    Plans historical fetches with hour granularity.
+
+    Given a half-open [start_ts, end_ts) interval and the hour buckets already in storage, the
+    planner computes the missing hours, covers them with the fewest API calls the history endpoint
+    allows (one call spans at most max_hours_per_call hours) and stitches the responses back
+    together in dt order.
+
+    Counters of hours served from storage versus fetched from the API are kept in self.stats.
+    """
+    def __init__(self, max_hours_per_call=DEFAULT_MAX_HOURS_PER_CALL):
+        """
+        :param max_hours_per_call: Maximum number of hours a single history API call may span.
+        """
+        if max_hours_per_call < 1:
+            raise ValueError("max_hours_per_call must be at least 1.")
+        self.max_hours_per_call = max_hours_per_call
+        self._lock = threading.Lock()
+        self.stats = {"hours_requested": 0, "hours_from_cache": 0, "hours_fetched": 0, "api_calls": 0}
+
+    @staticmethod
+    def hour_range(start_ts, end_ts):
+        """
+        All hour buckets inside [start_ts, end_ts).
+        """
+        return range(int(start_ts) // HOUR * HOUR, int(end_ts), HOUR)
+
+    def missing_hours(self, start_ts, end_ts, known_hours=()):
+        """
+        Sorted list of hour buckets in [start_ts, end_ts) that are not in known_hours.
+        """
+        known = known_hours if isinstance(known_hours, (set, frozenset, dict)) else set(known_hours)
+        return [dt for dt in self.hour_range(start_ts, end_ts) if dt not in known]
+
+    def missing_intervals(self, start_ts, end_ts, known_hours=()):
+        """
+        Missing hours grouped into half-open [first, last + 1h) intervals of consecutive hours.
+        """
+        intervals = []
+        for dt in self.missing_hours(start_ts, end_ts, known_hours):
+            if intervals and dt == intervals[-1][1]:
+                intervals[-1][1] = dt + HOUR
+            else:
+                intervals.append([dt, dt + HOUR])
+        return [tuple(interval) for interval in intervals]
+
+    def plan(self, start_ts, end_ts, known_hours=()):
+        """
+        Cover the missing hours with the fewest calls.
+
+        Greedy from the earliest uncovered hour: each call window starts at that hour and spans
+        max_hours_per_call hours, which is optimal for covering points with fixed-length windows.
+        Short gaps of already stored hours inside a window are refetched instead of costing an
+        extra call. Windows are trimmed to the last missing hour they actually cover.
+
+        :return: List of (start_ts, end_ts) tuples, both inclusive, as the API expects them.
+        """
+        span = self.max_hours_per_call * HOUR
+        calls = []
+        for dt in self.missing_hours(start_ts, end_ts, known_hours):
+            if calls and dt < calls[-1][0] + span:
+                calls[-1][1] = dt
+            else:
+                calls.append([dt, dt])
+        return [tuple(call) for call in calls]
+
+    def fetch(self, fetch_fn, start_ts, end_ts, known_hours=()):
+        """
+        Plan the missing hours and fetch every planned window; see stitch for merging the result.
+
+        :param fetch_fn: Callable taking (start_ts, end_ts), both inclusive, returning a history API JSON.
+        :param start_ts: Start of the interval as a unix timestamp (inclusive).
+        :param end_ts: End of the interval as a unix timestamp (exclusive).
+        :param known_hours: Hour buckets already available in storage.
+        :return: List of the raw responses, one per API call, in dt order.
+        """
+        calls = self._plan_and_record(start_ts, end_ts, known_hours)
+        return [fetch_fn(call_start, call_end) for call_start, call_end in calls]
+
+    async def afetch(self, fetch_coro, start_ts, end_ts, known_hours=()):
+        """
+        Asyncio counterpart of fetch, the planned windows are requested concurrently.
+
+        :param fetch_coro: Coroutine function taking (start_ts, end_ts), both inclusive.
+        :return: List of the raw responses, one per API call, in dt order.
+        """
+        calls = self._plan_and_record(start_ts, end_ts, known_hours)
+        return list(await asyncio.gather(*(fetch_coro(call_start, call_end) for call_start, call_end in calls)))
+
+    def _plan_and_record(self, start_ts, end_ts, known_hours):
+        """
+        Plan the calls for an interval and add it to the counters.
+        """
+        wanted = len(self.hour_range(start_ts, end_ts))
+        calls = self.plan(start_ts, end_ts, known_hours)
+        missing = len(self.missing_hours(start_ts, end_ts, known_hours))
+        logging.info(f"Range plan: {wanted} hours wanted, {wanted - missing} stored, "
+                     f"{missing} missing in {len(calls)} call(s).")
+        with self._lock:
+            self.stats["hours_requested"] += wanted
+            self.stats["hours_from_cache"] += wanted - missing
+            self.stats["hours_fetched"] += missing
+            self.stats["api_calls"] += len(calls)
+        return calls
+
+    @staticmethod
+    def stitch(responses, start_ts=None, end_ts=None, extra_hours=()):
+        """
+        Merge the hourly lists of several history responses into one response.
+
+        Entries are deduplicated on their hour bucket and returned sorted by dt; later responses
+        win over earlier ones and over extra_hours. Metadata is taken from the first response.
+
+        :param responses: History API JSONs to merge.
+        :param start_ts: (optional) Drop entries before this timestamp.
+        :param end_ts: (optional) Drop entries at or after this timestamp.
+        :param extra_hours: Additional hourly entries, e.g. the ones loaded from storage.
+        :return: A history API shaped JSON.
+        """
+        hours = {}
+        for entry in extra_hours:
+            hours[int(entry["dt"]) // HOUR * HOUR] = entry
+        for response in responses:
+            for entry in response.get("list", []):
+                hours[int(entry["dt"]) // HOUR * HOUR] = entry
+        if start_ts is not None or end_ts is not None:
+            low = start_ts if start_ts is not None else float("-inf")
+            high = end_ts if end_ts is not None else float("inf")
+            hours = {dt: entry for dt, entry in hours.items() if low <= entry["dt"] < high}
+
+        merged = {key: value for key, value in responses[0].items() if key != "list"} if responses else {"cod": "200"}
+        merged["list"] = [hours[dt] for dt in sorted(hours)]
+        merged["cnt"] = len(merged["list"])
+        merged["message"] = f"Count: {merged['cnt']}"
+        merged["calctime"] = sum(response.get("calctime", 0) for response in responses)
+        return merged
+
+    def get_stats(self):
+        """
+        Snapshot of the planner counters, plus the share of hours served from storage.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats["cache_hit_ratio"] = stats["hours_from_cache"] / stats["hours_requested"] if stats["hours_requested"] else 0.0
+        return stats
+
+    def reset_stats(self):
+        """
+        Zero all counters.
+        """
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
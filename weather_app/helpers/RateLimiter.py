@@ -0,0 +1,214 @@
+# File: helpers/RateLimiter.py
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from filelock import FileLock
+from pymongo import errors
+from weather_app.handlers.ApiHandler import TooManyRequestsError
+
+
+class QuotaExceededError(TooManyRequestsError):
+    """Raised when the client side quota is used up and waiting would not help (monthly limit, timeout)."""
+    pass
+
+
+def _current_month():
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+class MemoryRateLimitBackend:
+    """
+    Keeps the limiter state in process memory, shared by all handlers holding the same limiter.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+
+    def update(self, fn):
+        """
+        Atomically apply fn to the state. fn receives the state dict and returns (new_state, result).
+        """
+        with self._lock:
+            self._state, result = fn(dict(self._state))
+            return result
+
+
+class FileRateLimitBackend:
+    """
+    Keeps the limiter state in a JSON file guarded by a file lock, so every process on one
+    machine pointing at the same path shares a single budget.
+    """
+    def __init__(self, path):
+        """
+        :param path: Path of the JSON state file; a "<path>.lock" file is created next to it.
+        """
+        self.path = path
+        self._lock = FileLock(path + ".lock")
+
+    def update(self, fn):
+        with self._lock:
+            state = {}
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    try:
+                        state = json.load(f)
+                    except ValueError:
+                        logging.warning(f"Corrupt rate limiter state in {self.path}, starting over.")
+            state, result = fn(state)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+            return result
+
+
+class MongoRateLimitBackend:
+    """
+    Keeps the limiter state in one MongoDB document, so processes on different machines sharing
+    the database also share the budget. Updates use optimistic concurrency on a version field.
+    """
+    def __init__(self, mongo_handler, collection_name="rate_limits", key="openweather"):
+        """
+        :param mongo_handler: An instance of MongoHandler.
+        :param collection_name: Collection holding the limiter documents.
+        :param key: _id of the document, limiters with the same key share a budget.
+        """
+        self.collection = mongo_handler.get_collection(collection_name)
+        self.key = key
+
+    def update(self, fn):
+        while True:
+            document = self.collection.find_one({"_id": self.key}) or {}
+            version = document.pop("version", None)
+            document.pop("_id", None)
+            state, result = fn(document)
+            if version is None:
+                try:
+                    self.collection.insert_one(dict(state, _id=self.key, version=1))
+                    return result
+                except errors.DuplicateKeyError:
+                    # someone else created the document first, retry against it
+                    continue
+            updated = self.collection.update_one({"_id": self.key, "version": version},
+                                                 {"$set": dict(state, version=version + 1)})
+            if updated.matched_count == 1:
+                return result
+
+
+class RateLimiter:
+    """
+    Client side token bucket limiting calls per minute, plus an optional monthly call quota.
+
+    ApiHandler consults the limiter before every request (including retries). Bursts above
+    the per-minute rate are smoothed by making the caller wait for the next token instead of
+    letting the API answer with 429; only a used-up monthly quota or a wait longer than
+    max_wait raises QuotaExceededError.
+    """
+    def __init__(self, calls_per_minute=60, calls_per_month=None, burst=None, backend=None, max_wait=300.0):
+        """
+        :param calls_per_minute: Sustained number of calls allowed per minute.
+        :param calls_per_month: (optional) Hard number of calls allowed per calendar month (UTC).
+        :param burst: (optional) Bucket capacity, i.e. calls allowed back to back (default: calls_per_minute).
+        :param backend: (optional) State backend, defaults to MemoryRateLimitBackend.
+        :param max_wait: Longest time in seconds acquire waits for a token before giving up.
+        """
+        if calls_per_minute <= 0:
+            raise ValueError("calls_per_minute must be positive.")
+        self.calls_per_minute = calls_per_minute
+        self.calls_per_month = calls_per_month
+        self.rate = calls_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else calls_per_minute)
+        self.backend = backend if backend is not None else MemoryRateLimitBackend()
+        self.max_wait = max_wait
+
+    def _refill(self, state, now):
+        """
+        Bring a state up to date: add tokens for the elapsed time and reset the monthly counter.
+        """
+        tokens = state.get("tokens", self.capacity)
+        updated = state.get("updated", now)
+        state["tokens"] = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+        state["updated"] = now
+        month = _current_month()
+        if state.get("month") != month:
+            state["month"] = month
+            state["month_calls"] = 0
+        return state
+
+    def _take(self, tokens):
+        """
+        Try to take tokens; return 0 on success or the number of seconds to wait otherwise.
+        """
+        def take(state):
+            state = self._refill(state, time.time())
+            if self.calls_per_month is not None and state["month_calls"] + tokens > self.calls_per_month:
+                return state, None
+            if state["tokens"] >= tokens:
+                state["tokens"] -= tokens
+                state["month_calls"] += tokens
+                return state, 0.0
+            return state, (tokens - state["tokens"]) / self.rate
+
+        wait = self.backend.update(take)
+        if wait is None:
+            raise QuotaExceededError(f"Monthly quota of {self.calls_per_month} calls used up.")
+        return wait
+
+    def acquire(self, tokens=1):
+        """
+        Block until tokens are available and take them.
+
+        :param tokens: Number of calls about to be made.
+        :raises QuotaExceededError: If the monthly quota is used up or the wait exceeds max_wait.
+        """
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = self._take(tokens)
+            if wait == 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise QuotaExceededError(f"No API budget available within {self.max_wait}s.")
+            logging.debug(f"Rate limiter: waiting {wait:.2f}s for a token.")
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        """
+        Asyncio counterpart of acquire, waits without blocking the event loop.
+
+        The file and Mongo backends block on a lock or a round trip, their updates run in a worker thread.
+        """
+        deadline = time.monotonic() + self.max_wait
+        in_memory = isinstance(self.backend, MemoryRateLimitBackend)
+        while True:
+            wait = self._take(tokens) if in_memory else await asyncio.to_thread(self._take, tokens)
+            if wait == 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise QuotaExceededError(f"No API budget available within {self.max_wait}s.")
+            await asyncio.sleep(wait)
+
+    def get_budget(self):
+        """
+        Current budget for monitoring, without taking any tokens.
+
+        :return: Dictionary with the available tokens and the monthly usage.
+        """
+        def refill(state):
+            state = self._refill(state, time.time())
+            return state, dict(state)
+
+        budget = self.backend.update(refill)
+        return {
+            "tokens_available": budget["tokens"],
+            "calls_per_minute": self.calls_per_minute,
+            "burst": self.capacity,
+            "month": budget["month"],
+            "month_calls": budget["month_calls"],
+            "calls_per_month": self.calls_per_month,
+            "month_remaining": None if self.calls_per_month is None else self.calls_per_month - budget["month_calls"],
+        }
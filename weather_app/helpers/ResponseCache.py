@@ -0,0 +1,267 @@
+# File: helpers/ResponseCache.py
+
+import os
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+DAY = 86400
+
+
+class MemoryCacheTier:
+    """
+    Bounded in-process LRU of response bodies.
+
+    Holds at most max_entries bodies and max_bytes bytes; the least recently used entries are
+    evicted first. Entries carry their expiry time (None for never).
+    """
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        """
+        :param max_entries: Maximum number of cached bodies.
+        :param max_bytes: Maximum total size of the cached bodies.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        """
+        :return: (body, expires_at), or None if the key is missing or expired (expired entries are dropped).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= now:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, expires_at):
+        """
+        Store a body, evicting least recently used entries as needed.
+
+        :return: Number of evicted entries.
+        """
+        if len(body) > self.max_bytes:
+            return 0
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (body, expires_at)
+            self.size += len(body)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        body, _ = self._entries.pop(key)
+        self.size -= len(body)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteCacheTier:
+    """
+    Persistent tier keeping zlib compressed bodies in a SQLite database.
+
+    Every thread uses its own connection; the database runs in WAL mode, so several processes
+    (e.g. backfill workers) can share one file.
+    """
+    def __init__(self, path):
+        """
+        :param path: Path of the SQLite database, created if missing.
+        """
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, body BLOB NOT NULL, "
+                               "expires_at REAL, stored_at REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at) "
+                               "WHERE expires_at IS NOT NULL")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key, now):
+        """
+        :return: (body, expires_at), or None if the key is missing or expired.
+        """
+        row = self._connection().execute("SELECT body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        return zlib.decompress(row[0]), row[1]
+
+    def put(self, key, body, expires_at, now):
+        with self._connection() as connection:
+            connection.execute("INSERT OR REPLACE INTO responses (key, body, expires_at, stored_at) VALUES (?, ?, ?, ?)",
+                               (key, zlib.compress(body), expires_at, now))
+
+    def purge_expired(self, now):
+        """
+        Delete expired entries.
+
+        :return: Number of deleted entries.
+        """
+        with self._connection() as connection:
+            return connection.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                                      (now,)).rowcount
+
+    def clear(self):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM responses")
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def __len__(self):
+        return self._connection().execute("SELECT count(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Two-tier cache of raw API response bodies: a bounded in-memory LRU in front of an optional
+    SQLite file that survives restarts.
+
+    The handler decides how long a response stays valid. A TTL of None means it never expires
+    (history hours of days that are over, see history_ttl), a positive TTL is used for data
+    that may still change and 0 disables caching for that response. A hit in the persistent
+    tier is promoted to the memory tier with its remaining lifetime.
+
+        cache = ResponseCache(path="cache/responses.sqlite")
+        weather_handler = WeatherApiHandler(api_root, api_key, response_cache=cache)
+        geolocation_handler = GeolocationApiHandler(geo_root, api_key, response_cache=cache)
+
+    Bodies are stored, not parsed objects, so every caller decodes its own copy.
+    """
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, path=None, recent_ttl=600,
+                 revision_window=DAY, static_ttl=30 * DAY):
+        """
+        :param max_entries: Maximum number of bodies in the memory tier.
+        :param max_bytes: Maximum total size of the bodies in the memory tier.
+        :param path: (optional) SQLite database of the persistent tier, no persistent tier if None.
+        :param recent_ttl: Seconds a history response covering the revision window stays valid.
+        :param revision_window: Seconds during which the API may still revise an hour.
+        :param static_ttl: Seconds responses of slowly changing data (geocoding) stay valid.
+        """
+        self.memory = MemoryCacheTier(max_entries, max_bytes)
+        self.disk = SqliteCacheTier(path) if path else None
+        self.recent_ttl = recent_ttl
+        self.revision_window = revision_window
+        self.static_ttl = static_ttl
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def history_ttl(self, end_ts, now=None):
+        """
+        TTL of a history response whose last hour starts at end_ts.
+
+        :return: None (never expires) once the day of end_ts is over and the hour left the
+                 revision window, recent_ttl otherwise.
+        """
+        now = time.time() if now is None else now
+        day_over = (int(end_ts) // DAY + 1) * DAY <= now
+        if day_over and end_ts + self.revision_window <= now:
+            return None
+        return self.recent_ttl
+
+    def get(self, key):
+        """
+        Look a body up in the memory tier, then in the persistent one.
+
+        :param key: Cache key, e.g. the normalized URL.
+        :return: The body as bytes, or None on a miss.
+        """
+        now = time.time()
+        entry = self.memory.get(key, now)
+        if entry is not None:
+            self._count("memory_hits")
+            return entry[0]
+        if self.disk is not None:
+            entry = self.disk.get(key, now)
+            if entry is not None:
+                self._count("disk_hits")
+                self._count("evictions", self.memory.put(key, entry[0], entry[1]))
+                return entry[0]
+        self._count("misses")
+        return None
+
+    def put(self, key, body, ttl=None):
+        """
+        Store a body in both tiers.
+
+        :param key: Cache key.
+        :param body: Response body as bytes.
+        :param ttl: Seconds the body stays valid, None for never, 0 to not cache it.
+        """
+        if ttl == 0:
+            return
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        self._count("evictions", self.memory.put(key, body, expires_at))
+        if self.disk is not None:
+            self.disk.put(key, body, expires_at, now)
+        self._count("stores")
+
+    def purge_expired(self):
+        """
+        Delete expired entries from the persistent tier (the memory tier drops them on access).
+
+        :return: Number of deleted entries.
+        """
+        if self.disk is None:
+            return 0
+        deleted = self.disk.purge_expired(time.time())
+        logging.info(f"Response cache: purged {deleted} expired entries.")
+        return deleted
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+    def _count(self, name, amount=1):
+        if amount:
+            with self._lock:
+                self.stats[name] += amount
+
+    def get_stats(self):
+        """
+        Snapshot of the counters, plus the hit ratio and the size of the memory tier.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        stats["memory_bytes"] = self.memory.size
+        return stats
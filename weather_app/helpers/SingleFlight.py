@@ -0,0 +1,132 @@
+# File: helpers/SingleFlight.py
+
+import asyncio
+import threading
+
+# result handed to the waiters of a cancelled do_async leader, so they retry
+_LEADER_CANCELLED = object()
+
+
+class _Call:
+    """
+    One in-flight call of SingleFlight.do, awaited by the callers that arrive while it runs.
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one.
+
+    The first caller of a key runs the function; callers arriving while it is still running do
+    not start their own, they wait for it and get the same result or exception. Once the call
+    returns the key is released, so later callers start a fresh call (nothing is cached).
+
+    do serves threads, do_async serves coroutines of any event loop; both can share an instance:
+
+        single_flight = SingleFlight()
+        response = single_flight.do(url, lambda: session.get(url))
+        body = await single_flight.do_async(url, lambda: fetch(url))
+
+    Results are handed to every waiter as they are, so they should be treated as read-only. A
+    cancelled do_async caller cancels only itself: if it was running the call, one of the waiters
+    runs it again.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.stats = {"calls": 0, "executed": 0, "shared": 0}
+
+    def do(self, key, fn):
+        """
+        Run fn, or wait for the in-flight call with the same key.
+
+        :param key: Hashable identifier of the call.
+        :param fn: Callable without arguments.
+        :return: The result of fn (of this or of the in-flight call).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count(leader)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, coro_fn):
+        """
+        Asyncio counterpart of do: await coro_fn(), or the in-flight call with the same key in this event loop.
+
+        :param key: Hashable identifier of the call.
+        :param coro_fn: Coroutine function without arguments.
+        :return: The result of the coroutine.
+        """
+        loop = asyncio.get_running_loop()
+        retry = False
+        while True:
+            with self._lock:
+                future = self._async_calls.get((loop, key))
+                leader = future is None
+                if leader:
+                    future = self._async_calls[(loop, key)] = loop.create_future()
+                if not retry:
+                    self._count(leader)
+                elif leader:
+                    # a waiter taking over the call of a cancelled leader
+                    self.stats["shared"] -= 1
+                    self.stats["executed"] += 1
+            if leader:
+                break
+            # shielded, so a cancelled waiter does not cancel the call the others wait for
+            result = await asyncio.shield(future)
+            if result is not _LEADER_CANCELLED:
+                return result
+            # the leader was cancelled: elect a new one among the waiters instead of cancelling them too
+            retry = True
+        try:
+            result = await coro_fn()
+        except asyncio.CancelledError:
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # the leader raises it itself, nobody else has to retrieve it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._async_calls[(loop, key)]
+
+    def _count(self, leader):
+        self.stats["calls"] += 1
+        self.stats["executed" if leader else "shared"] += 1
+
+    def get_stats(self):
+        """
+        Snapshot of the counters, plus the share of calls that were served by another call.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats["shared_ratio"] = stats["shared"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
@@ -0,0 +1,161 @@
+# File: helpers/SyntheticWeather.py
+
+import math
+import numpy as np
+
+HOUR = 3600
+COUNTRIES = ("CZ", "DE", "GB", "FR", "US", "CA", "BR", "IN", "CN", "AU", "ZA", "NO", "ES", "IT", "JP")
+
+
+def _condition(rain, snow, clouds):
+    """
+    OpenWeather condition (id, main, description, icon) matching the simulated hour.
+    """
+    if snow > 0:
+        return (600, "Snow", "light snow", "13d") if snow < 1.0 else (601, "Snow", "snow", "13d")
+    if rain > 0:
+        if rain < 2.5:
+            return 500, "Rain", "light rain", "10d"
+        if rain < 7.6:
+            return 501, "Rain", "moderate rain", "10d"
+        return 502, "Rain", "heavy intensity rain", "10d"
+    if clouds < 11:
+        return 800, "Clear", "clear sky", "01d"
+    if clouds < 25:
+        return 801, "Clouds", "few clouds", "02d"
+    if clouds < 50:
+        return 802, "Clouds", "scattered clouds", "03d"
+    if clouds < 85:
+        return 803, "Clouds", "broken clouds", "04d"
+    return 804, "Clouds", "overcast clouds", "04d"
+
+
+class SyntheticWeather:
+    """
+    Deterministic generator of realistic looking history API data for load tests and benchmarks
+    (requirement 5 of sql_scripts/create_tables.sql).
+
+    Every synthetic city gets a climate from its latitude: a seasonal and a daily temperature
+    cycle with autocorrelated noise, wet and dry spells from a two state Markov chain with
+    exponentially distributed rain intensity (snow below freezing), and clouds, humidity,
+    pressure and wind consistent with them. Responses have the shape of WeatherApiHandler
+    results, so they can be fed to every storage path:
+
+        generator = SyntheticWeather(cities=1000, seed=42)
+        for response, city, lat, lon in generator.histories(start_ts, hours=24 * 30):
+            hourly_store.ingest(response, city)
+
+    The same seed always produces the same cities and the same weather.
+    """
+    def __init__(self, cities=1000, seed=0, wet_probability=0.05, stay_wet_probability=0.7, mean_rain=1.2):
+        """
+        :param cities: Number of synthetic cities.
+        :param seed: Seed of the random generators.
+        :param wet_probability: Probability that a dry hour is followed by a wet one.
+        :param stay_wet_probability: Probability that a wet hour is followed by another wet one.
+        :param mean_rain: Mean precipitation of a wet hour in mm.
+        """
+        self.seed = seed
+        self.wet_probability = wet_probability
+        self.stay_wet_probability = stay_wet_probability
+        self.mean_rain = mean_rain
+        rng = np.random.default_rng(seed)
+        # uniform over the sphere between 60S and 70N, where most people (and weather stations) are
+        latitudes = np.degrees(np.arcsin(rng.uniform(math.sin(math.radians(-60)), math.sin(math.radians(70)), cities)))
+        longitudes = rng.uniform(-180.0, 180.0, cities)
+        countries = rng.choice(COUNTRIES, cities)
+        self.cities = [{"name": f"Synthetic City {i:05d}", "lat": round(float(lat), 4), "lon": round(float(lon), 4),
+                        "country": str(country), "city_id": 9000000 + i}
+                       for i, (lat, lon, country) in enumerate(zip(latitudes, longitudes, countries))]
+
+    def history(self, city, start_ts, hours):
+        """
+        Simulate consecutive hours of one city.
+
+        :param city: Index of the city or one of the dictionaries in self.cities.
+        :param start_ts: Unix timestamp of the first hour (rounded down to a full hour).
+        :param hours: Number of hours.
+        :return: A history API shaped JSON.
+        """
+        if not isinstance(city, dict):
+            city = self.cities[city]
+        start_ts = int(start_ts) // HOUR * HOUR
+        # one independent, reproducible stream per city and start
+        rng = np.random.default_rng([self.seed, city["city_id"], start_ts])
+        dts = start_ts + np.arange(hours, dtype=np.int64) * HOUR
+        lat = city["lat"]
+
+        day_of_year = (dts // 86400) % 365.25
+        local_hour = ((dts % 86400) / HOUR + city["lon"] / 15.0) % 24
+        seasonal_amplitude = 2.0 + 14.0 * abs(lat) / 70.0
+        seasonal = -math.copysign(1.0, lat) * seasonal_amplitude * np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+        diurnal = 4.0 * np.sin(2 * np.pi * (local_hour - 9) / 24)
+        noise = np.empty(hours)
+        shocks = rng.normal(0.0, 0.6, hours)
+        level = rng.normal(0.0, 2.0)
+        for i in range(hours):
+            level = 0.95 * level + shocks[i]
+            noise[i] = level
+        temp = 301.0 - 0.45 * abs(lat) + seasonal + diurnal + noise
+
+        wet = self._wet_hours(rng, hours)
+        precipitation = np.where(wet, np.round(rng.exponential(self.mean_rain, hours), 2), 0.0)
+        snowing = wet & (temp < 273.15)
+        clouds = np.where(wet, rng.integers(70, 101, hours), np.round(rng.beta(0.8, 1.2, hours) * 100)).astype(int)
+        humidity = np.clip(np.round(45 + 0.4 * clouds + rng.normal(0, 6, hours)), 10, 100).astype(int)
+        pressure = np.round(1013 + rng.normal(0, 6, hours) - 8 * wet).astype(int)
+        wind_speed = np.round(rng.gamma(2.0, 1.8, hours), 2)
+        wind_deg = rng.integers(0, 360, hours)
+
+        entries = []
+        for i in range(hours):
+            t = round(float(temp[i]), 2)
+            rain = float(precipitation[i]) if wet[i] and not snowing[i] else 0.0
+            snow = float(precipitation[i]) if snowing[i] else 0.0
+            condition_id, main, description, icon = _condition(rain, snow, clouds[i])
+            entry = {
+                "dt": int(dts[i]),
+                "main": {"temp": t, "feels_like": round(t - 0.3 * float(wind_speed[i]), 2),
+                         "pressure": int(pressure[i]), "humidity": int(humidity[i]),
+                         "temp_min": round(t - 0.5, 2), "temp_max": round(t + 0.5, 2)},
+                "wind": {"speed": float(wind_speed[i]), "deg": int(wind_deg[i])},
+                "clouds": {"all": int(clouds[i])},
+                "weather": [{"id": condition_id, "main": main, "description": description, "icon": icon}],
+            }
+            if rain:
+                entry["rain"] = {"1h": rain}
+            if snow:
+                entry["snow"] = {"1h": snow}
+            entries.append(entry)
+        return {"message": f"Count: {hours}", "cod": "200", "city_id": city["city_id"], "calctime": 0.0,
+                "cnt": hours, "list": entries}
+
+    def histories(self, start_ts, hours, cities=None, chunk_hours=168):
+        """
+        Simulate every city, yielding history responses of at most chunk_hours (one API call each).
+
+        :param start_ts: Unix timestamp of the first hour.
+        :param hours: Number of hours per city.
+        :param cities: (optional) Number of cities to use, defaults to all of them.
+        :param chunk_hours: Hours per yielded response.
+        :return: Generator of (response, city name, latitude, longitude).
+        """
+        for city in self.cities[:cities]:
+            for offset in range(0, hours, chunk_hours):
+                response = self.history(city, start_ts + offset * HOUR, min(chunk_hours, hours - offset))
+                yield response, city["name"], city["lat"], city["lon"]
+
+    def _wet_hours(self, rng, hours):
+        """
+        Two state Markov chain of dry and wet hours, drawn as alternating geometric run lengths.
+        """
+        stationary_wet = self.wet_probability / (self.wet_probability + 1 - self.stay_wet_probability)
+        wet = np.zeros(hours, dtype=bool)
+        position, is_wet = 0, rng.random() < stationary_wet
+        while position < hours:
+            leave = 1 - self.stay_wet_probability if is_wet else self.wet_probability
+            length = int(rng.geometric(leave))
+            wet[position:position + length] = is_wet
+            position += length
+            is_wet = not is_wet
+        return wet
@@ -0,0 +1,235 @@
+# File: helpers/WeatherCache.py
+
+import time
+import logging
+import threading
+from pymongo import ASCENDING, errors
+from weather_app.handlers.WeatherApiHandler import WeatherApiHandler, WeatherApiError
+from weather_app.helpers.RangePlanner import RangePlanner, HOUR
+
+# locations are spread over this many locks, see WeatherCache.get_hour_range
+LOCATION_LOCK_STRIPES = 64
+DAY = 86400
+
+
+def hour_bucket(ts):
+    """
+    Round a unix timestamp down to the start of its hour.
+    """
+    return int(ts) // HOUR * HOUR
+
+
+def location_key(city, latitude, longitude):
+    """
+    Build the cache key part identifying a location.
+
+    City names are case insensitive, coordinates are rounded to 4 decimal places (~11 m),
+    so the same place asked for twice always maps onto the same key. A key passed as the city
+    (e.g. the "coord:..." name HourlyWeatherStore gives places without a city) is returned as is.
+    """
+    if city and city.startswith(("city:", "coord:")):
+        return city
+    if city:
+        return f"city:{city.strip().lower()}"
+    if latitude is None or longitude is None:
+        raise WeatherApiError("Either city or latitude and longitude must be provided.")
+    return f"coord:{round(float(latitude), 4)},{round(float(longitude), 4)}"
+
+
+class WeatherCache:
+    """
+    Read-through cache in front of WeatherApiHandler.
+
+    Every hourly entry of a history response is stored as its own document keyed on
+    (location, dt hour bucket). A request first loads the hours it already has from MongoDB,
+    lets the RangePlanner ask the API only for the hours that are missing and merges both into
+    a response shaped like the one returned by the history API.
+
+    Concurrent requests for overlapping intervals of one location are coalesced: a request with
+    missing hours waits while another one is fetching for the same location, then reloads the
+    cache and asks the API only for what is still missing.
+
+    Hours inside a fetched window that the API did not return (gaps in the history, the last hour
+    not published yet) are stored as markers, so they are not asked for again. Markers of hours
+    younger than recent_window expire after missing_ttl seconds, older ones are kept.
+    """
+    def __init__(self, weather_handler, mongo_handler, collection_name="weather_cache", range_planner=None,
+                 geocode_cache=None, missing_ttl=600, recent_window=DAY):
+        """
+        Initialize the cache.
+
+        :param weather_handler: An instance of WeatherApiHandler used on cache misses.
+        :param mongo_handler: An instance of MongoHandler used as the cache storage.
+        :param collection_name: Name of the collection holding the cached hours.
+        :param range_planner: (optional) RangePlanner to use, defaults to the one of the weather handler.
+        :param geocode_cache: (optional) GeocodeCache snapping coordinate requests onto known cities.
+        :param missing_ttl: Seconds a marker of a recent hour the API did not return stays valid.
+        :param recent_window: Age in seconds below which an hour may still be published by the API.
+        """
+        self.weather_handler = weather_handler
+        self.mongo_handler = mongo_handler
+        self.collection_name = collection_name
+        self.geocode_cache = geocode_cache
+        self.missing_ttl = missing_ttl
+        self.recent_window = recent_window
+        if range_planner is None:
+            range_planner = getattr(weather_handler, "range_planner", None) or RangePlanner()
+        self.range_planner = range_planner
+        self.last_json = None
+        # created on first use, so constructing the cache does not touch the database
+        self._indexes_ready = False
+        self._location_locks = [threading.Lock() for _ in range(LOCATION_LOCK_STRIPES)]
+
+    def ensure_indexes(self):
+        """
+        Create the unique (location, dt) index the cache lookups rely on.
+        """
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        collection.create_index([("location", ASCENDING), ("dt", ASCENDING)], unique=True)
+        self._indexes_ready = True
+
+    def get_weather_by_interval(self, city, latitude, longitude, start, end, occurrence_type="hour"):
+        """
+        Cached counterpart of WeatherApiHandler.get_weather_by_interval, covering the same hours
+        (the hour starting at end included).
+
+        :param start: Start date as a string in "mm/dd/yyyy" format.
+        :param end: End date as a string in "mm/dd/yyyy" format.
+        :return: A history API shaped JSON.
+        """
+        start_ts, end_ts = WeatherApiHandler._interval_range(start, end)
+        return self.get_hour_range(city, latitude, longitude, start_ts, end_ts, occurrence_type)
+
+    def get_weather_n_days_into_past_by_date(self, city, latitude, longitude, end, count, occurrence_type="hour"):
+        """
+        Cached counterpart of WeatherApiHandler.get_weather_n_days_into_past_by_date, covering the same hours.
+
+        :param end: Date string in "mm/dd/yyyy" format representing the end day.
+        :param count: Number of days of data to retrieve, ending on the end date.
+        :return: A history API shaped JSON.
+        """
+        start_ts, end_ts = WeatherApiHandler._past_range(end, count, occurrence_type)
+        return self.get_hour_range(city, latitude, longitude, start_ts, end_ts, occurrence_type)
+
+    def get_weather_by_timestamps(self, city, latitude, longitude, start_ts, end_ts, occurrence_type="hour"):
+        """
+        Cached counterpart of WeatherApiHandler.get_weather_by_timestamps: both timestamps are
+        inclusive, so the hour containing end_ts is returned too.
+
+        :return: A history API shaped JSON.
+        """
+        return self.get_hour_range(city, latitude, longitude, start_ts, hour_bucket(end_ts) + HOUR, occurrence_type)
+
+    def get_hour_range(self, city, latitude, longitude, start_ts, end_ts, occurrence_type="hour"):
+        """
+        Return all hourly entries in [start_ts, end_ts) for a location, fetching only missing hours.
+
+        :param start_ts: Start of the interval as a unix timestamp (inclusive).
+        :param end_ts: End of the interval as a unix timestamp (exclusive).
+        :return: A history API shaped JSON with the merged hourly entries.
+        """
+        started = time.perf_counter()
+        if not self._indexes_ready:
+            self.ensure_indexes()
+        key = location_key(city, latitude, longitude)
+        if not city and self.geocode_cache is not None:
+            # coordinates near a known city share its cache entries and are fetched at its coordinates;
+            # keyed by those coordinates, as places of different countries may share a name
+            known = self.geocode_cache.snap(latitude, longitude)
+            if known is not None:
+                key = location_key(None, known["lat"], known["lon"])
+                latitude, longitude = known["lat"], known["lon"]
+        start_bucket = hour_bucket(start_ts)
+
+        cached = self._load(key, start_bucket, end_ts)
+        if self.range_planner.missing_hours(start_bucket, end_ts, cached):
+            with self._location_locks[hash(key) % LOCATION_LOCK_STRIPES]:
+                # a concurrent request for this location may have stored the missing hours meanwhile
+                cached = self._load(key, start_bucket, end_ts)
+                responses = self._fetch_missing(key, city, latitude, longitude, start_bucket, end_ts,
+                                                occurrence_type, cached)
+        else:
+            responses = self._fetch_missing(key, city, latitude, longitude, start_bucket, end_ts,
+                                            occurrence_type, cached)
+        city_id = next((doc.get("city_id") for doc in cached.values() if doc.get("city_id")), None)
+        for response in responses:
+            city_id = response.get("city_id") or city_id
+
+        self.last_json = RangePlanner.stitch(responses, start_bucket, end_ts,
+                                             extra_hours=[doc["entry"] for doc in cached.values() if "entry" in doc])
+        self.last_json["city_id"] = city_id
+        self.last_json["calctime"] = time.perf_counter() - started
+        return self.last_json
+
+    def _fetch_missing(self, key, city, latitude, longitude, start_ts, end_ts, occurrence_type, cached):
+        """
+        Fetch the hours missing from cached and store them; cached is updated in place.
+
+        :return: List of the API responses.
+        """
+        windows = []
+
+        def fetch(call_start, call_end):
+            windows.append((call_start, call_end))
+            return self.weather_handler.get_weather_by_timestamps(city, latitude, longitude, call_start, call_end,
+                                                                  occurrence_type)
+
+        responses = self.range_planner.fetch(fetch, start_ts, end_ts, cached)
+        city_id = next((doc.get("city_id") for doc in cached.values() if doc.get("city_id")), None)
+        for (call_start, call_end), response in zip(windows, responses):
+            city_id = response.get("city_id") or city_id
+            # planned windows may span short runs of hours we already have, store only the new ones
+            fetched = {hour_bucket(entry["dt"]): entry for entry in response.get("list", [])
+                       if start_ts <= entry["dt"] < end_ts and hour_bucket(entry["dt"]) not in cached}
+            not_returned = [dt for dt in RangePlanner.hour_range(call_start, call_end + HOUR)
+                            if start_ts <= dt < end_ts and dt not in cached and dt not in fetched]
+            self._store(key, fetched, city_id, not_returned)
+            cached.update({dt: {"entry": entry, "city_id": city_id} for dt, entry in fetched.items()})
+            cached.update({dt: {"missing": True} for dt in not_returned})
+        return responses
+
+    def _load(self, key, start_ts, end_ts):
+        """
+        Load cached hours for a location, keyed by their hour bucket.
+
+        Markers of hours the API did not return count as cached until they expire; expired markers
+        are deleted, so the hour is fetched (and stored) again.
+        """
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        cursor = collection.find({"location": key, "dt": {"$gte": start_ts, "$lt": end_ts}},
+                                 {"_id": 0, "dt": 1, "entry": 1, "city_id": 1, "missing": 1, "expires_at": 1})
+        now = time.time()
+        cached, expired = {}, []
+        for doc in cursor:
+            if doc.get("missing") and doc.get("expires_at") is not None and doc["expires_at"] <= now:
+                expired.append(doc["dt"])
+            else:
+                cached[doc["dt"]] = doc
+        if expired:
+            collection.delete_many({"location": key, "dt": {"$in": expired}, "missing": True})
+        return cached
+
+    def _store(self, key, entries, city_id, not_returned=()):
+        """
+        Insert fetched hourly entries, one document per (location, hour), and markers of the hours
+        the API did not return.
+
+        Only hours that were not cached yet are stored, so a plain unordered insert is enough; duplicates
+        from a concurrent writer are rejected by the unique index and ignored.
+        """
+        if not entries and not not_returned:
+            return
+        collection = self.mongo_handler.get_collection(self.collection_name)
+        documents = [{"location": key, "dt": dt, "entry": entry, "city_id": city_id}
+                     for dt, entry in entries.items()]
+        now = time.time()
+        documents += [{"location": key, "dt": dt, "missing": True,
+                       "expires_at": now + self.missing_ttl if dt + self.recent_window > now else None}
+                      for dt in not_returned]
+        try:
+            result = collection.insert_many(documents, ordered=False)
+            logging.info(f"Weather cache {key}: stored {len(result.inserted_ids)} hours.")
+        except errors.BulkWriteError as bwe:
+            if any(error.get("code") != 11000 for error in bwe.details.get("writeErrors", [])):
+                raise bwe
+            logging.info(f"Weather cache {key}: stored {bwe.details.get('nInserted', 0)} hours (rest already cached).")
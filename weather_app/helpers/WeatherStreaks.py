@@ -0,0 +1,167 @@
+# File: helpers/WeatherStreaks.py
+
+from datetime import datetime, timezone
+import numpy as np
+from weather_app.helpers.RainQuery import day_range, DAY
+from weather_app.helpers.WeatherCache import location_key
+
+# per day: hours, mean cloudiness and whether every hour had the condition; consecutive matching
+# days share the same (day - row_number), which identifies their island. The city matches case
+# insensitively, like location_key does for the other engines (idx_weather_data_city_key_dt)
+POSTGRES_STREAKS = """
+WITH days AS (
+    SELECT wd.dt::date AS day, count(*) AS cnt, avg(wd.clouds) AS clouds,
+           bool_and(wc.description IS NOT DISTINCT FROM %(condition)s) AS same
+    FROM weather_data wd
+    LEFT JOIN weather_conditions wc ON wc.city_name = wd.city_name AND wc.dt = wd.dt
+    WHERE lower(btrim(wd.city_name)) = lower(btrim(%(city)s))
+      AND wd.dt >= to_timestamp(%(start)s) AT TIME ZONE 'UTC' AND wd.dt < to_timestamp(%(end)s) AT TIME ZONE 'UTC'
+    GROUP BY wd.dt::date
+), islands AS (
+    SELECT day, cnt, clouds, day - (row_number() OVER (ORDER BY day))::int AS island
+    FROM days WHERE same
+)
+SELECT array_agg(day ORDER BY day), array_agg(clouds ORDER BY day), array_agg(cnt ORDER BY day)
+FROM islands GROUP BY island HAVING count(*) >= %(min_length)s ORDER BY min(day)
+"""
+
+
+def _day_string(day):
+    if isinstance(day, (int, float, np.integer)):
+        return datetime.fromtimestamp(int(day), timezone.utc).strftime("%Y-%m-%d")
+    return str(day)
+
+
+def _streak(days, clouds, counts):
+    """
+    Build the common result shape of one streak from its per day columns.
+    """
+    daily = [{"day": _day_string(day), "clouds": None if c is None or c != c else float(c), "cnt": int(n)}
+             for day, c, n in zip(days, clouds, counts)]
+    return {"start_day": daily[0]["day"], "end_day": daily[-1]["day"], "days": len(daily), "daily": daily}
+
+
+class WeatherStreaks:
+    """
+    Finds runs of consecutive days on which a place had the same weather the whole day
+    (requirement 3b) and reports clouds (mean cloudiness) and cnt (number of hourly records)
+    for each of those days.
+
+    This is a gaps-and-islands problem: the matching days are numbered in order, and days whose
+    date minus their number is equal belong to one streak. It is solved server side with window
+    functions (PostgreSQL) or $setWindowFields (MongoDB 5.0+), or with NumPy over hourly arrays
+    already in memory. All engines return the same list of streaks:
+
+        [{"start_day": "2025-04-01", "end_day": "2025-04-03", "days": 3,
+          "daily": [{"day": "2025-04-01", "clouds": 75.0, "cnt": 24}, ...]}, ...]
+
+    The condition is a weather description ("light rain", "overcast clouds", ...), the field
+    both the weather_conditions table and HourlyWeatherStore keep.
+    """
+    def __init__(self, postgres_handler=None, hourly_store=None):
+        """
+        Initialize the engine; either backend may be omitted.
+
+        :param postgres_handler: (optional) An instance of PostgresDbHandler.
+        :param hourly_store: (optional) An instance of HourlyWeatherStore.
+        """
+        self.postgres_handler = postgres_handler
+        self.hourly_store = hourly_store
+
+    def find_streaks(self, city, start_day, end_day, condition, min_length=1, engine=None):
+        """
+        Find the streaks of days in [start_day, end_day] on which every hour had the condition.
+
+        :param city: City name.
+        :param start_day: First day as a string in "mm/dd/yyyy" format.
+        :param end_day: Last day (inclusive) as a string in "mm/dd/yyyy" format.
+        :param condition: Weather description that has to hold the whole day.
+        :param min_length: Shortest streak (in days) to report.
+        :param engine: "postgres", "mongo" or "numpy"; by default postgres if configured, otherwise mongo.
+        :return: List of streaks ordered by their first day.
+        """
+        if engine is None:
+            engine = "postgres" if self.postgres_handler is not None else "mongo"
+        if engine == "postgres":
+            return self.streaks_postgres(city, start_day, end_day, condition, min_length)
+        if engine == "mongo":
+            return self.streaks_mongo(city, start_day, end_day, condition, min_length)
+        if engine == "numpy":
+            start_ts, end_ts = day_range(start_day, end_day)
+            hours = list(self.hourly_store.find_range(city, start_ts, end_ts,
+                                                      {"_id": 0, "dt": 1, "clouds": 1, "weather_description": 1}))
+            return self.streaks_numpy([hour["dt"] for hour in hours],
+                                      [hour.get("weather_description") for hour in hours],
+                                      [hour.get("clouds") for hour in hours], condition, min_length)
+        raise ValueError(f"Unknown streak engine: {engine}")
+
+    def streaks_postgres(self, city, start_day, end_day, condition, min_length=1):
+        """
+        Streaks computed in PostgreSQL with row_number() over the matching days.
+        """
+        start_ts, end_ts = day_range(start_day, end_day)
+        rows = self.postgres_handler.execute_query(POSTGRES_STREAKS, {
+            "city": city, "start": start_ts, "end": end_ts, "condition": condition, "min_length": min_length})
+        return [_streak(days, clouds, counts) for days, clouds, counts in rows]
+
+    def streaks_mongo(self, city, start_day, end_day, condition, min_length=1):
+        """
+        Streaks computed in MongoDB with an aggregation pipeline over the HourlyWeatherStore collection.
+        """
+        start_ts, end_ts = day_range(start_day, end_day)
+        collection = self.hourly_store.mongo_handler.get_collection(self.hourly_store.collection_name)
+        pipeline = [
+            {"$match": {"location": location_key(city, None, None), "dt": {"$gte": start_ts, "$lt": end_ts}}},
+            {"$group": {"_id": {"$subtract": ["$dt", {"$mod": ["$dt", DAY]}]},
+                        "cnt": {"$sum": 1}, "clouds": {"$avg": "$clouds"},
+                        "same": {"$min": {"$cond": [{"$eq": ["$weather_description", condition]}, 1, 0]}}}},
+            {"$match": {"same": 1}},
+            {"$setWindowFields": {"sortBy": {"_id": 1}, "output": {"n": {"$documentNumber": {}}}}},
+            {"$group": {"_id": {"$subtract": [{"$divide": ["$_id", DAY]}, "$n"]},
+                        "first": {"$min": "$_id"}, "days": {"$push": {"day": "$_id", "clouds": "$clouds", "cnt": "$cnt"}}}},
+            {"$match": {f"days.{min_length - 1}": {"$exists": True}}},
+            {"$sort": {"first": 1}},
+        ]
+        streaks = []
+        for island in collection.aggregate(pipeline):
+            days = sorted(island["days"], key=lambda day: day["day"])
+            streaks.append(_streak([day["day"] for day in days], [day["clouds"] for day in days],
+                                   [day["cnt"] for day in days]))
+        return streaks
+
+    @staticmethod
+    def streaks_numpy(dts, conditions, clouds, condition, min_length=1):
+        """
+        Streaks computed with NumPy over hourly columns already in memory.
+
+        :param dts: Unix timestamps of the hours, in any order.
+        :param conditions: Weather description of every hour.
+        :param clouds: Cloudiness of every hour (None if unknown).
+        :param condition: Weather description that has to hold the whole day.
+        :param min_length: Shortest streak (in days) to report.
+        :return: List of streaks ordered by their first day.
+        """
+        if len(dts) == 0:
+            return []
+        dts = np.asarray(dts, dtype=np.int64)
+        order = np.argsort(dts, kind="stable")
+        days = dts[order] // DAY * DAY
+        matches = (np.asarray(conditions, dtype=object)[order] == condition).astype(np.int8)
+        cloud_values = np.array([np.nan if c is None else c for c in np.asarray(clouds, dtype=object)[order]],
+                                dtype=float)
+
+        unique_days, first_hour, counts = np.unique(days, return_index=True, return_counts=True)
+        same = np.minimum.reduceat(matches, first_hour) == 1
+        known = ~np.isnan(cloud_values)
+        cloud_sums = np.add.reduceat(np.where(known, cloud_values, 0.0), first_hour)
+        cloud_counts = np.add.reduceat(known.astype(np.int64), first_hour)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cloud_means = np.where(cloud_counts > 0, cloud_sums / np.maximum(cloud_counts, 1), np.nan)
+
+        matching = np.flatnonzero(same)
+        if matching.size == 0:
+            return []
+        # a new island starts wherever the next matching day is not the following calendar day
+        breaks = np.flatnonzero(np.diff(unique_days[matching]) != DAY) + 1
+        return [_streak(unique_days[island], cloud_means[island], counts[island])
+                for island in np.split(matching, breaks) if island.size >= min_length]
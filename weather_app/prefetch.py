@@ -0,0 +1,81 @@
+# File: prefetch.py
+"""
+Prefetch scheduler: keeps the weather cache warm for tracked locations.
+
+    python -m weather_app.prefetch track --city London --days 7
+    python -m weather_app.prefetch track --lat 50.0755 --lon 14.4378 --days 3
+    python -m weather_app.prefetch untrack --city London
+    python -m weather_app.prefetch list
+    python -m weather_app.prefetch run --interval 900
+    python -m weather_app.prefetch run --once
+
+`run` refreshes every tracked location each --interval seconds until it receives SIGINT or
+SIGTERM; the location being refreshed is finished first. Configuration is read from the .env
+files like everywhere else (see HandlerFactory.get_prefetch_scheduler); API_CALLS_PER_MONTH
+together with PREFETCH_QUOTA_RESERVE keeps part of the monthly quota for interactive use.
+"""
+
+import os
+import sys
+import json
+import signal
+import logging
+import argparse
+from weather_app.helpers.HandlerFactory import HandlerFactory
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ENV_PATHS = [os.path.join(PROJECT_DIR, ".env.local"), os.path.join(PROJECT_DIR, ".env.public")]
+
+
+def add_location_arguments(parser):
+    parser.add_argument("--city")
+    parser.add_argument("--lat", type=float)
+    parser.add_argument("--lon", type=float)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--env", action="append", help="A .env file to load (repeatable, default: .env.local and "
+                                                       ".env.public of the project).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    track = commands.add_parser("track", help="Start keeping a location warm.")
+    add_location_arguments(track)
+    track.add_argument("--days", type=int, default=7, help="Past days kept in the cache.")
+    untrack = commands.add_parser("untrack", help="Stop keeping a location warm.")
+    add_location_arguments(untrack)
+    commands.add_parser("list", help="Print the tracked locations.")
+    run = commands.add_parser("run", help="Run the scheduler.")
+    run.add_argument("--interval", type=int, default=3600, help="Seconds between two rounds.")
+    run.add_argument("--once", action="store_true", help="Run a single round and exit.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    scheduler = HandlerFactory(args.env or DEFAULT_ENV_PATHS).get_prefetch_scheduler()
+
+    try:
+        if args.command == "track":
+            print(scheduler.track(args.city, args.lat, args.lon, days=args.days))
+        elif args.command == "untrack":
+            if not scheduler.untrack(args.city, args.lat, args.lon):
+                print("Location was not tracked.", file=sys.stderr)
+                return 1
+        elif args.command == "list":
+            for location in scheduler.tracked():
+                print(json.dumps(location))
+        elif args.once:
+            print(json.dumps(scheduler.run_once()))
+        else:
+            def shutdown(signum, frame):
+                logging.info(f"Received {signal.Signals(signum).name}, stopping after the current location.")
+                scheduler.stop()
+
+            signal.signal(signal.SIGINT, shutdown)
+            signal.signal(signal.SIGTERM, shutdown)
+            scheduler.run_forever(interval=args.interval)
+    finally:
+        scheduler.mongo_handler.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import unittest
+from unittest import mock
+from weather_app.handlers.ApiHandler import ApiHandler, UnauthorizedError
+from weather_app.handlers.WeatherApiHandler import WeatherApiHandler
+from weather_app.handlers.GeolocationApiHandler import GeolocationApiHandler
+
+
+class TestApiHandlerHealthCheck(unittest.TestCase):
+    def setUp(self):
+        ApiHandler._health_checks.clear()
+        self.transport = mock.Mock()
+        self.transport.get.return_value = mock.Mock(status_code=200, json=lambda: {"cod": "200"})
+
+    def test_construction_does_not_touch_the_network(self):
+        WeatherApiHandler("http://example.com/history", "key", transport=self.transport)
+        GeolocationApiHandler("http://example.com/geo", "key", transport=self.transport)
+        self.transport.get.assert_not_called()
+
+    def test_health_check_is_cached_for_ttl(self):
+        first = WeatherApiHandler("http://example.com/history", "key", transport=self.transport)
+        second = WeatherApiHandler("http://example.com/history", "key", transport=self.transport)
+        self.assertTrue(first.health_check())
+        self.assertTrue(second.health_check())
+        self.assertEqual(self.transport.get.call_count, 1)
+        self.assertEqual(first.last_json, {"cod": "200"})
+
+        second.health_check(force=True)
+        self.assertEqual(self.transport.get.call_count, 2)
+
+        second.health_check_ttl = 0
+        second.health_check()
+        self.assertEqual(self.transport.get.call_count, 3)
+
+    def test_failed_health_check_raises_and_is_not_cached(self):
+        self.transport.get.return_value = mock.Mock(status_code=401, json=lambda: {})
+        handler = GeolocationApiHandler("http://example.com/geo", "key", transport=self.transport)
+        with self.assertRaises(UnauthorizedError):
+            handler.health_check()
+        with self.assertRaises(UnauthorizedError):
+            handler.health_check()
+
+    def test_background_health_check(self):
+        handler = GeolocationApiHandler("http://example.com/geo", "key", transport=self.transport)
+        thread = handler.health_check(background=True)
+        thread.join(5)
+        self.assertEqual(handler.last_json, {"cod": "200"})
+
+
+if __name__ == '__main__':
+    unittest.main()
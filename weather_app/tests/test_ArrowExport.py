@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import mongomock
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.ArrowExport import ArrowExport, HOURLY_SCHEMA, POSTGRES_EXPORT
+from weather_app.helpers.HourlyWeatherStore import HourlyWeatherStore, normalize_history
+from weather_app.helpers.SyntheticWeather import SyntheticWeather
+
+START_TS = 1706659200  # 01/31/2024 00:00 UTC
+HOUR = 3600
+
+
+class TestArrowExport(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mongomock.MongoClient()
+        self.mongo_handler = MongoHandler("mongodb://fake_connection", "test_db")
+        self.mongo_handler.client = self.mock_client
+        self.mongo_handler.db = self.mock_client["test_db"]
+        self.mock_client.drop_database("test_db")
+        self.store = HourlyWeatherStore(self.mongo_handler, daily_collection_name=None)
+
+        # three cities, 48 hours across the January/February boundary
+        self.generator = SyntheticWeather(cities=3, seed=2, wet_probability=0.3)
+        collection = self.mongo_handler.get_collection(self.store.collection_name)
+        for response, city, lat, lon in self.generator.histories(START_TS, 48):
+            collection.insert_many(normalize_history(response, city, lat, lon))
+        self.cities = [city["name"] for city in self.generator.cities]
+        self.export = ArrowExport(hourly_store=self.store, batch_size=20)
+
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def test_iter_batches_pushes_the_range_down(self):
+        batches = list(self.export.iter_batches(self.cities[:2], START_TS + 10 * HOUR, START_TS + 30 * HOUR))
+        self.assertEqual([batch.num_rows for batch in batches], [20, 20])
+        table = self.export.to_table(self.cities[:2], START_TS + 10 * HOUR, START_TS + 30 * HOUR)
+        self.assertEqual(table.schema, HOURLY_SCHEMA)
+        self.assertEqual(table.column("city").unique().to_pylist(), self.cities[:2])
+        self.assertEqual(table.column("dt")[0].value, START_TS + 10 * HOUR)
+        self.assertEqual(table.column("dt")[19].value, START_TS + 29 * HOUR)
+
+    def test_parquet_round_trip(self):
+        self.assertEqual(self.export.to_parquet(self.path, self.cities, START_TS, START_TS + 48 * HOUR), 3 * 48)
+        city_directory = os.path.join(self.path, f"city={self.cities[0].replace(' ', '%20')}")
+        self.assertEqual(sorted(os.listdir(city_directory)), ["month=2024-01", "month=2024-02"])
+
+        table = ArrowExport.read_parquet(self.path)
+        self.assertEqual(table.num_rows, 3 * 48)
+        self.assertEqual(table.schema.field("dt").type, HOURLY_SCHEMA.field("dt").type)
+        self.assertEqual(table.drop_columns(["month"]).select(HOURLY_SCHEMA.names).to_pylist(),
+                         self.export.to_table(self.cities, START_TS, START_TS + 48 * HOUR).to_pylist())
+
+    def test_read_parquet_filters(self):
+        self.export.to_parquet(self.path, self.cities, START_TS, START_TS + 48 * HOUR)
+        table = ArrowExport.read_parquet(self.path, [self.cities[1]], START_TS + 30 * HOUR, START_TS + 33 * HOUR,
+                                         columns=["dt", "temp"])
+        self.assertEqual(table.column_names, ["dt", "temp"])
+        self.assertEqual([dt.value for dt in table.column("dt")], [START_TS + h * HOUR for h in (30, 31, 32)])
+
+    def test_reexport_replaces_partitions(self):
+        self.export.to_parquet(self.path, self.cities, START_TS, START_TS + 48 * HOUR)
+        self.export.to_parquet(self.path, self.cities, START_TS, START_TS + 48 * HOUR)
+        self.assertEqual(ArrowExport.read_parquet(self.path).num_rows, 3 * 48)
+
+    def test_postgres_source(self):
+        postgres_handler = mock.Mock()
+        postgres_handler.stream_query.return_value = iter([
+            ("Louisville", START_TS, 275.45, 274.26, 276.48, 271.7, 1014, 74, 90, 2.16, 87, None, 0.9, 0.0,
+             "moderate rain", "10n")])
+        table = ArrowExport(postgres_handler=postgres_handler).to_table(["Louisville"], START_TS, START_TS + HOUR)
+        postgres_handler.stream_query.assert_called_once_with(
+            POSTGRES_EXPORT, {"cities": ["Louisville"], "start": START_TS, "end": START_TS + HOUR}, itersize=10000)
+        self.assertEqual(table.to_pylist()[0]["rain"], 0.9)
+        with self.assertRaises(ValueError):
+            list(ArrowExport(postgres_handler=postgres_handler).iter_batches(["x"], 0, 1, source="csv"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import time
+import asyncio
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from weather_app.handlers.ApiHandler import NotFoundError
+from weather_app.handlers.AsyncWeatherApiHandler import AsyncWeatherApiHandler
+from weather_app.handlers.AsyncGeolocationApiHandler import AsyncGeolocationApiHandler
+from weather_app.helpers.RangePlanner import RangePlanner, HOUR
+
+
+class TestAsyncWeatherApiHandler(unittest.IsolatedAsyncioTestCase):
+    """
+    Runs the async handlers against a local aiohttp server imitating the history and geocoding APIs.
+    """
+    async def asyncSetUp(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+
+        app = web.Application()
+        app.router.add_get("/history/city", self.history)
+        app.router.add_get("/geo/reverse", self.reverse)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        root = str(self.server.make_url("/"))
+        self.handler = AsyncWeatherApiHandler(root + "history", "key", max_concurrency=4,
+                                              range_planner=RangePlanner(max_hours_per_call=24))
+        self.geo_handler = AsyncGeolocationApiHandler(root + "geo", "key")
+
+    async def asyncTearDown(self):
+        await self.handler.close()
+        await self.geo_handler.close()
+        await self.server.close()
+
+    async def history(self, request):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.02)
+        self.in_flight -= 1
+        if request.query.get("q") == "Atlantis":
+            return web.json_response({"cod": "404", "message": "city not found"}, status=404)
+        start, end = int(request.query["start"]), int(request.query["end"])
+        hours = [{"dt": dt, "main": {"temp": 280.0}} for dt in range(start, end + 1, HOUR)]
+        return web.json_response({"cod": "200", "city_id": 1, "cnt": len(hours), "list": hours})
+
+    async def reverse(self, request):
+        return web.json_response([{"name": "Beijing", "lat": float(request.query["lat"])}])
+
+    async def test_long_interval_is_split_and_stitched(self):
+        end_ts = int(time.time()) // HOUR * HOUR - 86400
+        start_ts = end_ts - 3 * 86400
+        result = await self.handler._fetch_range("London", None, None, start_ts, end_ts, "hour")
+        self.assertEqual(self.requests, 3)
+        self.assertEqual([entry["dt"] for entry in result["list"]], list(range(start_ts, end_ts, HOUR)))
+
+    async def test_fetch_many_is_concurrent_and_bounded(self):
+        end_ts = int(time.time()) // HOUR * HOUR - 86400
+        cities = [f"City{i}" for i in range(12)] + ["Atlantis"]
+        results = await self.handler.fetch_many(self.handler.get_weather_by_timestamps,
+                                                [(city, None, None, end_ts - 5 * HOUR, end_ts) for city in cities])
+        self.assertEqual(len(results), 13)
+        self.assertTrue(all(result["cnt"] == 6 for result in results[:-1]))
+        self.assertIsInstance(results[-1], NotFoundError)
+        self.assertGreater(self.max_in_flight, 1)
+        self.assertLessEqual(self.max_in_flight, 4)
+
+    async def test_reverse_geocode(self):
+        result = await self.geo_handler.reverse_geocode(39.9042, 116.4074)
+        self.assertEqual(result[0]["name"], "Beijing")
+
+
+class TestAsyncApiHandlerEventLoops(unittest.TestCase):
+    def test_handler_is_reusable_across_event_loops(self):
+        handler = AsyncWeatherApiHandler("http://example.com/history", "key", max_concurrency=1)
+
+        async def contend():
+            async def hold():
+                async with handler._get_semaphore():
+                    await asyncio.sleep(0.01)
+            await asyncio.gather(hold(), hold())
+            return handler._get_semaphore()
+
+        first = asyncio.run(contend())
+        second = asyncio.run(contend())
+        self.assertIsNot(first, second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import time
+import unittest
+from unittest import mock
+import mongomock
+from concurrent.futures.process import BrokenProcessPool
+from pymongo import errors
+from weather_app.handlers.ApiHandler import NotFoundError
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.Backfill import Backfill, DAY
+from weather_app.helpers.HourlyWeatherStore import HourlyWeatherStore
+from weather_app.helpers.RateLimiter import QuotaExceededError
+from weather_app.helpers.WeatherCache import HOUR
+from weather_app.tests.test_HourlyWeatherStore import apply_bulk_write
+from weather_app.tests.test_PrefetchScheduler import FailingWeatherApiHandler
+from weather_app.tests.test_WeatherCache import FakeWeatherApiHandler
+
+
+class TestBackfill(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mongomock.MongoClient()
+        self.mongo_handler = MongoHandler("mongodb://fake_connection", "test_db")
+        self.mongo_handler.client = self.mock_client
+        self.mongo_handler.db = self.mock_client["test_db"]
+        self.mock_client.drop_database("test_db")
+        self.store = HourlyWeatherStore(self.mongo_handler, daily_collection_name=None)
+        patcher = mock.patch.object(mongomock.collection.Collection, "bulk_write",
+                                    lambda collection, operations, ordered=True: apply_bulk_write(collection, operations))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.start = (int(time.time()) - 10 * DAY) // DAY * DAY
+
+    def hours(self):
+        return self.mongo_handler.get_collection("weather_hourly").count_documents({})
+
+    def test_plan(self):
+        units = Backfill.plan(["London", {"lat": 50.0755, "lon": 14.4378}], self.start + 5 * HOUR,
+                              self.start + 2 * DAY)
+        self.assertEqual([unit["_id"] for unit in units],
+                         [f"city:london|{self.start}", f"city:london|{self.start + DAY}",
+                          f"coord:50.0755,14.4378|{self.start}", f"coord:50.0755,14.4378|{self.start + DAY}"])
+
+    def test_run_and_resume(self):
+        api = FakeWeatherApiHandler()
+        backfill = Backfill(api, self.store, workers=3)
+        progress = []
+        summary = backfill.run(["London", "Prague"], self.start, self.start + 3 * DAY, on_progress=progress.append)
+        self.assertEqual((summary["units"], summary["done"], summary["failed"], summary["hours"]), (6, 6, 0, 144))
+        self.assertEqual(progress[-1]["done"], 6)
+        self.assertEqual(progress[-1]["eta_seconds"], 0.0)
+        self.assertEqual(sorted(api.calls)[:1], [(self.start, self.start + DAY - HOUR)])
+        self.assertEqual(self.hours(), 144)
+
+        # a re-run over a longer range only fetches the new days
+        api.calls.clear()
+        summary = backfill.run(["London", "Prague"], self.start, self.start + 4 * DAY)
+        self.assertEqual((summary["skipped"], summary["done"]), (6, 2))
+        self.assertEqual(len(api.calls), 2)
+
+        # after a reset the units run again without duplicating hours
+        self.assertEqual(backfill.reset(["London"]), 4)
+        summary = backfill.run(["London", "Prague"], self.start, self.start + 4 * DAY)
+        self.assertEqual((summary["done"], summary["changed"]), (4, 0))
+        self.assertEqual(self.hours(), 192)
+
+    def test_unfinished_day_is_not_checkpointed(self):
+        backfill = Backfill(FakeWeatherApiHandler(), self.store)
+        now = self.start + DAY + 5 * HOUR
+        summary = backfill.run(["London"], self.start, self.start + 2 * DAY, now=now)
+        self.assertEqual((summary["done"], summary["partial"]), (1, 1))
+        self.assertEqual(len(backfill.pending(backfill.plan(["London"], self.start, self.start + 2 * DAY))), 1)
+
+    def test_failures_are_recorded_and_retried(self):
+        api = FailingWeatherApiHandler({"Atlantis": NotFoundError("404")})
+        backfill = Backfill(api, self.store)
+        summary = backfill.run(["Atlantis", "London"], self.start, self.start + 2 * DAY)
+        self.assertEqual((summary["done"], summary["failed"]), (2, 2))
+        checkpoints = self.mongo_handler.get_collection("backfill_checkpoints")
+        self.assertEqual(checkpoints.count_documents({"status": "failed", "failures": 1}), 2)
+
+        del api.failures["Atlantis"]
+        summary = backfill.run(["Atlantis", "London"], self.start, self.start + 2 * DAY)
+        self.assertEqual((summary["skipped"], summary["done"]), (2, 2))
+        self.assertEqual(checkpoints.count_documents({"status": "done", "error": {"$exists": False}}), 4)
+
+    def test_storage_errors_fail_only_their_unit(self):
+        backfill = Backfill(FakeWeatherApiHandler(), self.store, workers=2)
+
+        def runner(unit):
+            if unit["day"] == self.start + DAY:
+                raise errors.AutoReconnect("connection reset")
+            return backfill.run_unit(unit)
+
+        summary = backfill.run(["London"], self.start, self.start + 5 * DAY, runner=runner)
+        self.assertEqual((summary["done"], summary["failed"]), (4, 1))
+        checkpoints = self.mongo_handler.get_collection("backfill_checkpoints")
+        failed = checkpoints.find_one({"status": "failed"})
+        self.assertEqual(failed["day"], self.start + DAY)
+        self.assertEqual(failed["error"], "connection reset")
+        self.assertEqual(checkpoints.count_documents({"status": "done"}), 4)
+
+    def test_broken_executor_stops_scheduling(self):
+        backfill = Backfill(FakeWeatherApiHandler(), self.store, workers=1)
+
+        def runner(unit):
+            raise BrokenProcessPool("a worker process died")
+
+        summary = backfill.run(["London"], self.start, self.start + 8 * DAY, runner=runner)
+        self.assertEqual((summary["done"], summary["failed"]), (0, 2))
+
+    def test_quota_stops_scheduling(self):
+        api = FailingWeatherApiHandler({"London": QuotaExceededError("monthly quota")})
+        backfill = Backfill(api, self.store, workers=1)
+        summary = backfill.run(["London"], self.start, self.start + 8 * DAY)
+        # the window of two in-flight units is drained, nothing else is submitted
+        self.assertEqual(summary["failed"], 2)
+        self.assertEqual(summary["done"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
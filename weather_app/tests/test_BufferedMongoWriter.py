@@ -0,0 +1,74 @@
+import time
+import unittest
+from unittest import mock
+import mongomock
+from pymongo import errors
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.BufferedMongoWriter import BufferedMongoWriter
+
+
+class TestBufferedMongoWriter(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mongomock.MongoClient()
+        self.handler = MongoHandler("mongodb://fake_connection", "test_db")
+        self.handler.client = self.mock_client
+        self.handler.db = self.mock_client["test_db"]
+        self.mock_client.drop_database("test_db")
+
+    def test_flushes_by_size_with_one_retention_per_flush(self):
+        with mock.patch.object(self.handler, "data_retention") as retention:
+            with BufferedMongoWriter(self.handler, "weather_data", max_batch_size=10, background=False) as writer:
+                for i in range(25):
+                    writer.add({"data": i})
+                self.assertEqual(writer.flush_count, 2)
+                self.assertEqual(self.handler.get_document_count("weather_data"), 20)
+        self.assertEqual(writer.inserted_count, 25)
+        self.assertEqual(retention.call_count, 3)
+        self.assertEqual(self.handler.get_document_count("weather_data"), 25)
+
+    def test_flushes_by_time_in_background(self):
+        writer = BufferedMongoWriter(self.handler, "weather_data", max_batch_size=1000, max_latency=0.1)
+        writer.add_many([{"data": i} for i in range(3)])
+        deadline = time.monotonic() + 5
+        while writer.flush_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.handler.get_document_count("weather_data"), 3)
+        writer.close()
+        with self.assertRaises(RuntimeError):
+            writer.add({"data": "late"})
+
+    def test_failed_batches_are_kept_for_the_next_flush(self):
+        insert_documents = self.handler.insert_documents
+        failures = [None, errors.AutoReconnect("connection lost")]
+
+        def flaky_insert(*args, **kwargs):
+            failure = failures.pop(0) if failures else None
+            if failure is not None:
+                raise failure
+            return insert_documents(*args, **kwargs)
+
+        writer = BufferedMongoWriter(self.handler, "weather_data", max_batch_size=10, background=False)
+        with mock.patch.object(self.handler, "insert_documents", side_effect=flaky_insert):
+            # the second of three batches fails, it and the third one stay buffered
+            with self.assertRaises(errors.AutoReconnect):
+                writer.add_many([{"data": i} for i in range(25)])
+            self.assertEqual(self.handler.get_document_count("weather_data"), 10)
+            self.assertEqual(writer.inserted_count, 10)
+            writer.close()
+        self.assertEqual(writer.inserted_count, 25)
+        self.assertEqual(sorted(document["data"] for document in self.handler.db["weather_data"].find()),
+                         list(range(25)))
+
+    def test_duplicates_of_a_partial_bulk_write_are_not_retried(self):
+        self.handler.insert_document("weather_data", {"_id": 1, "data": "old"}, apply_retention=False)
+        writer = BufferedMongoWriter(self.handler, "weather_data", background=False)
+        writer.add_many([{"_id": 1, "data": "new"}, {"_id": 2, "data": "new"}])
+        with self.assertRaises(errors.BulkWriteError):
+            writer.flush()
+        self.assertEqual(writer.inserted_count, 1)
+        self.assertEqual(writer.flush(), 0)
+        self.assertEqual(self.handler.get_document_count("weather_data"), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
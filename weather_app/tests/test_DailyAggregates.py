@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+import mongomock
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.HourlyWeatherStore import HourlyWeatherStore
+from weather_app.helpers.DailyAggregates import DailyAggregates, DAY
+from weather_app.tests.test_HourlyWeatherStore import apply_bulk_write
+
+DAY_START = 1743465600  # 04/01/2025 00:00 UTC
+
+
+def history(temps, start=DAY_START, description="light rain", rain=None):
+    hours = []
+    for i, temp in enumerate(temps):
+        hour = {"dt": start + i * 3600, "main": {"temp": temp},
+                "weather": [{"id": 500, "main": "Rain", "description": description, "icon": "10d"}]}
+        if rain:
+            hour["rain"] = {"1h": rain}
+        hours.append(hour)
+    return {"cod": "200", "city_id": 1, "list": hours}
+
+
+class TestDailyAggregates(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mongomock.MongoClient()
+        self.mongo_handler = MongoHandler("mongodb://fake_connection", "test_db")
+        self.mongo_handler.client = self.mock_client
+        self.mongo_handler.db = self.mock_client["test_db"]
+        self.mock_client.drop_database("test_db")
+        patcher = mock.patch.object(mongomock.collection.Collection, "bulk_write",
+                                    lambda collection, operations, ordered=True: apply_bulk_write(collection, operations))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = HourlyWeatherStore(self.mongo_handler)
+        self.daily = self.store.daily_aggregates
+
+    def test_ingest_refreshes_daily_aggregates(self):
+        self.store.ingest(history([280.0, 284.0, 282.0], rain=0.5), "London")
+        day = self.daily.largest_spread_mongo(DAY_START)[0]
+        self.assertEqual((day["city"], day["day"], day["hours"]), ("London", DAY_START, 3))
+        self.assertEqual((day["temp_min"], day["temp_max"], day["temp_spread"]), (280.0, 284.0, 4.0))
+        self.assertAlmostEqual(day["temp_mean"], 282.0)
+        self.assertAlmostEqual(day["rain_total"], 1.5)
+        self.assertEqual(day["dominant_condition"], "light rain")
+
+        # more hours of the same day, mostly cloudy, update the aggregate in place
+        self.store.ingest(history([279.0] * 4, start=DAY_START + 3 * 3600, description="overcast clouds"), "London")
+        day = self.daily.largest_spread_mongo(DAY_START)[0]
+        self.assertEqual((day["hours"], day["temp_spread"], day["dominant_condition"]), (7, 5.0, "overcast clouds"))
+        self.assertEqual(self.mongo_handler.get_collection("weather_daily").count_documents({}), 1)
+
+    def test_only_new_days_are_refreshed(self):
+        self.store.ingest(history([280.0] * 24), "London")
+        with mock.patch.object(DailyAggregates, "refresh_mongo") as refresh:
+            # the first day is already stored, only the second one is new
+            self.store.ingest(history([280.0] * 48), "London")
+            refresh.assert_called_once_with("city:london", {DAY_START + DAY})
+            refresh.reset_mock()
+            self.store.ingest(history([280.0] * 48), "London")
+            refresh.assert_not_called()
+
+    def test_largest_spread_mongo(self):
+        self.store.ingest(history([280.0, 281.0]), "London")
+        self.store.ingest(history([270.0, 290.0]), "Prague")
+        self.store.ingest(history([275.0, 279.0]), "Paris")
+        self.store.ingest(history([250.0, 300.0], start=DAY_START + DAY), "Oslo")
+        places = self.daily.largest_spread_mongo(DAY_START + 5 * 3600, limit=2)
+        self.assertEqual([place["city"] for place in places], ["Prague", "Paris"])
+
+    def test_largest_spread_postgres(self):
+        postgres_handler = mock.Mock()
+        DailyAggregates(postgres_handler=postgres_handler).largest_spread_postgres("2025-04-01", limit=5)
+        sql, params = postgres_handler.execute_query.call_args.args
+        self.assertIn("ORDER BY temp_spread DESC", sql)
+        self.assertEqual(params, ("2025-04-01", 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import time
+import unittest
+import mongomock
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.GeocodeCache import GeocodeCache, geohash_encode, geohash_cells, haversine_km
+from weather_app.helpers.WeatherCache import WeatherCache, HOUR
+from weather_app.tests.test_WeatherCache import FakeWeatherApiHandler
+
+LONDON = {"name": "London", "lat": 51.5073, "lon": -0.1276, "country": "GB", "state": "England"}
+
+
+class FakeGeolocationApiHandler:
+    """
+    Stands in for GeolocationApiHandler, always answering London and counting the calls.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def reverse_geocode(self, lat, lon, limit=1):
+        self.calls.append(("reverse", lat, lon))
+        return [dict(LONDON)]
+
+    def direct_geocode(self, query, limit=1):
+        self.calls.append(("direct", query))
+        return [dict(LONDON)]
+
+
+class TestGeocodeCache(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mongomock.MongoClient()
+        self.mongo_handler = MongoHandler("mongodb://fake_connection", "test_db")
+        self.mongo_handler.client = self.mock_client
+        self.mongo_handler.db = self.mock_client["test_db"]
+        self.mock_client.drop_database("test_db")
+        self.api = FakeGeolocationApiHandler()
+        self.cache = GeocodeCache(self.api, self.mongo_handler, radius_km=5.0)
+
+    def test_geohash(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        cells = geohash_cells(51.5074, -0.1278, 5.0)
+        self.assertEqual(len(cells), 9)
+        self.assertIn(geohash_encode(51.5074, -0.1278)[:len(cells[0])], cells)
+        # cells wrap around the antimeridian
+        self.assertIn(geohash_encode(0.0, -179.99)[:len(cells[0])], geohash_cells(0.0, 179.99, 5.0))
+        self.assertEqual(geohash_cells(10.0, 10.0, 20000), [""])
+        self.assertAlmostEqual(haversine_km(51.5074, -0.1278, 48.8566, 2.3522), 343.5, delta=1)
+
+    def test_reverse_geocode_within_radius_is_local(self):
+        self.assertEqual(self.cache.reverse_geocode(51.5074, -0.1278)[0]["name"], "London")
+        # 2 km away still resolves to London without calling the API
+        self.assertEqual(self.cache.reverse_geocode(51.52, -0.10), [LONDON])
+        self.assertEqual(len(self.api.calls), 1)
+        # 20 km away is a miss
+        self.cache.reverse_geocode(51.69, -0.13)
+        self.assertEqual(len(self.api.calls), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+        self.assertEqual(self.mongo_handler.get_collection("geocode_cache").count_documents({}), 1)
+
+    def test_reverse_geocode_fewer_than_limit_is_a_miss(self):
+        self.cache.store([LONDON])
+        self.cache.reverse_geocode(51.52, -0.10, limit=2)
+        self.assertEqual(self.api.calls, [("reverse", 51.52, -0.10)])
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+    def test_direct_geocode(self):
+        self.cache.direct_geocode("London, GB")
+        self.assertEqual(self.cache.direct_geocode("london,gb"), [LONDON])
+        self.assertEqual(self.cache.direct_geocode("London, England, gb"), [LONDON])
+        self.assertEqual(self.api.calls, [("direct", "London, GB")])
+        # a plain name may be another London, it is answered locally only once asked
+        self.assertEqual(self.cache.direct_geocode("London"), [LONDON])
+        self.assertEqual(self.cache.direct_geocode("london"), [LONDON])
+        self.assertEqual(self.cache.direct_geocode("London, CA"), [LONDON])
+        self.assertEqual(self.api.calls, [("direct", "London, GB"), ("direct", "London"), ("direct", "London, CA")])
+
+    def test_direct_geocode_fewer_than_limit_is_a_miss(self):
+        self.cache.direct_geocode("London")
+        self.cache.direct_geocode("London", limit=5)
+        self.cache.direct_geocode("London, GB", limit=5)
+        self.assertEqual(len(self.api.calls), 3)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 3))
+
+    def test_snap(self):
+        self.assertIsNone(self.cache.snap(51.52, -0.10))
+        self.cache.store([LONDON])
+        self.assertEqual(self.cache.snap(51.52, -0.10)["name"], "London")
+        self.assertEqual(self.api.calls, [])
+
+    def test_weather_cache_snaps_coordinates(self):
+        self.cache.store([LONDON])
+        weather_api = FakeWeatherApiHandler()
+        weather_cache = WeatherCache(weather_api, self.mongo_handler, geocode_cache=self.cache)
+        start = (int(time.time()) - 7 * 86400) // HOUR * HOUR
+        weather_cache.get_hour_range(None, 51.52, -0.10, start, start + 6 * HOUR)
+        weather_cache.get_hour_range(None, 51.51, -0.12, start, start + 6 * HOUR)
+        self.assertEqual(len(weather_api.calls), 1)
+        # keyed by the coordinates of the known place, not by its name, which other places may share
+        locations = self.mongo_handler.get_collection("weather_cache").distinct("location")
+        self.assertEqual(locations, ["coord:51.5073,-0.1276"])
+        weather_cache.get_hour_range("London", None, None, start, start + 6 * HOUR)
+        self.assertEqual(len(weather_api.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
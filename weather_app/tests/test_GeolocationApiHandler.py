@@ -31,12 +31,13 @@ class TestGeolocationApiHandler(unittest.TestCase):
         if not cls.api_root or not cls.api_key:
             raise Exception("GEOCODING_API or OPEN_WEATHER_API_KEY not set in .env files")
 
-        # Instantiate the handler (dummy call is done in __init__)
+        # Instantiate the handler and run the health check (the former dummy call)
         cls.handler = GeolocationApiHandler(cls.api_root, cls.api_key)
+        cls.handler.health_check(force=True)
 
     def test_dummy_call(self):
         """
-        The dummy call in __init__ should have set last_json.
+        The health check should have set last_json.
         For the geocoding API, we expect a JSON array (list) as a response.
         """
         self.assertIsNotNone(self.handler.last_json)
@@ -59,5 +60,15 @@ class TestGeolocationApiHandler(unittest.TestCase):
         # Optionally, check if the name matches expected values (e.g., contains 'Beijing')
         self.assertIn("Beijing", result[0]["name"])
 
+    def test_direct_geocode_success(self):
+        """
+        Test forward geocoding of a city name, the result should carry its coordinates.
+        """
+        result = self.handler.direct_geocode("London,GB", limit=1)
+        self.assertIsInstance(result, list)
+        self.assertGreaterEqual(len(result), 1)
+        self.assertEqual(result[0]["country"], "GB")
+        self.assertAlmostEqual(result[0]["lat"], 51.5, delta=0.1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -38,14 +38,16 @@ class TestHandlerFactory(unittest.TestCase):
     def test_get_weather_handler(self):
         weather_handler = self.factory.get_weather_handler()
         self.assertIsInstance(weather_handler, WeatherApiHandler)
-        # Check that a dummy call was made and last_json is set
+        # Construction is lazy, force the health check call and check that last_json is set
+        self.assertTrue(weather_handler.health_check(force=True))
         self.assertIsNotNone(weather_handler.last_json)
         self.assertEqual(weather_handler.last_json.get("cod"), "200")
 
     def test_get_geolocation_handler(self):
         geolocation_handler = self.factory.get_geolocation_handler()
         self.assertIsInstance(geolocation_handler, GeolocationApiHandler)
-        # Check that a dummy call was made and last_json is set
+        # Construction is lazy, force the health check call and check that last_json is set
+        self.assertTrue(geolocation_handler.health_check(force=True))
         self.assertIsNotNone(geolocation_handler.last_json)
         self.assertIsInstance(geolocation_handler.last_json, list)
         self.assertGreaterEqual(len(geolocation_handler.last_json), 1)
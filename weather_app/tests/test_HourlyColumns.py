@@ -0,0 +1,92 @@
+import json
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from weather_app.handlers.WeatherApiHandler import WeatherApiHandler
+from weather_app.handlers.ReplayTransport import RecordingStore, ReplayTransport
+from weather_app.helpers.HourlyColumns import HourlyColumns, parse_history_stream
+from weather_app.helpers.SyntheticWeather import SyntheticWeather
+from weather_app.helpers.WeatherStreaks import WeatherStreaks
+from weather_app.tests.test_JsonToPostgres import RESPONSE
+from weather_app.tests.test_ReplayTransport import make_json_response, API_ROOT
+
+START_TS = 1704067200
+
+
+def chunked(text, size):
+    data = text.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestHourlyColumns(unittest.TestCase):
+    def setUp(self):
+        self.history = SyntheticWeather(cities=1, seed=4, wet_probability=0.3).history(0, START_TS, 72)
+
+    def test_stream_matches_decoded_response(self):
+        text = json.dumps(self.history, indent=1)
+        expected = HourlyColumns.from_response(self.history)
+        # chunks of 7 bytes split numbers, keys and escapes in every possible place
+        for size in (7, 100, len(text)):
+            columns = HourlyColumns.from_stream(chunked(text, size))
+            # compared as bytes, NaN never equals NaN
+            self.assertEqual(columns.data.tobytes(), expected.data.tobytes())
+            self.assertEqual(columns.conditions, expected.conditions)
+            self.assertEqual(columns.header["cnt"], 72)
+            self.assertIsNone(columns.raw)
+
+    def test_stream_handles_multibyte_characters_and_empty_lists(self):
+        response = {"cod": "200", "message": "Zürich – Count: 0", "list": [], "cnt": 0}
+        header = parse_history_stream(chunked(json.dumps(response, ensure_ascii=False), 3), lambda entry: None)
+        self.assertEqual(header, {"cod": "200", "message": "Zürich – Count: 0", "cnt": 0})
+        with self.assertRaises(ValueError):
+            parse_history_stream(chunked('{"list": [{"dt": 1}', 4), lambda entry: None)
+
+    def test_to_response_round_trip(self):
+        columns = HourlyColumns.from_response(RESPONSE)
+        self.assertEqual(columns.to_response(), RESPONSE)
+        self.assertTrue(np.isnan(columns["rain_volume"][1]))
+        self.assertEqual(list(columns.descriptions()), ["moderate rain", None])
+        self.assertEqual(json.loads(columns.raw_json()), RESPONSE)
+
+    def test_keep_raw(self):
+        text = json.dumps(RESPONSE)
+        self.assertEqual(HourlyColumns.from_stream(chunked(text, 5), keep_raw=True).raw, text)
+
+    def test_stitch(self):
+        first = HourlyColumns.from_response(SyntheticWeather(cities=1, seed=1).history(0, START_TS, 48))
+        second = HourlyColumns.from_response(self.history)
+        merged = HourlyColumns.stitch([first, second], START_TS + 3600, START_TS + 60 * 3600)
+        self.assertEqual(len(merged), 59)
+        self.assertTrue(np.all(np.diff(merged["dt"]) == 3600))
+        # later parts win and their conditions are remapped
+        np.testing.assert_array_equal(merged["temp"], second["temp"][1:60])
+        np.testing.assert_array_equal(merged.descriptions(), second.descriptions()[1:60])
+        self.assertEqual(merged.header["cnt"], 59)
+
+    def test_streaks_from_columns(self):
+        columns = HourlyColumns.from_response(self.history)
+        condition = columns.descriptions()[0]
+        streaks = WeatherStreaks.streaks_numpy(columns["dt"], columns.descriptions(), columns["clouds"], condition)
+        expected = WeatherStreaks.streaks_numpy([hour["dt"] for hour in self.history["list"]],
+                                                [hour["weather"][0]["description"] for hour in self.history["list"]],
+                                                [hour["clouds"]["all"] for hour in self.history["list"]], condition)
+        self.assertEqual(streaks, expected)
+
+    def test_handler_streams_columns(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        end_ts = START_TS + 71 * 3600
+        url = WeatherApiHandler._timestamps_url(API_ROOT, "key", "London", None, None, START_TS, end_ts, "hour")
+        RecordingStore(path).save(url, make_json_response(self.history))
+
+        handler = WeatherApiHandler(API_ROOT, "key", transport=ReplayTransport(path))
+        columns = handler.get_weather_columns_by_timestamps("London", None, None, START_TS, end_ts, keep_raw=True)
+        self.assertIsNone(handler.last_json)
+        self.assertEqual(len(columns), 72)
+        self.assertEqual(columns.city_id, self.history["city_id"])
+        self.assertEqual(json.loads(columns.raw), self.history)
+
+
+if __name__ == '__main__':
+    unittest.main()
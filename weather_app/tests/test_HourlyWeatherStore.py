@@ -0,0 +1,131 @@
+import unittest
+from unittest import mock
+import mongomock
+from pymongo.results import BulkWriteResult
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.handlers.MongoRetention import TtlRetention
+from weather_app.helpers.HourlyWeatherStore import HourlyWeatherStore, normalize_history, RAINY_HOURS_INDEX
+
+START = 1743465600
+
+RESPONSE = {
+    "cod": "200", "city_id": 2643743, "cnt": 3,
+    "list": [
+        {"dt": START, "main": {"temp": 280.1, "temp_min": 279.0, "temp_max": 281.0, "feels_like": 278.0,
+                               "pressure": 1013, "humidity": 81},
+         "wind": {"speed": 3.6, "deg": 200}, "clouds": {"all": 75},
+         "weather": [{"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"}],
+         "rain": {"1h": 0.4}},
+        {"dt": START + 3600, "main": {"temp": 281.0}, "clouds": {"all": 20},
+         "weather": [{"id": 801, "main": "Clouds", "description": "few clouds", "icon": "02d"}]},
+        {"dt": START + 7200, "main": {"temp": 282.0}},
+    ]
+}
+
+
+def apply_bulk_write(collection, operations):
+    """
+    mongomock cannot run pymongo's UpdateOne inside bulk_write, replay the upserts one by one instead.
+    """
+    upserted = []
+    modified = 0
+    for index, operation in enumerate(operations):
+        result = collection.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+        if result.upserted_id is not None:
+            upserted.append({"index": index, "_id": result.upserted_id})
+        modified += result.modified_count
+    return BulkWriteResult({"nUpserted": len(upserted), "nModified": modified, "nInserted": 0, "nMatched": 0,
+                            "nRemoved": 0, "upserted": upserted}, True)
+
+
+class TestHourlyWeatherStore(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mongomock.MongoClient()
+        self.mongo_handler = MongoHandler("mongodb://fake_connection", "test_db")
+        self.mongo_handler.client = self.mock_client
+        self.mongo_handler.db = self.mock_client["test_db"]
+        self.mock_client.drop_database("test_db")
+        self.store = HourlyWeatherStore(self.mongo_handler)
+        self.collection = self.mongo_handler.get_collection("weather_hourly")
+        patcher = mock.patch.object(mongomock.collection.Collection, "bulk_write",
+                                    lambda collection, operations, ordered=True: apply_bulk_write(collection, operations))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_normalize_history(self):
+        documents = normalize_history(RESPONSE, " London ")
+        self.assertEqual(len(documents), 3)
+        first = documents[0]
+        self.assertEqual((first["city"], first["dt"], first["city_id"]), ("London", START, 2643743))
+        self.assertEqual(first["location"], "city:london")
+        self.assertEqual((first["temp_min"], first["temp_max"], first["humidity"]), (279.0, 281.0, 81))
+        self.assertEqual((first["wind_speed"], first["wind_deg"], first["clouds"]), (3.6, 200, 75))
+        self.assertEqual((first["rain"], first["weather_id"], first["weather_main"]), (0.4, 500, "Rain"))
+        # hours without rain or weather conditions are still complete documents
+        self.assertEqual(documents[1]["rain"], 0.0)
+        self.assertIsNone(documents[2]["weather_id"])
+
+        by_coordinates = normalize_history(RESPONSE, None, 51.50741, -0.12779)
+        self.assertEqual(by_coordinates[0]["city"], "coord:51.5074,-0.1278")
+        self.assertEqual(by_coordinates[0]["location"], "coord:51.5074,-0.1278")
+
+    def test_ingest_is_idempotent(self):
+        self.assertEqual(self.store.ingest(RESPONSE, "London"), 3)
+        self.assertEqual(self.store.ingest(RESPONSE, "London"), 0)
+        self.assertEqual(self.collection.count_documents({}), 3)
+
+        hours = list(self.store.find_range("London", START, START + 7200))
+        self.assertEqual([hour["dt"] for hour in hours], [START, START + 3600])
+        self.assertNotIn("_id", hours[0])
+
+    def test_city_names_are_case_insensitive(self):
+        self.store.ingest(RESPONSE, "London")
+        self.assertEqual(self.store.ingest(RESPONSE, " london "), 0)
+        self.assertEqual(self.collection.count_documents({}), 3)
+        # the first spelling is kept for display
+        self.assertEqual(self.collection.distinct("city"), ["London"])
+        self.assertEqual(len(list(self.store.find_range("LONDON", START, START + 3 * 3600))), 3)
+        self.assertEqual(len(list(self.mongo_handler.get_collection("weather_daily").find())), 1)
+
+    def test_indexes(self):
+        self.store.ingest(RESPONSE, "London")
+        indexes = self.collection.index_information()
+        self.assertTrue(indexes["location_1_dt_1"]["unique"])
+        self.assertEqual(indexes[RAINY_HOURS_INDEX]["partialFilterExpression"], {"rain": {"$gt": 0}})
+
+    def test_legacy_indexes_are_replaced(self):
+        self.collection.create_index([("city", 1), ("dt", 1)], unique=True)
+        self.collection.create_index([("dt", 1), ("rain", 1)])
+        self.store.ensure_indexes()
+        indexes = self.collection.index_information()
+        self.assertNotIn("city_1_dt_1", indexes)
+        self.assertNotIn("dt_1_rain_1", indexes)
+        self.assertIn("location_1_dt_1", indexes)
+        self.assertIn(RAINY_HOURS_INDEX, indexes)
+
+    def test_retention_is_opt_in(self):
+        self.mongo_handler.retention_limit = 2
+        self.mongo_handler.delete_count = 1
+        self.assertEqual(self.store.ingest(RESPONSE, "London"), 3)
+        self.assertEqual(self.collection.count_documents({}), 3)
+        self.assertNotIn("ingested_at", self.collection.find_one({"dt": START}))
+
+        # opting in takes both the store and the handler
+        HourlyWeatherStore(self.mongo_handler, apply_retention=True).ingest(RESPONSE, "Paris")
+        self.assertEqual(self.collection.count_documents({}), 6)
+        self.mongo_handler.retained_collections = {"weather_hourly"}
+        HourlyWeatherStore(self.mongo_handler, apply_retention=True).ingest(RESPONSE, "Berlin")
+        self.assertEqual(self.collection.count_documents({}), 2)
+
+    def test_retention_stamp_only_on_first_ingest(self):
+        self.mongo_handler.retention = TtlRetention(3600)
+        self.mongo_handler.retained_collections = {"weather_hourly"}
+        self.store = HourlyWeatherStore(self.mongo_handler, apply_retention=True)
+        self.store.ingest(RESPONSE, "London")
+        stamped = self.collection.find_one({"dt": START})["ingested_at"]
+        self.store.ingest(RESPONSE, "London")
+        self.assertEqual(self.collection.find_one({"dt": START})["ingested_at"], stamped)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import io
+import logging
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+import requests
+from weather_app.handlers.HttpTransport import HttpTransport
+from weather_app.handlers.ApiHandler import ApiHandler, TooManyRequestsError, UnexpectedError
+
+
+def make_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = b'{"cod": "%d"}' % status_code
+    response.raw = io.BytesIO(response._content)
+    return response
+
+
+class TestHttpTransport(unittest.TestCase):
+    def setUp(self):
+        self.transport = HttpTransport(max_retries=2, backoff_factor=0.01)
+        sleep_patcher = mock.patch("weather_app.handlers.HttpTransport.time.sleep")
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def test_session_is_reused(self):
+        self.assertIs(HttpTransport.shared(), HttpTransport.shared())
+        handler = ApiHandler("http://example.com", "key", transport=self.transport)
+        self.assertIs(handler.transport.session, self.transport.session)
+
+    def test_retries_then_succeeds(self):
+        with mock.patch.object(self.transport.session, "get",
+                               side_effect=[make_response(503), make_response(200)]) as get:
+            response = self.transport.get("http://example.com/x")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_retry_after_header_is_honoured(self):
+        with mock.patch.object(self.transport.session, "get",
+                               side_effect=[make_response(429, {"Retry-After": "2"}), make_response(200)]):
+            self.transport.get("http://example.com/x")
+        self.sleep.assert_called_once_with(2.0)
+
+    def test_client_errors_are_not_retried(self):
+        with mock.patch.object(self.transport.session, "get", return_value=make_response(404)) as get:
+            self.transport.get("http://example.com/x")
+        self.assertEqual(get.call_count, 1)
+
+    def test_exhausted_retries_map_onto_handler_errors(self):
+        handler = ApiHandler("http://example.com", "key", transport=self.transport)
+        with mock.patch.object(self.transport.session, "get", return_value=make_response(429)) as get:
+            with self.assertRaises(TooManyRequestsError):
+                handler._get("http://example.com/x")
+        self.assertEqual(get.call_count, 3)
+
+        with mock.patch.object(self.transport.session, "get", side_effect=requests.ConnectionError("boom")):
+            with self.assertRaises(UnexpectedError):
+                handler._get("http://example.com/x")
+
+    def test_rate_limiter_is_consulted_before_every_attempt(self):
+        limiter = mock.Mock()
+        handler = ApiHandler("http://example.com", "key", transport=self.transport, rate_limiter=limiter)
+        with mock.patch.object(self.transport.session, "get",
+                               side_effect=[make_response(503), make_response(200)]):
+            handler._get("http://example.com/x")
+        self.assertEqual(limiter.acquire.call_count, 2)
+
+
+class JsonRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b'{"cod": "200"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpTransportLogging(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), JsonRequestHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_debug_log_redacts_api_key(self):
+        transport = HttpTransport(max_retries=0)
+        self.addCleanup(transport.close)
+        url = f"http://127.0.0.1:{self.server.server_port}/data/2.5/weather?q=London&appid=secret-key"
+        with self.assertLogs(level=logging.DEBUG) as logs:
+            self.assertEqual(transport.get(url).status_code, 200)
+        output = "\n".join(logs.output)
+        self.assertIn("/data/2.5/weather?q=London&appid=***", output)
+        self.assertNotIn("secret-key", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
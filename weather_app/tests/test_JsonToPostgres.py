@@ -0,0 +1,51 @@
+import unittest
+from weather_app.helpers.JsonToPostgres import JsonToPostgres, WEATHER_DATA_COLUMNS
+from weather_app.helpers.HourlyColumns import HourlyColumns
+
+RESPONSE = {
+    "cod": "200", "city_id": 4298960, "cnt": 2,
+    "list": [
+        {"dt": 1578384000,
+         "main": {"temp": 275.45, "feels_like": 271.7, "pressure": 1014, "humidity": 74,
+                  "temp_min": 274.26, "temp_max": 276.48},
+         "wind": {"speed": 2.16, "deg": 87}, "clouds": {"all": 90},
+         "weather": [{"id": 501, "main": "Rain", "description": "moderate rain", "icon": "10n"}],
+         "rain": {"1h": 0.9}},
+        {"dt": 1578387600, "main": {"temp": 275.0}, "snow": {"1h": 0.2}},
+    ]
+}
+
+
+class TestJsonToPostgres(unittest.TestCase):
+    def test_add_history(self):
+        converter = JsonToPostgres()
+        self.assertEqual(converter.add_history(RESPONSE, " Louisville ", 38.25, -85.76), 2)
+        tables = {table: rows for table, columns, rows in converter.tables()}
+
+        self.assertEqual(tables["cities"], [("Louisville", 38.25, -85.76, None, None, None)])
+        first = dict(zip(WEATHER_DATA_COLUMNS, tables["weather_data"][0]))
+        self.assertEqual(first["dt"], "2020-01-07 08:00:00")
+        self.assertEqual((first["temp_min"], first["wind_deg"], first["clouds"], first["rain_volume"]),
+                         (274.26, 87, 90, 0.9))
+        self.assertEqual(tables["weather_conditions"], [("Louisville", "2020-01-07 08:00:00", "moderate rain", "10n")])
+        self.assertEqual(tables["precipitation"], [("Louisville", "2020-01-07 08:00:00", "rain", 0.9),
+                                                   ("Louisville", "2020-01-07 09:00:00", "snow", 0.2)])
+
+    def test_add_columns_matches_add_history(self):
+        from_dicts = JsonToPostgres()
+        from_dicts.add_history(RESPONSE, "Louisville", 38.25, -85.76)
+        from_columns = JsonToPostgres()
+        self.assertEqual(from_columns.add_columns(HourlyColumns.from_response(RESPONSE), "Louisville", 38.25, -85.76), 2)
+        self.assertEqual(from_columns.tables(), from_dicts.tables())
+
+    def test_city_requires_coordinates(self):
+        with self.assertRaises(ValueError):
+            JsonToPostgres().add_history(RESPONSE, "Louisville", None, None)
+
+    def test_to_copy_buffer(self):
+        buffer = JsonToPostgres.to_copy_buffer([("a\tb", None, 1.5), ("back\\slash\n", 2, "x")])
+        self.assertEqual(buffer.read(), "a\\tb\t\\N\t1.5\nback\\\\slash\\n\t2\tx\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import io
+import time
+import logging
+import unittest
+import urllib.request
+from unittest import mock
+import mongomock
+from weather_app.handlers.ApiHandler import NotFoundError
+from weather_app.handlers.HttpTransport import HttpTransport, redact_url
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.handlers.WeatherApiHandler import WeatherApiHandler
+from weather_app.helpers.Metrics import Metrics
+from weather_app.tests.test_ReplayTransport import make_json_response
+
+
+def samples(metrics, name, **labels):
+    return [sample for sample in metrics.snapshot()[name]
+            if all(sample.get(label) == value for label, value in labels.items())]
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        self.transport = HttpTransport(max_retries=0)
+        self.handler = WeatherApiHandler("http://example.com/history", "secret", transport=self.transport,
+                                         metrics=self.metrics)
+        self.start = int(time.time()) - 86400
+
+    def respond(self, payload, status_code=200):
+        response = make_json_response(payload, status_code)
+        # as if the body came over the wire
+        response.raw = io.BytesIO(response.content)
+        response.raw.read()
+        return response
+
+    def test_api_calls_are_recorded(self):
+        responses = [self.respond({"cod": "200", "list": []}), self.respond({"cod": "404"}, 404)]
+        with mock.patch.object(self.transport.session, "get", side_effect=responses):
+            self.handler.get_weather_by_timestamps("London", None, None, self.start, self.start)
+            with self.assertRaises(NotFoundError):
+                self.handler.get_weather_by_timestamps("Atlantis", None, None, self.start, self.start)
+
+        [method] = samples(self.metrics, "weather_app_api_method_seconds", method="get_weather_by_timestamps")
+        self.assertEqual((method["handler"], method["count"]), ("WeatherApiHandler", 2))
+        [request] = samples(self.metrics, "weather_app_api_request_seconds", endpoint="city")
+        self.assertEqual(request["count"], 2)
+        self.assertEqual({sample["status"]: sample["value"] for sample in
+                          samples(self.metrics, "weather_app_api_responses_total")}, {"200": 1.0, "404": 1.0})
+        [size] = samples(self.metrics, "weather_app_api_response_bytes_total")
+        self.assertEqual(size["value"], len(responses[0].content) + len(responses[1].content))
+
+        exposition = self.metrics.exposition()
+        self.assertIn('weather_app_api_responses_total{endpoint="city",handler="WeatherApiHandler",status="404"} 1.0',
+                      exposition)
+
+    def test_mongo_operations_are_recorded(self):
+        mongo_handler = MongoHandler("mongodb://fake_connection", "test_db", retention_limit=1, delete_count=1,
+                                     metrics=self.metrics)
+        mongo_handler.client = mongomock.MongoClient()
+        mongo_handler.db = mongo_handler.client["test_db"]
+        mongo_handler.insert_document("weather_data", {"temp": 280.0})
+        mongo_handler.insert_document("weather_data", {"temp": 281.0})
+        mongo_handler.find_one("weather_data", {})
+
+        operations = {sample["operation"]: sample["count"] for sample in
+                      samples(self.metrics, "weather_app_mongo_operation_seconds", collection="weather_data")}
+        self.assertEqual(operations, {"insert_one": 2, "find_one": 1})
+        [retention] = samples(self.metrics, "weather_app_mongo_retention_seconds", strategy="count")
+        self.assertEqual(retention["count"], 2)
+        [deleted] = samples(self.metrics, "weather_app_mongo_retention_deleted_total")
+        self.assertEqual(deleted["value"], 1.0)
+
+    def test_http_endpoint(self):
+        with mock.patch.object(self.transport.session, "get", return_value=self.respond({"cod": "200"})):
+            self.handler.get_weather_by_timestamps("London", None, None, self.start, self.start)
+        port = self.metrics.serve(0)
+        self.addCleanup(self.metrics.close)
+        self.assertEqual(self.metrics.serve(0), port)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            body = response.read().decode("utf-8")
+        self.assertIn("weather_app_api_request_seconds_bucket", body)
+
+    def test_api_key_is_redacted(self):
+        self.assertEqual(redact_url("http://example.com/city?q=London&appid=secret&start=1"),
+                         "http://example.com/city?q=London&appid=***&start=1")
+        with mock.patch.object(self.transport.session, "get", return_value=self.respond({"cod": "200"})):
+            with self.assertLogs(level=logging.DEBUG) as logs:
+                self.handler.get_weather_by_timestamps("London", None, None, self.start, self.start)
+        calls = [line for line in logs.output if "Calling API" in line]
+        self.assertEqual(len(calls), 1)
+        self.assertIn("appid=***", calls[0])
+        self.assertNotIn("secret", "".join(logs.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import unittest
+import threading
+from unittest import mock
+import mongomock
+from weather_app.handlers.MongoClientRegistry import MongoClientRegistry, available_compressors
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.HandlerFactory import HandlerFactory
+
+# clients connect lazily, nothing listens on this port and no test talks to a server
+MONGO_URL = "mongodb://localhost:1"
+
+
+class TestMongoClientRegistry(unittest.TestCase):
+    def setUp(self):
+        MongoClientRegistry.close_all()
+
+    def tearDown(self):
+        MongoClientRegistry.close_all()
+
+    def test_acquire_shares_client_per_options(self):
+        first = MongoClientRegistry.acquire(MONGO_URL, maxPoolSize=10)
+        second = MongoClientRegistry.acquire(MONGO_URL, maxPoolSize=10, minPoolSize=None)
+        other = MongoClientRegistry.acquire(MONGO_URL, maxPoolSize=20)
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(first.options.pool_options.max_pool_size, 10)
+        self.assertEqual(MongoClientRegistry.get_stats(), {"clients": 2, "idle": 0, "references": 3})
+
+    def test_release_keeps_client_until_close_idle(self):
+        first = MongoClientRegistry.acquire(MONGO_URL)
+        other = MongoClientRegistry.acquire(MONGO_URL, readPreference="secondaryPreferred")
+        self.assertEqual(MongoClientRegistry.release(first), 0)
+        self.assertIs(MongoClientRegistry.acquire(MONGO_URL), first)
+        MongoClientRegistry.release(first)
+        self.assertIsNone(MongoClientRegistry.release(mongomock.MongoClient()))
+
+        self.assertEqual(MongoClientRegistry.close_idle(), 1)
+        self.assertEqual(MongoClientRegistry.get_stats(), {"clients": 1, "idle": 0, "references": 1})
+        self.assertIs(MongoClientRegistry.acquire(MONGO_URL, readPreference="secondaryPreferred"), other)
+        self.assertIsNot(MongoClientRegistry.acquire(MONGO_URL), first)
+
+    def test_release_while_creating_a_client(self):
+        # the garbage collector may run MongoHandler.__del__ while acquire holds the lock
+        first = MongoClientRegistry.acquire(MONGO_URL)
+        client_class = mock.Mock(side_effect=lambda *args, **kwargs: MongoClientRegistry.release(first) or mock.Mock())
+        with mock.patch("weather_app.handlers.MongoClientRegistry.MongoClient", client_class):
+            thread = threading.Thread(target=MongoClientRegistry.acquire, args=(MONGO_URL,), kwargs={"maxPoolSize": 5},
+                                      daemon=True)
+            thread.start()
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(MongoClientRegistry.get_stats(), {"clients": 2, "idle": 1, "references": 1})
+
+    def test_unavailable_compressors_are_skipped(self):
+        missing = {"zstd": "weather_app_missing_zstandard", "snappy": "weather_app_missing_snappy"}
+        with mock.patch.dict("weather_app.handlers.MongoClientRegistry.COMPRESSOR_MODULES", missing):
+            self.assertEqual(available_compressors("zstd, snappy, zlib"), "zlib")
+            client = MongoClientRegistry.acquire(MONGO_URL, compressors="zstd,zlib")
+            self.assertIs(MongoClientRegistry.acquire(MONGO_URL, compressors=["zlib"]), client)
+            self.assertIsNot(MongoClientRegistry.acquire(MONGO_URL, compressors="zstd"), client)
+        with self.assertRaises(ValueError):
+            available_compressors("lz4")
+
+    def test_fork_forgets_inherited_clients(self):
+        client = MongoClientRegistry.acquire(MONGO_URL)
+        with mock.patch.object(MongoClientRegistry, "_pid", -1):
+            # as in a child process: the parent's client is neither reused nor closed
+            child_client = MongoClientRegistry.acquire(MONGO_URL)
+        self.assertIsNot(child_client, client)
+        self.assertEqual(MongoClientRegistry.get_stats()["clients"], 1)
+        client.close()
+
+
+class TestMongoHandlerClientLifecycle(unittest.TestCase):
+    def setUp(self):
+        MongoClientRegistry.close_all()
+
+    def tearDown(self):
+        MongoClientRegistry.close_all()
+
+    def test_handlers_share_client(self):
+        first = MongoHandler(MONGO_URL, "test_db", client_options={"maxPoolSize": 5})
+        second = MongoHandler(MONGO_URL, "other_db", client_options={"maxPoolSize": 5})
+        self.assertIs(first.client, second.client)
+        self.assertEqual(MongoClientRegistry.get_stats()["references"], 2)
+        first.close()
+        first.close()
+        self.assertEqual(MongoClientRegistry.get_stats(), {"clients": 1, "idle": 0, "references": 1})
+        del second
+        self.assertEqual(MongoClientRegistry.get_stats(), {"clients": 1, "idle": 1, "references": 0})
+
+    def test_context_manager_releases_client(self):
+        with MongoHandler(MONGO_URL, "test_db") as mongo_handler:
+            # the mongomock tests replace the client, the registry reference is released all the same
+            mongo_handler.client = mongomock.MongoClient()
+            self.assertEqual(MongoClientRegistry.get_stats()["references"], 1)
+        self.assertEqual(MongoClientRegistry.get_stats()["references"], 0)
+
+    def test_private_client(self):
+        mongo_handler = MongoHandler(MONGO_URL, "test_db", shared_client=False)
+        self.assertEqual(MongoClientRegistry.get_stats()["clients"], 0)
+        client = mongo_handler.client
+        with mock.patch.object(client, "close") as close:
+            mongo_handler.close()
+        close.assert_called_once()
+        self.assertIsNone(mongo_handler.client)
+        client.close()
+
+    def test_reconnects_after_fork(self):
+        mongo_handler = MongoHandler(MONGO_URL, "test_db")
+        client = mongo_handler.client
+        with mock.patch.object(MongoClientRegistry, "_pid", -1), mock.patch.object(mongo_handler, "_pid", -1):
+            collection = mongo_handler.get_collection("weather_data")
+        self.assertIsNot(mongo_handler.client, client)
+        self.assertIs(collection.database.client, mongo_handler.client)
+        self.assertEqual(mongo_handler._pid, os.getpid())
+        client.close()
+
+    def test_client_options_from_environment(self):
+        environment = {"MONGO_MAX_POOL_SIZE": "50", "MONGO_SERVER_SELECTION_TIMEOUT_MS": "2000",
+                       "MONGO_READ_PREFERENCE": "secondaryPreferred", "MONGO_COMPRESSORS": "zstd,zlib"}
+        with mock.patch.dict(os.environ, environment):
+            self.assertEqual(HandlerFactory.get_mongo_client_options(),
+                             {"maxPoolSize": 50, "serverSelectionTimeoutMS": 2000,
+                              "readPreference": "secondaryPreferred", "compressors": "zstd,zlib"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import unittest.mock
 import mongomock
 from weather_app.handlers.MongoHandler import MongoHandler
 
@@ -71,5 +72,23 @@ class TestMongoHandler_MockDB(unittest.TestCase):
         count = collection.estimated_document_count()
         self.assertEqual(count, 9)
 
+    def test_insert_documents_runs_retention_once(self):
+        collection_name = "weather_data"
+        self.handler.retention_limit = 10
+        docs = [{"data": f"test_{i}"} for i in range(5)]
+        with unittest.mock.patch.object(self.handler, "data_retention") as retention:
+            inserted_ids = self.handler.insert_documents(collection_name, docs, ordered=False)
+        self.assertEqual(len(inserted_ids), 5)
+        retention.assert_called_once_with(collection_name)
+        self.assertEqual(self.handler.get_document_count(collection_name), 5)
+
+    def test_retention_interval(self):
+        self.handler.retention_interval = 3600
+        with unittest.mock.patch.object(self.handler, "data_retention") as retention:
+            for i in range(3):
+                self.handler.insert_document("weather_data", {"data": f"test_{i}"})
+        retention.assert_called_once_with("weather_data")
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from unittest import mock
+import mongomock
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.handlers.MongoPipeline import MongoPipeline, DAY
+
+START = 1743465600
+
+
+def hour(dt, temp, rain=None):
+    entry = {"dt": dt, "main": {"temp": temp, "humidity": 80}, "wind": {"speed": 3.0}}
+    if rain is not None:
+        entry["rain"] = {"1h": rain}
+    return entry
+
+
+class TestMongoPipeline(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mongomock.MongoClient()
+        self.mongo_handler = MongoHandler("mongodb://fake_connection", "test_db")
+        self.mongo_handler.client = self.mock_client
+        self.mongo_handler.db = self.mock_client["test_db"]
+        self.mock_client.drop_database("test_db")
+
+    def test_builder(self):
+        pipeline = (MongoPipeline()
+                    .match(city=["London", "Prague"], start_ts=START, end_ts=START + DAY)
+                    .project("city", "dt", temp="main.temp")
+                    .group_by_day(temp_max=("max", "temp"), hours=("count", None))
+                    .sort("-temp_max")
+                    .limit(3))
+        self.assertEqual(pipeline.stages(), [
+            {"$match": {"city": {"$in": ["London", "Prague"]}, "dt": {"$gte": START, "$lt": START + DAY}}},
+            {"$project": {"_id": 0, "city": 1, "dt": 1, "temp": "$main.temp"}},
+            {"$group": {"_id": {"city": "$city", "day": {"$subtract": ["$dt", {"$mod": ["$dt", DAY]}]}},
+                        "temp_max": {"$max": "$temp"}, "hours": {"$sum": 1}}},
+            {"$project": {"_id": 0, "day": "$_id.day", "city": "$_id.city", "temp_max": 1, "hours": 1}},
+            {"$sort": {"temp_max": -1}},
+            {"$limit": 3},
+        ])
+        with self.assertRaises(ValueError):
+            MongoPipeline().group_by_day(temp=("median", "temp"))
+
+    def test_daily_summary_of_hourly_documents(self):
+        documents = [{"location": "city:london", "city": "London", "dt": START + i * 3600, "temp": 280.0 + i % 24, "rain": 0.5 if i < 3 else 0.0,
+                      "humidity": 80} for i in range(72)]
+        documents.append({"location": "city:prague", "city": "Prague", "dt": START, "temp": 270.0, "rain": 0.0})
+        self.mongo_handler.get_collection("weather_hourly").insert_many(documents)
+
+        days = list(self.mongo_handler.aggregate("weather_hourly",
+                                                 MongoPipeline.daily_summary("london", START, START + 2 * DAY),
+                                                 allow_disk_use=True, batch_size=10))
+        self.assertEqual([(day["city"], day["day"], day["hours"]) for day in days],
+                         [("London", START, 24), ("London", START + DAY, 24)])
+        self.assertEqual((days[0]["temp_min"], days[0]["temp_max"], days[0]["temp_mean"]), (280.0, 303.0, 291.5))
+        self.assertAlmostEqual(days[0]["rain"], 1.5)
+        self.assertEqual(days[1]["rain"], 0.0)
+
+    def test_daily_summary_of_raw_responses(self):
+        collection = self.mongo_handler.get_collection("weather_data")
+        # two overlapping API responses, as stored by the tutorial
+        collection.insert_one({"city_name": "London", "cnt": 3,
+                               "list": [hour(START - 3600, 1.0), hour(START, 2.0, rain=0.4), hour(START + 3600, 4.0)]})
+        collection.insert_one({"city_name": "London", "cnt": 1, "list": [hour(START + DAY, 8.0)]})
+        collection.insert_one({"city_name": "London", "cnt": 1, "list": [hour(START - DAY, 9.0)]})
+
+        days = list(self.mongo_handler.aggregate(
+            "weather_data", MongoPipeline.daily_summary("London", START, START + 2 * DAY, hourly_list="list")))
+        self.assertEqual([(day["day"], day["hours"], day["temp_mean"], day["rain"]) for day in days],
+                         [(START, 2, 3.0, 0.4), (START + DAY, 1, 8.0, 0)])
+
+    def test_aggregate_options(self):
+        collection = mock.Mock()
+        with mock.patch.object(self.mongo_handler, "get_collection", return_value=collection):
+            self.mongo_handler.aggregate("weather_hourly", [{"$match": {}}], allow_disk_use=True, batch_size=500,
+                                         max_time_ms=1000)
+            self.mongo_handler.aggregate("weather_hourly", MongoPipeline().limit(1))
+        self.assertEqual(collection.aggregate.call_args_list, [
+            mock.call([{"$match": {}}], allowDiskUse=True, batchSize=500, maxTimeMS=1000),
+            mock.call([{"$limit": 1}], allowDiskUse=False),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import mongomock
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.handlers.MongoRetention import CountRetention, TtlRetention, CappedRetention, make_retention
+
+
+class TestMongoRetention(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mongomock.MongoClient()
+        self.handler = MongoHandler("mongodb://fake_connection", "test_db")
+        self.handler.client = self.mock_client
+        self.handler.db = self.mock_client["test_db"]
+        self.mock_client.drop_database("test_db")
+
+    def test_count_retention_deletes_oldest_by_id_cutoff(self):
+        self.handler.retention_limit = 100
+        self.handler.delete_count = 10
+        self.handler.insert_documents("weather_data", [{"i": i} for i in range(130)], apply_retention=False)
+
+        deleted = self.handler.data_retention("weather_data")
+        self.assertEqual(deleted, 30)
+        remaining = sorted(doc["i"] for doc in self.handler.get_collection("weather_data").find())
+        self.assertEqual(remaining, list(range(30, 130)))
+
+        # below the limit nothing happens
+        self.assertEqual(self.handler.data_retention("weather_data"), 0)
+
+    def test_ttl_retention_creates_index_and_stamps_documents(self):
+        self.handler.retention = TtlRetention(3600)
+        inserted_id = self.handler.insert_document("weather_data", {"data": "x"})
+
+        indexes = self.handler.get_collection("weather_data").index_information()
+        self.assertEqual(indexes["ingested_at_1"]["expireAfterSeconds"], 3600)
+        self.assertIn("ingested_at", self.handler.find_one("weather_data", {"_id": inserted_id}))
+        self.assertEqual(self.handler.data_retention("weather_data"), 0)
+
+    def test_only_retained_collections(self):
+        self.handler.retention = TtlRetention(3600)
+        self.handler.retention_limit = 1
+        inserted_id = self.handler.insert_document("cities", {"name": "London"})
+        self.handler.insert_document("cities", {"name": "Paris"})
+
+        self.assertNotIn("ingested_at_1", self.handler.get_collection("cities").index_information())
+        self.assertNotIn("ingested_at", self.handler.find_one("cities", {"_id": inserted_id}))
+        self.assertFalse(self.handler.maybe_run_retention("cities"))
+        self.assertEqual(self.handler.get_document_count("cities"), 2)
+
+    def test_make_retention(self):
+        self.assertIsInstance(make_retention("count"), CountRetention)
+        self.assertIsInstance(make_retention("ttl", ttl_seconds=60), TtlRetention)
+        self.assertIsInstance(make_retention("capped", capped_size_bytes=1024), CappedRetention)
+        with self.assertRaises(ValueError):
+            make_retention("ttl")
+        with self.assertRaises(ValueError):
+            make_retention("forever")
+
+
+if __name__ == '__main__':
+    unittest.main()
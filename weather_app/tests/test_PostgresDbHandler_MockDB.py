@@ -0,0 +1,46 @@
+import unittest
+from unittest import mock
+from weather_app.handlers.PostgresDbHandler import PostgresDbHandler
+from weather_app.tests.test_JsonToPostgres import RESPONSE
+
+
+class TestPostgresDbHandler_MockDB(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("weather_app.handlers.PostgresDbHandler.pool.ThreadedConnectionPool")
+        self.pool_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.handler = PostgresDbHandler("postgresql://fake_connection")
+        self.connection = self.handler.pool.getconn.return_value
+        self.cursor = self.connection.cursor.return_value.__enter__.return_value
+        self.cursor.rowcount = 2
+        self.cursor.fetchall.return_value = [("Louisville", "2020-01-07")]
+
+    def test_load_history_uses_copy_and_merges(self):
+        inserted = self.handler.load_history(RESPONSE, "Louisville", 38.25, -85.76)
+        self.assertEqual(inserted, {"cities": 2, "weather_data": 2, "weather_conditions": 2, "precipitation": 2,
+                                    "weather_daily": 2})
+
+        copies = [call.args[0] for call in self.cursor.copy_expert.call_args_list]
+        self.assertEqual(len(copies), 4)
+        self.assertTrue(copies[1].startswith("COPY staging_weather_data (city_name, dt, temp"))
+        merges = [call.args[0] for call in self.cursor.execute.call_args_list if call.args[0].startswith("INSERT")]
+        self.assertTrue(all("ON CONFLICT DO NOTHING" in merge for merge in merges))
+        # only the days returned by the weather_data merge are refreshed, after all tables are loaded
+        self.assertIn("RETURNING city_name, dt::date", merges[1])
+        refresh = self.cursor.execute.call_args_list[-1]
+        self.assertIn("INSERT INTO weather_daily", refresh.args[0])
+        self.assertEqual(refresh.args[1], (["Louisville"], ["2020-01-07"]))
+        self.connection.commit.assert_called_once()
+        self.handler.pool.putconn.assert_called_once_with(self.connection)
+
+    def test_failed_load_rolls_back(self):
+        self.cursor.copy_expert.side_effect = RuntimeError("copy failed")
+        with self.assertRaises(RuntimeError):
+            self.handler.load_history(RESPONSE, "Louisville", 38.25, -85.76)
+        self.connection.rollback.assert_called_once()
+        self.connection.commit.assert_not_called()
+        self.handler.pool.putconn.assert_called_once_with(self.connection)
+
+
+if __name__ == '__main__':
+    unittest.main()
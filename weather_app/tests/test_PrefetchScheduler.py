@@ -0,0 +1,111 @@
+import time
+import threading
+import unittest
+import mongomock
+from weather_app.handlers.ApiHandler import NotFoundError
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.PrefetchScheduler import PrefetchScheduler, DAY
+from weather_app.helpers.RateLimiter import RateLimiter, QuotaExceededError
+from weather_app.helpers.WeatherCache import WeatherCache, HOUR
+from weather_app.tests.test_WeatherCache import FakeWeatherApiHandler
+
+
+class FailingWeatherApiHandler(FakeWeatherApiHandler):
+    """
+    Fails for the given cities with the given exception.
+    """
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def get_weather_by_timestamps(self, city, latitude, longitude, start_ts, end_ts, occurrence_type="hour"):
+        if city in self.failures:
+            raise self.failures[city]
+        return super().get_weather_by_timestamps(city, latitude, longitude, start_ts, end_ts, occurrence_type)
+
+
+class TestPrefetchScheduler(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mongomock.MongoClient()
+        self.mongo_handler = MongoHandler("mongodb://fake_connection", "test_db")
+        self.mongo_handler.client = self.mock_client
+        self.mongo_handler.db = self.mock_client["test_db"]
+        self.mock_client.drop_database("test_db")
+        self.now = (int(time.time()) - 2 * DAY) // HOUR * HOUR + 600
+
+    def scheduler(self, api, **kwargs):
+        return PrefetchScheduler(WeatherCache(api, self.mongo_handler), **kwargs)
+
+    def test_registry(self):
+        scheduler = self.scheduler(FakeWeatherApiHandler())
+        self.assertEqual(scheduler.track("London", days=3), "city:london")
+        scheduler.track(None, 50.0755, 14.4378, days=1)
+        scheduler.track(" london ", days=5)
+        self.assertEqual([(location["_id"], location["days"]) for location in scheduler.tracked()],
+                         [("city:london", 5), ("coord:50.0755,14.4378", 1)])
+        self.assertTrue(scheduler.untrack("London"))
+        self.assertFalse(scheduler.untrack("London"))
+        with self.assertRaises(ValueError):
+            scheduler.track("Paris", days=0)
+
+    def test_rounds_fetch_only_new_hours(self):
+        api = FakeWeatherApiHandler()
+        scheduler = self.scheduler(api)
+        scheduler.track("London", days=2)
+        end_ts = self.now // HOUR * HOUR
+
+        self.assertEqual(scheduler.run_once(self.now)["refreshed"], 1)
+        self.assertEqual(api.calls, [(end_ts - 2 * DAY, end_ts - HOUR)])
+
+        api.calls.clear()
+        scheduler.run_once(self.now + HOUR)
+        self.assertEqual(api.calls, [(end_ts, end_ts)])
+        self.assertEqual(scheduler.tracked()[0]["last_refresh"], end_ts + HOUR)
+
+        # an interactive request for the tracked days is a cache hit
+        api.calls.clear()
+        cached = WeatherCache(api, self.mongo_handler).get_hour_range("London", None, None, end_ts - DAY, end_ts)
+        self.assertEqual(cached["cnt"], 24)
+        self.assertEqual(api.calls, [])
+
+    def test_failures_are_skipped(self):
+        api = FailingWeatherApiHandler({"Atlantis": NotFoundError("404")})
+        scheduler = self.scheduler(api)
+        scheduler.track("Atlantis", days=1)
+        scheduler.track("London", days=1)
+        summary = scheduler.run_once(self.now)
+        self.assertEqual((summary["refreshed"], summary["failed"]), (1, 1))
+        self.assertEqual({location["_id"]: location["failures"] for location in scheduler.tracked()},
+                         {"city:atlantis": 1, "city:london": 0})
+
+    def test_quota_stops_the_round(self):
+        api = FailingWeatherApiHandler({"Berlin": QuotaExceededError("used up")})
+        scheduler = self.scheduler(api)
+        for city in ("Berlin", "London", "Paris"):
+            scheduler.track(city, days=1)
+        summary = scheduler.run_once(self.now)
+        self.assertEqual((summary["refreshed"], summary["failed"], summary["skipped"]), (0, 1, 2))
+
+    def test_quota_reserve_is_left_untouched(self):
+        api = FakeWeatherApiHandler()
+        api.rate_limiter = RateLimiter(calls_per_minute=600, calls_per_month=3)
+        scheduler = self.scheduler(api, quota_reserve=1)
+        for city in ("Berlin", "London", "Paris"):
+            scheduler.track(city, days=1)
+        # the fake handler does not consult the limiter itself, so take the tokens here
+        api.rate_limiter.acquire(2)
+        summary = scheduler.run_once(self.now)
+        self.assertEqual((summary["refreshed"], summary["skipped"]), (0, 3))
+
+    def test_run_forever_stops_gracefully(self):
+        scheduler = self.scheduler(FakeWeatherApiHandler())
+        scheduler.track("London", days=1)
+        thread = threading.Thread(target=scheduler.run_forever, kwargs={"interval": 3600})
+        thread.start()
+        scheduler.stop()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+import mongomock
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.HourlyWeatherStore import HourlyWeatherStore
+from weather_app.helpers.RainQuery import RainQuery, day_range, intensity_bounds
+from weather_app.helpers.WeatherCache import location_key
+
+DAY_START = 1743465600  # 04/01/2025 00:00 UTC
+
+
+class TestRainQuery(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mongomock.MongoClient()
+        self.mongo_handler = MongoHandler("mongodb://fake_connection", "test_db")
+        self.mongo_handler.client = self.mock_client
+        self.mongo_handler.db = self.mock_client["test_db"]
+        self.mock_client.drop_database("test_db")
+        self.store = HourlyWeatherStore(self.mongo_handler)
+        collection = self.mongo_handler.get_collection("weather_hourly")
+        hours = [("London", DAY_START + 3600, 0.4), ("London", DAY_START + 7200, 3.0),
+                 ("Paris", DAY_START + 3600, 9.0), ("Paris", DAY_START + 7200, 0.0),
+                 ("Berlin", DAY_START + 86400 + 3600, 1.0)]
+        collection.insert_many([{"location": location_key(city, None, None), "city": city, "dt": dt, "rain": rain}
+                                for city, dt, rain in hours])
+        self.query = RainQuery(hourly_store=self.store)
+
+    def test_day_range_and_intensity(self):
+        self.assertEqual(day_range("04/01/2025"), (DAY_START, DAY_START + 86400))
+        self.assertEqual(day_range("04/01/2025", "04/02/2025"), (DAY_START, DAY_START + 2 * 86400))
+        with self.assertRaises(ValueError):
+            day_range("04/02/2025", "04/01/2025")
+        self.assertEqual(intensity_bounds("moderate"), (2.5, 7.6))
+        self.assertEqual(intensity_bounds(min_volume=1.0), (1.0, None))
+        with self.assertRaises(ValueError):
+            intensity_bounds("drizzle")
+
+    def test_rainy_hours_mongo(self):
+        hours = list(self.query.rainy_hours_mongo("04/01/2025"))
+        self.assertEqual([(h["city"], h["rain"]) for h in hours], [("London", 0.4), ("Paris", 9.0), ("London", 3.0)])
+        moderate = list(self.query.rainy_hours_mongo("04/01/2025", "04/02/2025", intensity="moderate"))
+        self.assertEqual([h["city"] for h in moderate], ["London"])
+
+    def test_rainy_places_mongo(self):
+        places = self.query.rainy_places_mongo("04/01/2025", "04/02/2025", min_volume=0.5)
+        self.assertEqual([(p["city"], p["hours"]) for p in places], [("Paris", 1), ("London", 1), ("Berlin", 1)])
+
+    def test_postgres_query(self):
+        postgres_handler = mock.Mock()
+        query = RainQuery(postgres_handler=postgres_handler)
+        query.rainy_hours_postgres("04/01/2025", intensity="heavy")
+        sql, params = postgres_handler.stream_query.call_args.args
+        self.assertIn("type = 'rain'", sql)
+        self.assertIn("volume >= %s AND volume < %s", sql)
+        self.assertEqual(params, [DAY_START, DAY_START + 86400, 7.6, 50.0])
+
+        query.rainy_places_postgres("04/01/2025")
+        sql, params = postgres_handler.execute_query.call_args.args
+        self.assertIn("volume > %s", sql)
+        self.assertIn("GROUP BY city_name", sql)
+
+
+if __name__ == '__main__':
+    unittest.main()
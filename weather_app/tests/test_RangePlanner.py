@@ -0,0 +1,56 @@
+import unittest
+from weather_app.helpers.RangePlanner import RangePlanner, HOUR
+
+
+class TestRangePlanner(unittest.TestCase):
+    def setUp(self):
+        self.planner = RangePlanner(max_hours_per_call=24)
+        self.start = 1743465600  # 2025-04-01 00:00 UTC
+        self.end = self.start + 30 * 24 * HOUR
+
+    def test_missing_intervals(self):
+        known = set(range(self.start + 5 * HOUR, self.start + 10 * HOUR, HOUR))
+        intervals = self.planner.missing_intervals(self.start, self.start + 12 * HOUR, known)
+        self.assertEqual(intervals, [(self.start, self.start + 5 * HOUR),
+                                     (self.start + 10 * HOUR, self.start + 12 * HOUR)])
+
+    def test_nothing_missing_means_no_calls(self):
+        known = set(self.planner.hour_range(self.start, self.end))
+        self.assertEqual(self.planner.plan(self.start, self.end, known), [])
+
+    def test_plan_respects_call_span(self):
+        calls = self.planner.plan(self.start, self.start + 50 * HOUR)
+        self.assertEqual(calls, [(self.start, self.start + 23 * HOUR),
+                                 (self.start + 24 * HOUR, self.start + 47 * HOUR),
+                                 (self.start + 48 * HOUR, self.start + 49 * HOUR)])
+
+    def test_plan_only_covers_missing_days(self):
+        # 25 of 30 days are stored, only the last 5 days should be requested
+        known = set(self.planner.hour_range(self.start, self.start + 25 * 24 * HOUR))
+        calls = self.planner.plan(self.start, self.end, known)
+        self.assertEqual(len(calls), 5)
+        self.assertEqual(calls[0][0], self.start + 25 * 24 * HOUR)
+        self.assertEqual(calls[-1][1], self.end - HOUR)
+
+    def test_fetch_and_stitch(self):
+        def fetch(call_start, call_end):
+            return {"cod": "200", "city_id": 1, "list": [{"dt": dt} for dt in range(call_end, call_start - 1, -HOUR)]}
+
+        known = {self.start + HOUR}
+        responses = self.planner.fetch(fetch, self.start, self.start + 30 * HOUR, known)
+        self.assertEqual(len(responses), 2)
+
+        merged = RangePlanner.stitch(responses, self.start, self.start + 30 * HOUR)
+        self.assertEqual([entry["dt"] for entry in merged["list"]], list(range(self.start, self.start + 30 * HOUR, HOUR)))
+        self.assertEqual(merged["cnt"], 30)
+        self.assertEqual(merged["city_id"], 1)
+
+        stats = self.planner.get_stats()
+        self.assertEqual(stats["hours_requested"], 30)
+        self.assertEqual(stats["hours_from_cache"], 1)
+        self.assertEqual(stats["hours_fetched"], 29)
+        self.assertEqual(stats["api_calls"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import asyncio
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import mongomock
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.RateLimiter import RateLimiter, QuotaExceededError, FileRateLimitBackend, \
+    MongoRateLimitBackend
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.now = 1_000_000.0
+        time_patcher = mock.patch("weather_app.helpers.RateLimiter.time.time", side_effect=lambda: self.now)
+        sleep_patcher = mock.patch("weather_app.helpers.RateLimiter.time.sleep", side_effect=self.advance)
+        time_patcher.start()
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(time_patcher.stop)
+        self.addCleanup(sleep_patcher.stop)
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def test_burst_then_smoothed(self):
+        limiter = RateLimiter(calls_per_minute=60, burst=5)
+        for _ in range(5):
+            limiter.acquire()
+        self.sleep.assert_not_called()
+
+        # the sixth call has to wait for one token, i.e. one second at 60 calls/minute
+        limiter.acquire()
+        self.sleep.assert_called_once()
+        self.assertAlmostEqual(self.sleep.call_args[0][0], 1.0)
+
+    def test_monthly_quota(self):
+        limiter = RateLimiter(calls_per_minute=600, calls_per_month=3)
+        for _ in range(3):
+            limiter.acquire()
+        with self.assertRaises(QuotaExceededError):
+            limiter.acquire()
+        self.assertEqual(limiter.get_budget()["month_remaining"], 0)
+
+    def test_wait_longer_than_max_wait_fails(self):
+        limiter = RateLimiter(calls_per_minute=1, burst=1, max_wait=10)
+        limiter.acquire()
+        with self.assertRaises(QuotaExceededError):
+            limiter.acquire()
+
+    def test_file_backend_is_shared(self):
+        path = os.path.join(tempfile.mkdtemp(), "state.json")
+        first = RateLimiter(calls_per_minute=60, burst=2, backend=FileRateLimitBackend(path))
+        second = RateLimiter(calls_per_minute=60, burst=2, backend=FileRateLimitBackend(path))
+        first.acquire()
+        second.acquire()
+        self.assertEqual(first.get_budget()["month_calls"], 2)
+        self.assertAlmostEqual(second.get_budget()["tokens_available"], 0.0)
+
+    def test_mongo_backend_is_shared(self):
+        handler = MongoHandler("mongodb://fake_connection", "test_db")
+        handler.client = mongomock.MongoClient()
+        handler.db = handler.client["test_db"]
+        first = RateLimiter(calls_per_minute=60, backend=MongoRateLimitBackend(handler))
+        second = RateLimiter(calls_per_minute=60, backend=MongoRateLimitBackend(handler))
+        first.acquire()
+        second.acquire()
+        second.acquire()
+        self.assertEqual(first.get_budget()["month_calls"], 3)
+
+    def test_acquire_async_keeps_blocking_backends_off_the_event_loop(self):
+        backend = FileRateLimitBackend(os.path.join(tempfile.mkdtemp(), "state.json"))
+        threads = []
+        update = backend.update
+        backend.update = lambda fn: threads.append(threading.get_ident()) or update(fn)
+        limiter = RateLimiter(calls_per_minute=60, burst=2, backend=backend)
+
+        async def acquire():
+            await limiter.acquire_async()
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(acquire())
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+        self.assertEqual(limiter.get_budget()["month_calls"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import requests
+from weather_app.handlers.ApiHandler import UnexpectedError
+from weather_app.handlers.WeatherApiHandler import WeatherApiHandler
+from weather_app.handlers.ReplayTransport import RecordingStore, RecordingTransport, ReplayTransport, \
+    RecordingNotFoundError, normalize_url
+from weather_app.helpers.SyntheticWeather import SyntheticWeather
+from weather_app.tests.test_HttpTransport import make_response
+
+API_ROOT = "https://history.openweathermap.org/data/2.5/history/"
+START_TS = 1704067200
+
+
+def make_json_response(payload, status_code=200):
+    response = make_response(status_code, {"Content-Type": "application/json", "Set-Cookie": "session=1"})
+    response._content = json.dumps(payload).encode("utf-8")
+    return response
+
+
+class TestReplayTransport(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        sleep_patcher = mock.patch("weather_app.handlers.ReplayTransport.time.sleep")
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+        self.history = SyntheticWeather(cities=1).history(0, START_TS, 24)
+
+    def url(self, api_key="secret"):
+        return WeatherApiHandler._timestamps_url(API_ROOT, api_key, "London", None, None,
+                                                 START_TS, START_TS + 23 * 3600, "hour")
+
+    def record(self):
+        transport = RecordingTransport(self.path, max_retries=0)
+        with mock.patch.object(transport.session, "get", return_value=make_json_response(self.history)):
+            handler = WeatherApiHandler(API_ROOT, "secret", transport=transport)
+            handler.get_weather_by_timestamps("London", None, None, START_TS, START_TS + 23 * 3600)
+        return transport
+
+    def test_normalize_url_drops_api_key_and_sorts_parameters(self):
+        self.assertEqual(normalize_url("HTTPS://Example.com/x?b=2&appid=abc&a=1"), "https://example.com/x?a=1&b=2")
+        self.assertEqual(normalize_url(self.url("one")), normalize_url(self.url("two")))
+
+    def test_record_then_replay_with_another_key(self):
+        self.record()
+        self.assertEqual(len(RecordingStore(self.path)), 1)
+        for name in os.listdir(self.path):
+            with open(os.path.join(self.path, name), "rb") as f:
+                self.assertNotIn(b"secret", f.read())
+
+        handler = WeatherApiHandler(API_ROOT, "other key", transport=ReplayTransport(self.path))
+        response = handler.get_weather_by_timestamps("London", None, None, START_TS, START_TS + 23 * 3600)
+        self.assertEqual(response, self.history)
+        entry = RecordingStore(self.path).load(self.url())
+        self.assertNotIn("Set-Cookie", entry["headers"])
+
+    def test_retryable_failures_are_not_recorded(self):
+        transport = RecordingTransport(self.path, max_retries=0)
+        with mock.patch.object(transport.session, "get", return_value=make_response(503)):
+            transport.get(self.url())
+        self.assertEqual(len(transport.store), 0)
+
+    def test_missing_recording(self):
+        handler = WeatherApiHandler(API_ROOT, "key", transport=ReplayTransport(self.path))
+        with self.assertRaises(RecordingNotFoundError):
+            handler.get_weather_by_timestamps("Paris", None, None, START_TS, START_TS + 3600)
+
+    def test_injected_latency(self):
+        self.record()
+        transport = ReplayTransport(self.path, latency=0.2, latency_jitter=0.1, seed=3)
+        transport.get(self.url())
+        delay = self.sleep.call_args[0][0]
+        self.assertGreaterEqual(delay, 0.2)
+        self.assertLessEqual(delay, 0.3)
+
+    def test_injected_errors_are_retried_and_reproducible(self):
+        self.record()
+
+        def failures(seed):
+            transport = ReplayTransport(self.path, error_rate=0.5, seed=seed, max_retries=0)
+            return [transport.get(self.url()).status_code for _ in range(50)]
+
+        statuses = failures(7)
+        self.assertEqual(statuses, failures(7))
+        self.assertTrue(set(statuses) - {200} <= {500, 503})
+        self.assertTrue(10 < statuses.count(200) < 40)
+
+        # with retries the transport's own backoff hides most of the injected errors
+        transport = ReplayTransport(self.path, error_rate=0.5, seed=7, max_retries=10, backoff_factor=0)
+        with mock.patch("weather_app.handlers.HttpTransport.time.sleep"):
+            self.assertEqual(transport.get(self.url()).status_code, 200)
+
+    def test_injected_connection_errors(self):
+        self.record()
+        transport = ReplayTransport(self.path, connection_error_rate=1.0, max_retries=0)
+        with self.assertRaises(requests.ConnectionError):
+            transport.get(self.url())
+        handler = WeatherApiHandler(API_ROOT, "key", transport=transport)
+        with self.assertRaises(UnexpectedError):
+            handler.get_weather_by_timestamps("London", None, None, START_TS, START_TS + 23 * 3600)
+
+    def test_invalid_error_rates(self):
+        with self.assertRaises(ValueError):
+            ReplayTransport(self.path, error_rate=0.7, connection_error_rate=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
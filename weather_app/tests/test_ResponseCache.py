@@ -0,0 +1,118 @@
+import io
+import os
+import json
+import time
+import tempfile
+import unittest
+from unittest import mock
+from weather_app.handlers.HttpTransport import HttpTransport
+from weather_app.handlers.WeatherApiHandler import WeatherApiHandler
+from weather_app.handlers.GeolocationApiHandler import GeolocationApiHandler
+from weather_app.helpers.ResponseCache import ResponseCache, DAY
+from weather_app.tests.test_ReplayTransport import make_json_response
+
+NOW = 1743465600 + 12 * 3600
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        time_patcher = mock.patch("weather_app.helpers.ResponseCache.time.time", return_value=NOW)
+        self.time = time_patcher.start()
+        self.addCleanup(time_patcher.stop)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "responses.sqlite")
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2, max_bytes=10)
+        cache.put("a", b"aaa")
+        cache.put("b", b"bbb")
+        self.assertEqual(cache.get("a"), b"aaa")
+        cache.put("c", b"ccc")
+        # b was the least recently used
+        self.assertIsNone(cache.get("b"))
+        cache.put("d", b"dddddddd")
+        self.assertEqual((cache.get("a"), cache.get("c"), cache.get("d")), (None, None, b"dddddddd"))
+        stats = cache.get_stats()
+        self.assertEqual((stats["memory_hits"], stats["misses"], stats["evictions"]), (2, 3, 3))
+        self.assertEqual((stats["memory_entries"], stats["memory_bytes"]), (1, 8))
+
+    def test_ttl(self):
+        cache = ResponseCache()
+        cache.put("recent", b"1", ttl=60)
+        cache.put("closed", b"2", ttl=None)
+        cache.put("uncached", b"3", ttl=0)
+        self.time.return_value = NOW + 61
+        self.assertEqual((cache.get("recent"), cache.get("closed"), cache.get("uncached")), (None, b"2", None))
+
+    def test_history_ttl(self):
+        cache = ResponseCache(recent_ttl=600)
+        today = NOW // DAY * DAY
+        self.assertIsNone(cache.history_ttl(today - 2 * DAY, NOW))
+        # yesterday is over, but its last hours may still be revised
+        self.assertEqual(cache.history_ttl(today - 3600, NOW), 600)
+        self.assertIsNone(cache.history_ttl(today - 3600, today + DAY))
+        self.assertEqual(cache.history_ttl(NOW - 3600, NOW), 600)
+
+    def test_persistent_tier(self):
+        cache = ResponseCache(path=self.path)
+        cache.put("closed", b'{"list": []}')
+        cache.put("recent", b"{}", ttl=60)
+        cache.close()
+
+        self.time.return_value = NOW + 120
+        reopened = ResponseCache(path=self.path)
+        self.assertEqual(reopened.get("closed"), b'{"list": []}')
+        self.assertIsNone(reopened.get("recent"))
+        # promoted to the memory tier
+        self.assertEqual(reopened.get("closed"), b'{"list": []}')
+        self.assertEqual({name: reopened.get_stats()[name] for name in ("memory_hits", "disk_hits", "misses")},
+                         {"memory_hits": 1, "disk_hits": 1, "misses": 1})
+        self.assertEqual(reopened.purge_expired(), 1)
+        self.assertEqual(len(reopened.disk), 1)
+        reopened.close()
+
+    def test_handlers_share_the_cache(self):
+        cache = ResponseCache(path=self.path)
+        transport = HttpTransport(max_retries=0)
+        weather = WeatherApiHandler("http://example.com/history", "key", transport=transport, response_cache=cache)
+        geolocation = GeolocationApiHandler("http://example.com/geo", "key", transport=transport,
+                                            response_cache=cache)
+        start = int(time.time()) - 10 * DAY
+        history = {"cod": "200", "cnt": 1, "list": [{"dt": start, "main": {"temp": 280.0}}]}
+
+        def respond(url, **kwargs):
+            return make_json_response([{"name": "Prague"}] if "/geo/" in url else history)
+
+        with mock.patch.object(transport.session, "get", side_effect=respond) as get:
+            for _ in range(2):
+                self.assertEqual(weather.get_weather_by_timestamps("London", None, None, start, start), history)
+                self.assertEqual(geolocation.direct_geocode("Prague"), [{"name": "Prague"}])
+            columns = weather.get_weather_columns_by_timestamps("London", None, None, start, start)
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(columns.to_response()["list"][0]["main"]["temp"], 280.0)
+        self.assertEqual(len(cache.disk), 2)
+        cache.close()
+
+    def test_columns_are_streamed_into_the_cache(self):
+        cache = ResponseCache()
+        transport = HttpTransport(max_retries=0)
+        weather = WeatherApiHandler("http://example.com/history", "key", transport=transport, response_cache=cache)
+        start = int(time.time()) - 10 * DAY
+        history = {"cod": "200", "cnt": 1, "list": [{"dt": start, "main": {"temp": 280.0}}]}
+        response = make_json_response(history)
+        # streamed responses are read from raw
+        response.raw = io.BytesIO(response.content)
+
+        with mock.patch.object(transport.session, "get", return_value=response) as get:
+            columns = weather.get_weather_columns_by_timestamps("London", None, None, start, start)
+            self.assertIsNone(columns.raw)
+            cached = weather.get_weather_columns_by_timestamps("London", None, None, start, start, keep_raw=True)
+        get.assert_called_once()
+        self.assertTrue(get.call_args.kwargs.get("stream"))
+        self.assertEqual(json.loads(cached.raw), history)
+        self.assertEqual(cache.get_stats()["stores"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
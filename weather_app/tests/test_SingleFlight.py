@@ -0,0 +1,157 @@
+import time
+import asyncio
+import threading
+import unittest
+import mongomock
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from weather_app.handlers.ApiHandler import ApiHandler, NotFoundError
+from weather_app.handlers.HttpTransport import HttpTransport
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.SingleFlight import SingleFlight
+from weather_app.helpers.WeatherCache import WeatherCache, HOUR
+from weather_app.tests.test_HttpTransport import make_response
+from weather_app.tests.test_WeatherCache import FakeWeatherApiHandler
+
+
+class SlowWeatherApiHandler(FakeWeatherApiHandler):
+    """
+    FakeWeatherApiHandler whose calls take a while, so concurrent requests overlap.
+    """
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def get_weather_by_timestamps(self, city, latitude, longitude, start_ts, end_ts, occurrence_type="hour"):
+        time.sleep(0.05)
+        with self._lock:
+            return super().get_weather_by_timestamps(city, latitude, longitude, start_ts, end_ts, occurrence_type)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return {"cod": "200"}
+
+        with ThreadPoolExecutor(8) as executor:
+            futures = [executor.submit(single_flight.do, "London", fetch) for _ in range(8)]
+            while single_flight.get_stats()["calls"] < 8:
+                time.sleep(0.001)
+            release.set()
+            results = [future.result() for future in futures]
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(single_flight.get_stats(), {"calls": 8, "executed": 1, "shared": 7, "shared_ratio": 7 / 8})
+
+        # the key is released afterwards, nothing is cached
+        single_flight.do("London", fetch)
+        self.assertEqual(len(calls), 2)
+
+    def test_errors_are_shared(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise NotFoundError("404")
+
+        with ThreadPoolExecutor(3) as executor:
+            futures = [executor.submit(single_flight.do, "Atlantis", fail) for _ in range(3)]
+            while single_flight.get_stats()["calls"] < 3:
+                time.sleep(0.001)
+            release.set()
+            for future in futures:
+                self.assertIsInstance(future.exception(), NotFoundError)
+        self.assertEqual(single_flight.get_stats()["executed"], 1)
+
+    def test_async_calls_share_one_execution(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return b"{}"
+
+        async def fail():
+            await asyncio.sleep(0.02)
+            raise NotFoundError("404")
+
+        async def main():
+            results = await asyncio.gather(*(single_flight.do_async("London", fetch) for _ in range(5)))
+            errors = await asyncio.gather(*(single_flight.do_async("Atlantis", fail) for _ in range(3)),
+                                          return_exceptions=True)
+            return results, errors
+
+        results, errors = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [b"{}"] * 5)
+        self.assertTrue(all(isinstance(error, NotFoundError) for error in errors))
+        self.assertEqual(single_flight.get_stats()["executed"], 2)
+
+    def test_async_cancelled_leader_hands_over_to_a_waiter(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return b"{}"
+
+        async def main():
+            leader = asyncio.ensure_future(single_flight.do_async("London", fetch))
+            await asyncio.sleep(0)
+            waiters = [asyncio.ensure_future(single_flight.do_async("London", fetch)) for _ in range(3)]
+            await asyncio.sleep(0)
+            leader.cancel()
+            results = await asyncio.gather(*waiters)
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return results
+
+        self.assertEqual(asyncio.run(main()), [b"{}"] * 3)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(single_flight.get_stats(), {"calls": 4, "executed": 2, "shared": 2, "shared_ratio": 0.5})
+
+    def test_api_handler_coalesces_identical_requests(self):
+        transport = HttpTransport(max_retries=0)
+        handler = ApiHandler("http://example.com", "key", transport=transport, single_flight=SingleFlight())
+
+        def slow_get(url, **kwargs):
+            time.sleep(0.05)
+            return make_response(200)
+
+        with mock.patch.object(transport.session, "get", side_effect=slow_get) as get:
+            with ThreadPoolExecutor(6) as executor:
+                # the parameter order does not matter
+                urls = ["http://example.com/x?a=1&b=2&appid=key", "http://example.com/x?b=2&a=1&appid=key"] * 3
+                responses = list(executor.map(handler._get, urls))
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual([response.json() for response in responses], [{"cod": "200"}] * 6)
+
+    def test_weather_cache_coalesces_overlapping_intervals(self):
+        mongo_handler = MongoHandler("mongodb://fake_connection", "test_db")
+        mongo_handler.client = mongomock.MongoClient()
+        mongo_handler.db = mongo_handler.client["test_db"]
+        api = SlowWeatherApiHandler()
+        cache = WeatherCache(api, mongo_handler)
+        cache.ensure_indexes()
+        start = (int(time.time()) - 7 * 86400) // HOUR * HOUR
+
+        intervals = [(start, start + 24 * HOUR), (start + 12 * HOUR, start + 36 * HOUR), (start, start + 24 * HOUR)]
+        with ThreadPoolExecutor(3) as executor:
+            results = list(executor.map(lambda interval: cache.get_hour_range("London", None, None, *interval),
+                                        intervals))
+        self.assertEqual([result["cnt"] for result in results], [24, 24, 24])
+        fetched = sum((end - begin) // HOUR + 1 for begin, end in api.calls)
+        self.assertEqual(fetched, 36)
+
+
+if __name__ == '__main__':
+    unittest.main()
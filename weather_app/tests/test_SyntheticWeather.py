@@ -0,0 +1,47 @@
+import unittest
+from weather_app.helpers.SyntheticWeather import SyntheticWeather
+from weather_app.helpers.HourlyWeatherStore import normalize_history
+from weather_app.helpers.JsonToPostgres import JsonToPostgres
+
+START = 1704067200
+
+
+class TestSyntheticWeather(unittest.TestCase):
+    def setUp(self):
+        self.generator = SyntheticWeather(cities=50, seed=7)
+
+    def test_cities(self):
+        self.assertEqual(len(self.generator.cities), 50)
+        self.assertEqual(len({city["name"] for city in self.generator.cities}), 50)
+        self.assertTrue(all(-60 <= city["lat"] <= 70 and -180 <= city["lon"] <= 180 for city in self.generator.cities))
+        self.assertEqual(SyntheticWeather(cities=50, seed=7).cities, self.generator.cities)
+
+    def test_history_is_deterministic_and_api_shaped(self):
+        response = self.generator.history(3, START + 1800, 48)
+        self.assertEqual(response, SyntheticWeather(cities=50, seed=7).history(3, START, 48))
+        self.assertEqual((response["cod"], response["cnt"], len(response["list"])), ("200", 48, 48))
+        self.assertEqual([entry["dt"] for entry in response["list"]], list(range(START, START + 48 * 3600, 3600)))
+        for entry in response["list"]:
+            self.assertTrue(200 < entry["main"]["temp"] < 330)
+            self.assertTrue(0 <= entry["clouds"]["all"] <= 100)
+            condition = entry["weather"][0]["main"]
+            self.assertEqual(condition == "Rain", "rain" in entry)
+            self.assertEqual(condition == "Snow", "snow" in entry)
+
+    def test_histories_feed_storage_paths(self):
+        histories = list(self.generator.histories(START, 200, cities=3, chunk_hours=168))
+        self.assertEqual([len(response["list"]) for response, _, _, _ in histories], [168, 32] * 3)
+        response, city, lat, lon = histories[0]
+        self.assertEqual(len(normalize_history(response, city)), 168)
+        converter = JsonToPostgres()
+        self.assertEqual(converter.add_history(response, city, lat, lon), 168)
+
+    def test_climate_has_rain_and_dry_spells(self):
+        hours = [entry for response, _, _, _ in self.generator.histories(START, 24 * 30, cities=20)
+                 for entry in response["list"]]
+        wet = sum("rain" in entry or "snow" in entry for entry in hours) / len(hours)
+        self.assertTrue(0.05 < wet < 0.3, wet)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,11 +35,12 @@ class TestWeatherApiHandler(unittest.TestCase):
         if not cls.api_root or not cls.api_key:
             raise Exception("OPEN_WEATHER_API or OPEN_WEATHER_API_KEY not set in .env files")
 
-        # Instantiate the handler (dummy call is done in __init__)
+        # Instantiate the handler and run the health check (the former dummy call)
         cls.handler = WeatherApiHandler(cls.api_root, cls.api_key)
+        cls.handler.health_check(force=True)
 
     def test_dummy_call(self):
-        # The dummy call in __init__ should have set last_json
+        # The health check should have set last_json
         self.assertIsNotNone(self.handler.last_json)
         self.assertIn("cod", self.handler.last_json)
         self.assertEqual(self.handler.last_json.get("cod"), "200")
@@ -0,0 +1,121 @@
+import time
+import unittest
+import mongomock
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.handlers.WeatherApiHandler import WeatherApiHandler, WeatherApiError
+from weather_app.helpers.WeatherCache import WeatherCache, location_key, HOUR, DAY
+
+
+class FakeWeatherApiHandler:
+    """
+    Stands in for WeatherApiHandler and records every timestamp range it is asked for.
+    """
+    def __init__(self):
+        self.calls = []
+        # hours the API has no data for
+        self.gaps = set()
+
+    def get_weather_by_timestamps(self, city, latitude, longitude, start_ts, end_ts, occurrence_type="hour"):
+        self.calls.append((start_ts, end_ts))
+        hours = [{"dt": dt, "main": {"temp": 280.0 + (dt // HOUR) % 10}} for dt in range(start_ts, end_ts + 1, HOUR)
+                 if dt not in self.gaps]
+        return {"cod": "200", "city_id": 2643743, "cnt": len(hours), "list": hours}
+
+
+class TestWeatherCache(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mongomock.MongoClient()
+        self.mongo_handler = MongoHandler("mongodb://fake_connection", "test_db")
+        self.mongo_handler.client = self.mock_client
+        self.mongo_handler.db = self.mock_client["test_db"]
+        self.mock_client.drop_database("test_db")
+
+        self.api = FakeWeatherApiHandler()
+        self.cache = WeatherCache(self.api, self.mongo_handler)
+        # a whole day, a week ago, aligned to an hour
+        self.start = (int(time.time()) - 7 * 86400) // HOUR * HOUR
+        self.end = self.start + 24 * HOUR
+
+    def test_location_key(self):
+        self.assertEqual(location_key(" London ", None, None), location_key("london", 1.0, 2.0))
+        self.assertEqual(location_key(None, 51.50741, -0.12779), "coord:51.5074,-0.1278")
+        self.assertEqual(location_key("coord:51.5074,-0.1278", None, None), "coord:51.5074,-0.1278")
+        with self.assertRaises(WeatherApiError):
+            location_key(None, None, None)
+
+    def test_second_call_is_served_from_cache(self):
+        first = self.cache.get_hour_range("London", None, None, self.start, self.end)
+        self.assertEqual(first["cnt"], 24)
+        self.assertEqual(len(self.api.calls), 1)
+
+        second = self.cache.get_hour_range("london", None, None, self.start, self.end)
+        self.assertEqual(len(self.api.calls), 1)
+        self.assertEqual(second["list"], first["list"])
+        self.assertEqual(second["city_id"], 2643743)
+
+    def test_only_missing_hours_are_fetched(self):
+        self.cache.get_hour_range("London", None, None, self.start + 6 * HOUR, self.start + 12 * HOUR)
+        self.api.calls.clear()
+
+        result = self.cache.get_hour_range("London", None, None, self.start, self.end)
+        # the 6 cached hours sit inside one planned window, so a single call covers both gaps
+        self.assertEqual(self.api.calls, [(self.start, self.end - HOUR)])
+        self.assertEqual(self.cache.range_planner.get_stats()["hours_from_cache"], 6)
+        self.assertEqual([entry["dt"] for entry in result["list"]], list(range(self.start, self.end, HOUR)))
+
+    def test_gaps_wider_than_a_call_are_fetched_separately(self):
+        self.cache.range_planner.max_hours_per_call = 4
+        self.cache.get_hour_range("London", None, None, self.start + 6 * HOUR, self.start + 12 * HOUR)
+        self.api.calls.clear()
+
+        self.cache.get_hour_range("London", None, None, self.start, self.start + 18 * HOUR)
+        self.assertEqual(self.api.calls, [(self.start, self.start + 3 * HOUR),
+                                          (self.start + 4 * HOUR, self.start + 5 * HOUR),
+                                          (self.start + 12 * HOUR, self.start + 15 * HOUR),
+                                          (self.start + 16 * HOUR, self.start + 17 * HOUR)])
+        self.assertEqual(self.mongo_handler.get_document_count("weather_cache"), 18)
+
+    def test_hours_the_api_did_not_return_are_not_fetched_again(self):
+        self.api.gaps = {self.start + 3 * HOUR, self.end - HOUR}
+        first = self.cache.get_hour_range("London", None, None, self.start, self.end)
+        self.assertEqual(first["cnt"], 22)
+
+        second = self.cache.get_hour_range("London", None, None, self.start, self.end)
+        self.assertEqual(len(self.api.calls), 1)
+        self.assertEqual(second["list"], first["list"])
+
+    def test_markers_of_recent_hours_expire(self):
+        end = int(time.time()) // HOUR * HOUR
+        self.api.gaps = {end - HOUR}
+        self.cache.get_hour_range("London", None, None, end - 4 * HOUR, end)
+        self.cache.get_hour_range("London", None, None, end - 4 * HOUR, end)
+        self.assertEqual(len(self.api.calls), 1)
+
+        # the marker expired and the hour has been published meanwhile
+        self.mongo_handler.get_collection("weather_cache").update_many({"missing": True}, {"$set": {"expires_at": 0}})
+        self.api.gaps = set()
+        result = self.cache.get_hour_range("London", None, None, end - 4 * HOUR, end)
+        self.assertEqual(self.api.calls[-1], (end - HOUR, end - HOUR))
+        self.assertEqual(result["cnt"], 4)
+        self.assertEqual(self.mongo_handler.get_document_count("weather_cache", {"missing": True}), 0)
+
+    def test_counterparts_cover_the_same_hours_as_the_handler(self):
+        # both ends are inclusive, as in WeatherApiHandler.get_weather_by_timestamps
+        result = self.cache.get_weather_by_timestamps("London", None, None, self.start, self.end)
+        self.assertEqual(self.api.calls, [(self.start, self.end)])
+        self.assertEqual([entry["dt"] for entry in result["list"]], list(range(self.start, self.end + HOUR, HOUR)))
+
+        start, end = (time.strftime("%m/%d/%Y", time.localtime(ts)) for ts in (self.start - 3 * DAY, self.start - DAY))
+        start_ts, end_ts = WeatherApiHandler._interval_range(start, end)
+        result = self.cache.get_weather_by_interval("London", None, None, start, end)
+        # the hour starting at the end date is included
+        self.assertEqual([entry["dt"] for entry in result["list"]], list(range(start_ts, end_ts, HOUR)))
+        self.assertEqual(result["list"][-1]["dt"], end_ts - HOUR)
+
+    def test_future_end_error(self):
+        with self.assertRaises(WeatherApiError):
+            self.cache.get_weather_n_days_into_past_by_date("London", None, None, "01/01/2999", 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
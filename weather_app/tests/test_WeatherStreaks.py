@@ -0,0 +1,98 @@
+import unittest
+from unittest import mock
+from datetime import date
+from decimal import Decimal
+import mongomock
+from weather_app.handlers.MongoHandler import MongoHandler
+from weather_app.helpers.HourlyWeatherStore import HourlyWeatherStore
+from weather_app.helpers.WeatherStreaks import WeatherStreaks, DAY
+
+DAY_START = 1743465600  # 04/01/2025 00:00 UTC
+
+# 04/01-04/02 rain all day, 04/03 rain but one cloudy hour, 04/04-04/06 rain, 04/07 clouds
+DAYS = ["rain", "rain", "mixed", "rain", "rain", "rain", "clouds"]
+
+
+def hourly_columns():
+    dts, conditions, clouds = [], [], []
+    for d, kind in enumerate(DAYS):
+        for h in range(24):
+            dts.append(DAY_START + d * DAY + h * 3600)
+            if kind == "clouds" or (kind == "mixed" and h == 12):
+                conditions.append("overcast clouds")
+            else:
+                conditions.append("light rain")
+            clouds.append(None if (d, h) == (1, 0) else 50 + d)
+    return dts, conditions, clouds
+
+
+class TestWeatherStreaks(unittest.TestCase):
+    def test_streaks_numpy(self):
+        dts, conditions, clouds = hourly_columns()
+        streaks = WeatherStreaks.streaks_numpy(dts[::-1], conditions[::-1], clouds[::-1], "light rain")
+        self.assertEqual([(s["start_day"], s["end_day"], s["days"]) for s in streaks],
+                         [("2025-04-01", "2025-04-02", 2), ("2025-04-04", "2025-04-06", 3)])
+        self.assertEqual(streaks[0]["daily"][0], {"day": "2025-04-01", "clouds": 50.0, "cnt": 24})
+        # unknown cloudiness is left out of the mean
+        self.assertEqual(streaks[0]["daily"][1], {"day": "2025-04-02", "clouds": 51.0, "cnt": 24})
+
+        longer = WeatherStreaks.streaks_numpy(dts, conditions, clouds, "light rain", min_length=3)
+        self.assertEqual([s["start_day"] for s in longer], ["2025-04-04"])
+        self.assertEqual(WeatherStreaks.streaks_numpy(dts, conditions, clouds, "snow"), [])
+        self.assertEqual(WeatherStreaks.streaks_numpy([], [], [], "snow"), [])
+
+    def test_numpy_engine_reads_hourly_store(self):
+        mongo_handler = MongoHandler("mongodb://fake_connection", "test_db")
+        mongo_handler.client = mongomock.MongoClient()
+        mongo_handler.db = mongo_handler.client["test_db"]
+        store = HourlyWeatherStore(mongo_handler)
+        dts, conditions, clouds = hourly_columns()
+        mongo_handler.get_collection("weather_hourly").insert_many(
+            [{"location": "city:london", "city": "London", "dt": dt, "weather_description": c, "clouds": cl}
+             for dt, c, cl in zip(dts, conditions, clouds)])
+
+        streaks = WeatherStreaks(hourly_store=store).find_streaks("London", "04/02/2025", "04/05/2025",
+                                                                  "light rain", engine="numpy")
+        self.assertEqual([(s["start_day"], s["days"]) for s in streaks], [("2025-04-02", 1), ("2025-04-04", 2)])
+
+    def test_streaks_mongo(self):
+        store = mock.Mock(collection_name="weather_hourly")
+        collection = store.mongo_handler.get_collection.return_value
+        collection.aggregate.return_value = [
+            {"_id": 20179.0, "first": DAY_START, "days": [
+                {"day": DAY_START + DAY, "clouds": 51.0, "cnt": 24}, {"day": DAY_START, "clouds": 50.0, "cnt": 24}]},
+        ]
+        streaks = WeatherStreaks(hourly_store=store).find_streaks("London", "04/01/2025", "04/07/2025", "light rain",
+                                                                  min_length=2)
+        dts, conditions, clouds = hourly_columns()
+        expected = WeatherStreaks.streaks_numpy(dts, conditions, clouds, "light rain", min_length=2)[0]
+        self.assertEqual(streaks, [expected])
+
+        pipeline = collection.aggregate.call_args.args[0]
+        self.assertEqual(pipeline[0]["$match"], {"location": "city:london",
+                                                 "dt": {"$gte": DAY_START, "$lt": DAY_START + 7 * DAY}})
+        self.assertIn("$setWindowFields", pipeline[3])
+        self.assertEqual(pipeline[5], {"$match": {"days.1": {"$exists": True}}})
+
+    def test_streaks_postgres(self):
+        postgres_handler = mock.Mock()
+        postgres_handler.execute_query.return_value = [
+            ([date(2025, 4, 1), date(2025, 4, 2)], [Decimal("50"), Decimal("51")], [24, 24])]
+        streaks = WeatherStreaks(postgres_handler=postgres_handler).find_streaks(
+            "London", "04/01/2025", "04/07/2025", "light rain")
+        dts, conditions, clouds = hourly_columns()
+        self.assertEqual(streaks[0], WeatherStreaks.streaks_numpy(dts, conditions, clouds, "light rain")[0])
+
+        sql, params = postgres_handler.execute_query.call_args.args
+        self.assertIn("row_number() OVER (ORDER BY day)", sql)
+        self.assertIn("lower(btrim(wd.city_name)) = lower(btrim(%(city)s))", sql)
+        self.assertEqual(params, {"city": "London", "start": DAY_START, "end": DAY_START + 7 * DAY,
+                                  "condition": "light rain", "min_length": 1})
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            WeatherStreaks().find_streaks("London", "04/01/2025", "04/07/2025", "light rain", engine="pandas")
+
+
+if __name__ == '__main__':
+    unittest.main()